@@ -0,0 +1,140 @@
+# Pool de contas (carteiras/subcontas) para distribuir a execução das estratégias
+import asyncio
+import logging
+from handlers.execution_handler import ExecutionHandler
+from handlers.position_reconciler import PositionReconciler
+from handlers.records import Position
+
+logger = logging.getLogger("AccountPool")
+
+def sum_positions(positions: list) -> dict:
+    """
+    Soma as posições do mesmo símbolo abertas em contas diferentes (symbol -> Position).
+    Quantidade, notional e PnL são somados com sinal; o preço de entrada é a média
+    ponderada quando todas as parcelas estão do mesmo lado.
+    """
+    by_symbol = {}
+    for p in positions:
+        if p.symbol:
+            by_symbol.setdefault(p.symbol, []).append(p)
+    merged = {}
+    for symbol, parts in by_symbol.items():
+        if len(parts) == 1:
+            merged[symbol] = parts[0]
+            continue
+        contracts = sum(p.signed_contracts for p in parts)
+        notional = sum(p.signed_notional for p in parts)
+        entry_price = None
+        if len({p.direction for p in parts}) == 1 and all(p.entry_price is not None for p in parts):
+            entry_price = sum(p.contracts * p.entry_price for p in parts) / sum(p.contracts for p in parts)
+        merged[symbol] = Position(
+            symbol,
+            'short' if contracts < 0 else 'long',
+            abs(contracts),
+            entry_price=entry_price,
+            notional=abs(notional),
+            unrealized_pnl=sum(p.unrealized_pnl or 0.0 for p in parts),
+        )
+    return merged
+
+class Account:
+    """
+    Uma conta da exchange com conexão própria (e, portanto, seu próprio limite de
+    requisições e pipeline de ordens), balanço em cache e reconciliador de posições.
+    """
+    def __init__(self, name: str, platform_params: dict):
+        self.name = name
+        self.execution_handler = ExecutionHandler(platform_params)
+        self.reconciler = PositionReconciler(
+            self.execution_handler,
+            interval=platform_params["reconcile_interval"],
+            grace_period=platform_params["reconcile_grace_period"],
+        )
+        self.instances = 0  # Estratégias atribuídas no momento
+
+class AccountPool:
+    """
+    Distribui as instâncias de estratégia entre as contas configuradas. A atribuição
+    segue `assignment` (chaves 'Estratégia|símbolo', 'Estratégia' ou 'símbolo' -> conta);
+    o restante vai para a conta com menos instâncias. Um pico de ordens numa conta
+    consome apenas o limite dela e não atrasa as estratégias das outras.
+
+    As posições de todas as contas são agregadas (somadas por símbolo) e repassadas aos
+    listeners (risco de portfólio, métricas), que continuam vendo a exposição total.
+    """
+    def __init__(self, accounts: list, platform_params: dict, assignment: dict = None):
+        if not accounts:
+            raise ValueError("Nenhuma conta configurada para o pool de execução.")
+        self.accounts = {}
+        for account in accounts:
+            params = {
+                **platform_params,
+                "account_name": account["name"],
+                "wallet_address": account["wallet_address"],
+                "private_key": account["private_key"],
+                "vault_address": account.get("vault_address"),
+            }
+            self.accounts[account["name"]] = Account(account["name"], params)
+        self.assignment = assignment or {}
+        unknown = set(self.assignment.values()) - set(self.accounts)
+        if unknown:
+            raise ValueError(f"Contas inexistentes em 'account_assignment': {sorted(unknown)}.")
+        self._positions = {}  # conta -> últimas posições
+        self._listeners = []
+        for account in self.accounts.values():
+            account.reconciler.add_listener(self._positions_listener(account.name))
+
+    def _positions_listener(self, name: str):
+        def on_positions(positions):
+            self._positions[name] = positions
+            merged = list(sum_positions(
+                [p for account_positions in self._positions.values() for p in account_positions]
+            ).values())
+            for callback in self._listeners:
+                callback(merged)
+        return on_positions
+
+    def add_listener(self, callback):
+        """Registra um callback chamado com as posições de todas as contas a cada reconciliação."""
+        self._listeners.append(callback)
+
+    @property
+    def open_positions(self) -> dict:
+        """Posições abertas (symbol -> Position) somando todas as contas."""
+        return sum_positions([
+            p for account in self.accounts.values() for p in account.reconciler.open_positions.values()
+        ])
+
+    async def get_balance_usd(self) -> float:
+        """Patrimônio total do pool (soma dos balanços em cache de cada conta)."""
+        balances = await asyncio.gather(*(a.execution_handler.get_balance_usd() for a in self.accounts.values()))
+        return sum(balances)
+
+    def assign(self, strategy_name: str, symbol: str = None) -> Account:
+        """Escolhe a conta de uma nova instância (mapeamento configurado ou menor carga)."""
+        for key in (f"{strategy_name}|{symbol}", strategy_name, symbol):
+            if key and key in self.assignment:
+                account = self.accounts[self.assignment[key]]
+                break
+        else:
+            account = min(self.accounts.values(), key=lambda a: a.instances)
+        account.instances += 1
+        logger.info(f"{strategy_name} ({symbol or '-'}) atribuída à conta '{account.name}' ({account.instances} instâncias).")
+        return account
+
+    def release(self, account: Account):
+        account.instances = max(0, account.instances - 1)
+
+    async def _run_reconciler(self, account: Account):
+        try:
+            await account.execution_handler.initialize()
+            await account.reconciler.run()
+        except Exception as e:
+            logger.critical(f"Erro fatal no reconciliador da conta '{account.name}': {e}", exc_info=True)
+        finally:
+            await account.execution_handler.close_connection()
+
+    async def run(self):
+        """Um reconciliador por conta, todos sobre a conexão compartilhada da própria conta."""
+        logger.info(f"Pool de execução com {len(self.accounts)} contas: {', '.join(self.accounts)}.")
+        await asyncio.gather(*(self._run_reconciler(account) for account in self.accounts.values()))
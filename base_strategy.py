@@ -4,16 +4,33 @@ from handlers.data_handler import DataHandler
 from handlers.execution_handler import ExecutionHandler
 from handlers.risk_manager import RiskManager
 from handlers.state_manager import StateManager
+from handlers.compute_offload import get_compute_offloader
+from handlers.metrics import get_metrics_registry
 
 class BaseStrategy(ABC):
     """Classe base para todas as estratégias de negociação."""
     def __init__(self, platform_params: dict, strategy_params: dict):
         self.platform_params = platform_params  # Armazena a configuração da plataforma
-        self.data_handler = DataHandler(platform_params)
+        # Permite que o orquestrador injete outra fonte de dados (ex.: memória compartilhada)
+        data_handler_factory = platform_params.get("data_handler_factory", DataHandler)
+        self.data_handler = data_handler_factory(platform_params)
         self.execution_handler = self.data_handler.execution_handler
-        self.risk_manager = RiskManager(self.execution_handler, platform_params)
+        self.risk_manager = RiskManager(self.execution_handler, platform_params, platform_params.get("portfolio_risk"))
         self.state_manager = StateManager()
         self.params = strategy_params
+        self.compute = get_compute_offloader(platform_params)
+        # Métricas exibidas no dashboard; subclasses ajustam o símbolo exibido
+        self.metrics = get_metrics_registry(platform_params).strategy(
+            type(self).__name__, platform_params.get("target_symbol"), self.state_manager
+        )
+
+    def next_tick_interval(self) -> float:
+        """Intervalo até o próximo tick, pela cadência adaptativa dos símbolos consultados."""
+        return self.data_handler.cadence.next_interval(*self.data_handler.polled_symbols)
+
+    async def offload(self, fn, *args, **kwargs):
+        """Executa cálculos puramente de CPU fora do event loop (ver ComputeOffloader)."""
+        return await self.compute.run(fn, *args, **kwargs)
 
     @abstractmethod
     async def process_tick(self):
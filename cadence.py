@@ -0,0 +1,202 @@
+# Cadência adaptativa de consultas e proteção dos endpoints da exchange
+import logging
+import math
+import random
+import time
+import numpy as np
+
+logger = logging.getLogger("Cadence")
+
+class _SymbolActivity:
+    """Médias móveis exponenciais (rápida e lenta) da movimentação de um símbolo."""
+    __slots__ = ('last_price', 'last_time', 'move_fast', 'move_slow', 'atr_fast', 'atr_slow', 'last_bar')
+
+    def __init__(self):
+        self.last_price = None
+        self.last_time = None
+        self.move_fast = self.move_slow = None
+        self.atr_fast = self.atr_slow = None
+        self.last_bar = None
+
+class CadenceController:
+    """
+    Define, por símbolo, o intervalo até a próxima consulta. A atividade de um símbolo é
+    a razão entre a média rápida e a média lenta de duas medidas: a variação do mid-price
+    entre consultas (normalizada por √Δt) e o ATR relativo das velas. Quando o mercado se
+    move mais que o habitual (razão > 1), o intervalo diminui; em mercado parado, aumenta.
+
+        intervalo = clamp(base / atividade, mínimo, máximo)
+    """
+    def __init__(self, base_interval: float = 30.0, min_interval: float = 5.0, max_interval: float = 120.0,
+                 fast_alpha: float = 0.3, slow_alpha: float = 0.02):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self._activity = {}  # symbol -> _SymbolActivity
+
+    def _ewma(self, fast, slow, value):
+        if fast is None:
+            return value, value
+        return fast + self.fast_alpha * (value - fast), slow + self.slow_alpha * (value - slow)
+
+    def observe_price(self, symbol: str, price: float, now: float = None):
+        """Registra um mid-price consultado (mudanças do topo do livro)."""
+        if not price or price <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        state = self._activity.setdefault(symbol, _SymbolActivity())
+        if state.last_price is not None and now > state.last_time:
+            move = abs(math.log(price / state.last_price)) / math.sqrt(now - state.last_time)
+            state.move_fast, state.move_slow = self._ewma(state.move_fast, state.move_slow, move)
+        state.last_price, state.last_time = price, now
+
+    def observe_candles(self, symbol: str, candles):
+        """Registra o ATR relativo (14 velas) de um CandleBlock, uma vez por vela nova."""
+        if len(candles) < 15:
+            return
+        state = self._activity.setdefault(symbol, _SymbolActivity())
+        bar = candles.timestamp[-1]
+        if state.last_bar is not None and bar <= state.last_bar:
+            return
+        state.last_bar = bar
+        high, low, close = candles.high[-14:], candles.low[-14:], candles.close[-15:]
+        prev_close = close[:-1]
+        true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+        # Normaliza pelo tamanho da vela para que timeframes diferentes sejam comparáveis
+        bar_minutes = max((candles.timestamp[-1] - candles.timestamp[-2]) / 60_000, 1.0)
+        atr_rel = float(true_range.mean() / close[-1]) / math.sqrt(bar_minutes)
+        state.atr_fast, state.atr_slow = self._ewma(state.atr_fast, state.atr_slow, atr_rel)
+
+    def activity(self, symbol: str) -> float:
+        """Atividade relativa do símbolo (1.0 = habitual ou sem dados)."""
+        state = self._activity.get(symbol)
+        if state is None:
+            return 1.0
+        ratios = [
+            fast / slow
+            for fast, slow in ((state.move_fast, state.move_slow), (state.atr_fast, state.atr_slow))
+            if fast is not None and slow
+        ]
+        return max(ratios) if ratios else 1.0
+
+    def next_interval(self, *symbols) -> float:
+        """Intervalo até o próximo tick: o do símbolo mais ativo entre os informados."""
+        activity = max((self.activity(symbol) for symbol in symbols), default=1.0)
+        if activity <= 0:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, self.base_interval / activity))
+
+_cadence = None
+
+def get_cadence_controller(platform_params: dict = None) -> CadenceController:
+    """Retorna o controlador de cadência do processo, criando-o na primeira chamada."""
+    global _cadence
+    if _cadence is None:
+        params = platform_params or {}
+        _cadence = CadenceController(
+            base_interval=params.get("cadence_base_interval", 30.0),
+            min_interval=params.get("cadence_min_interval", 5.0),
+            max_interval=params.get("cadence_max_interval", 120.0),
+        )
+    return _cadence
+
+class CircuitBreaker:
+    """
+    Protege um endpoint da exchange. Cada falha consecutiva bloqueia novas chamadas por
+    um backoff exponencial (com jitter); ao atingir `failure_threshold`, o circuito abre
+    e o endpoint fica bloqueado por `reset_timeout`. Depois disso, uma única chamada de
+    teste é liberada (meio-aberto): sucesso fecha o circuito, falha o reabre. Se a
+    chamada de teste não reportar resultado (ex.: task cancelada) em `reset_timeout`,
+    outra é liberada.
+    """
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, name: str, failure_threshold: int = 5, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, reset_timeout: float = 120.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._blocked_until = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def allow(self) -> bool:
+        """Indica se uma chamada pode ser feita agora (não bloqueia)."""
+        if time.monotonic() < self._blocked_until:
+            self.rejected += 1
+            return False
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            now = time.monotonic()
+            if self._probe_in_flight and now - self._probe_started < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+            self._probe_started = now
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Endpoint '{self.name}' recuperado; circuito fechado.")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        now = time.monotonic()
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"Circuito do endpoint '{self.name}' aberto após {self.failures} falhas; "
+                    f"novas chamadas bloqueadas por {self.reset_timeout:.0f}s."
+                )
+            self.state = self.OPEN
+            self._blocked_until = now + self.reset_timeout
+        else:
+            delay = min(self.backoff_base * 2 ** (self.failures - 1), self.backoff_max)
+            self._blocked_until = now + delay * random.uniform(0.5, 1.0)
+
+class EndpointBreakers:
+    """Um CircuitBreaker por endpoint, compartilhado por todos os handlers do processo."""
+    def __init__(self, **breaker_params):
+        self._params = breaker_params
+        self._breakers = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(endpoint, **self._params)
+        return breaker
+
+    def __iter__(self):
+        return iter(self._breakers.values())
+
+_breakers = None
+
+def get_endpoint_breakers(platform_params: dict = None) -> EndpointBreakers:
+    """Retorna os circuit breakers do processo, criando-os na primeira chamada."""
+    global _breakers
+    if _breakers is None:
+        params = platform_params or {}
+        _breakers = EndpointBreakers(
+            failure_threshold=params.get("breaker_failure_threshold", 5),
+            backoff_base=params.get("breaker_backoff_base", 1.0),
+            backoff_max=params.get("breaker_backoff_max", 60.0),
+            reset_timeout=params.get("breaker_reset_timeout", 120.0),
+        )
+    return _breakers
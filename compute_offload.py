@@ -0,0 +1,127 @@
+# Execução de cálculos pesados fora do event loop
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class ComputeOffloader:
+    """
+    Envia trabalho puramente de CPU (indicadores, features, estatísticas) para um pool
+    de threads ou processos, com concorrência limitada, para que o event loop continue
+    livre para I/O e confirmações de ordens.
+
+    O padrão é o pool de processos: os indicadores do pandas_ta são Python puro em boa
+    parte e seguram o GIL, então numa thread continuariam disputando o interpretador
+    com o event loop. Com processos, as funções e os argumentos precisam ser
+    serializáveis (funções de nível de módulo, DataFrames, arrays, CandleBlock).
+
+    A concorrência pode ser reduzida em tempo de execução (`set_concurrency`), o que o
+    LoopLagMonitor faz quando o event loop atrasa.
+    """
+    def __init__(self, executor: str = "process", max_workers: int = 4, max_concurrency: int = 4):
+        if executor == "process":
+            # 'spawn': o processo principal já tem threads (to_thread, pools), e fork com threads é inseguro
+            self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        elif executor == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        else:
+            raise ValueError(f"Tipo de executor inválido: '{executor}'. Use 'thread' ou 'process'.")
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency  # Limite atual de cálculos simultâneos
+        self._active = 0
+        self._slots = None  # asyncio.Condition, criada no loop em execução
+        logger.info(f"Offload de computação ativo ({executor}, {max_workers} workers, concorrência {max_concurrency}).")
+
+    def _condition(self) -> asyncio.Condition:
+        if self._slots is None:
+            self._slots = asyncio.Condition()
+        return self._slots
+
+    async def run(self, fn, *args, **kwargs):
+        """Executa `fn(*args, **kwargs)` no pool e aguarda o resultado sem bloquear o loop."""
+        slots = self._condition()
+        async with slots:
+            await slots.wait_for(lambda: self._active < self.concurrency)
+            self._active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            async with slots:
+                self._active -= 1
+                slots.notify_all()
+
+    async def set_concurrency(self, limit: int):
+        """Ajusta o limite de cálculos simultâneos (entre 1 e `max_concurrency`)."""
+        limit = max(1, min(self.max_concurrency, limit))
+        if limit == self.concurrency:
+            return
+        slots = self._condition()
+        async with slots:
+            self.concurrency = limit
+            slots.notify_all()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_offloader = None
+
+def get_compute_offloader(platform_params: dict = None) -> ComputeOffloader:
+    """Retorna o offloader do processo, criando-o na primeira chamada."""
+    global _offloader
+    if _offloader is None:
+        params = platform_params or {}
+        _offloader = ComputeOffloader(
+            executor=params.get("compute_executor", "process"),
+            max_workers=params.get("compute_max_workers", 4),
+            max_concurrency=params.get("compute_max_concurrency", 4),
+        )
+    return _offloader
+
+class LoopLagMonitor:
+    """
+    Mede o atraso do event loop (quanto um `sleep` acorda depois do previsto). Quando o
+    alvo é ultrapassado, reduz pela metade a concorrência do `offloader` (menos
+    resultados chegando ao loop ao mesmo tempo e, com threads, menos disputa pelo GIL);
+    após `recovery_samples` medições seguidas dentro do alvo, devolve um slot por vez.
+    """
+    def __init__(self, target_ms: float = 100.0, interval: float = 0.5, offloader: ComputeOffloader = None,
+                 recovery_samples: int = 10):
+        self.target_ms = target_ms
+        self.interval = interval
+        self.offloader = offloader
+        self.recovery_samples = recovery_samples
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.breaches = 0
+        self._healthy = 0  # Medições seguidas dentro do alvo
+
+    async def run(self):
+        logger.info(f"Monitor de atraso do event loop iniciado (alvo de {self.target_ms:.0f} ms).")
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last_lag_ms = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+            if self.last_lag_ms > self.target_ms:
+                self.breaches += 1
+                self._healthy = 0
+                throttle = ""
+                if self.offloader and self.offloader.concurrency > 1:
+                    await self.offloader.set_concurrency(self.offloader.concurrency // 2)
+                    throttle = f" Concorrência de cálculo reduzida para {self.offloader.concurrency}."
+                logger.warning(
+                    f"Atraso do event loop de {self.last_lag_ms:.1f} ms excedeu o alvo de {self.target_ms:.0f} ms "
+                    f"({self.breaches} ocorrências, máximo {self.max_lag_ms:.1f} ms).{throttle}"
+                )
+                continue
+            self._healthy += 1
+            if self.offloader and self._healthy >= self.recovery_samples and \
+                    self.offloader.concurrency < self.offloader.max_concurrency:
+                self._healthy = 0
+                await self.offloader.set_concurrency(self.offloader.concurrency + 1)
+                logger.info(f"Atraso do event loop normalizado; concorrência de cálculo em {self.offloader.concurrency}.")
@@ -3,22 +3,89 @@
 import os
 from dotenv import load_dotenv
 
-# Importações das classes de estratégia que serão utilizadas
-from strategies.trend_following import TrendFollowingStrategy
-# A classe StatisticalArbitrageStrategy será criada no próximo passo
-from strategies.statistical_arbitrage import StatisticalArbitrageStrategy
+# As classes de estratégia são referenciadas por caminho pontilhado e importadas
+# apenas quando habilitadas (ver strategies/strategy_registry.py)
 
 load_dotenv()
 
+def _load_accounts() -> list:
+    """
+    Contas de execução: a principal (HYPERLIQUID_WALLET_ADDRESS/HYPERLIQUID_PRIVATE_KEY) e
+    as adicionais numeradas a partir de 2 (HYPERLIQUID_WALLET_ADDRESS_2, HYPERLIQUID_PRIVATE_KEY_2
+    e, para subcontas, HYPERLIQUID_VAULT_ADDRESS_2).
+    """
+    accounts = [{
+        "name": "principal",
+        "wallet_address": os.getenv("HYPERLIQUID_WALLET_ADDRESS"),
+        "private_key": os.getenv("HYPERLIQUID_PRIVATE_KEY"),
+        "vault_address": os.getenv("HYPERLIQUID_VAULT_ADDRESS"),
+    }]
+    n = 2
+    while os.getenv(f"HYPERLIQUID_WALLET_ADDRESS_{n}"):
+        accounts.append({
+            "name": f"conta_{n}",
+            "wallet_address": os.getenv(f"HYPERLIQUID_WALLET_ADDRESS_{n}"),
+            "private_key": os.getenv(f"HYPERLIQUID_PRIVATE_KEY_{n}") or os.getenv("HYPERLIQUID_PRIVATE_KEY"),
+            "vault_address": os.getenv(f"HYPERLIQUID_VAULT_ADDRESS_{n}"),
+        })
+        n += 1
+    return accounts
+
+# Contas usadas pelo main_orchestrator (uma conexão e um reconciliador por conta)
+ACCOUNTS = _load_accounts()
+
 # ==============================================================================
 # PARÂMETROS GLOBAIS DA PLATAFORMA E RISCO
 # ==============================================================================
 PLATFORM_PARAMS = {
     "wallet_address": os.getenv("HYPERLIQUID_WALLET_ADDRESS"),
     "private_key": os.getenv("HYPERLIQUID_PRIVATE_KEY"),
+    "account_assignment": {},   # 'Estratégia|símbolo', 'Estratégia' ou símbolo -> conta; demais por carga
+    "balance_cache_ttl": 5.0,   # Idade máxima (s) do balanço em cache de cada conta
     "slippage_max": 0.05,       # 5% de slippage máximo permitido para ordens a mercado
     "min_entry_value_usd": 10.0, # Valor mínimo de entrada em USD, conforme documentação
     "leverage": 10,             # Alavancagem padrão para as estratégias
+    "target_symbol": "BTC/USDC:USDC", # Ativo das estratégias de símbolo único (main.py)
+    "reconcile_interval": 15,   # Intervalo (s) da reconciliação de posições da conta
+    "reconcile_grace_period": 60, # Carência (s) para uma nova ordem aparecer como posição
+    "compute_executor": "process", # Pool para cálculos de indicadores: 'process' (pandas_ta segura o GIL) ou 'thread'
+    "compute_max_workers": 4,   # Workers do pool de computação
+    "compute_max_concurrency": 4, # Cálculos simultâneos enviados ao pool
+    "loop_lag_target_ms": 100,  # Alvo de atraso do event loop (acima dele, a concorrência de cálculo é reduzida)
+    "order_workers": 4,         # Envios de ordens simultâneos no pipeline de prioridade
+    "order_timeout": 10.0,      # Prazo (s) padrão de cada ordem, incluindo retentativas
+    "order_max_retries": 2,     # Retentativas em falhas de rede (mesmo clientOrderId)
+    "order_lookup_timeout": 5.0, # Prazo (s) da consulta pelo clientOrderId, à parte do prazo da ordem
+    "record_market_data": False, # Grava as respostas de mercado para replay (replay.py)
+    "market_data_dir": "recordings", # Diretório dos segmentos gravados
+    "markets_cache_file": "cache/markets.json", # Metadados de mercado (também gravado por list_markets.py)
+    "markets_cache_ttl": 6 * 3600, # Idade (s) a partir da qual o cache é atualizado em segundo plano
+    "cadence_base_interval": 30, # Intervalo (s) entre ticks com atividade habitual do mercado
+    "cadence_min_interval": 5,  # Intervalo mínimo (s) em mercados muito ativos
+    "cadence_max_interval": 120, # Intervalo máximo (s) em mercados parados
+    "batch_max_delay": 30.0,    # Espera máxima (s) após o fechamento da vela pelo lote de inferência do ML
+    "breaker_failure_threshold": 5, # Falhas seguidas que abrem o circuito de um endpoint
+    "breaker_backoff_base": 1.0, # Backoff inicial (s), dobrado a cada falha seguida
+    "breaker_backoff_max": 60.0, # Backoff máximo (s) antes de o circuito abrir
+    "breaker_reset_timeout": 120.0, # Tempo (s) com o circuito aberto antes da chamada de teste
+    "metrics_snapshot_interval": 1.0, # Intervalo (s) entre snapshots das métricas em memória
+    "dashboard_enabled": True,  # Painel ao vivo no terminal (os logs seguem para o arquivo)
+    "dashboard_refresh_seconds": 1.0, # Intervalo (s) de redesenho do painel
+    "profiling_dir": "profiles", # Saída do profiler (.folded e .prof)
+    "profiling_control_file": "profiles/control.json", # Comandos do profiler (python profiler.py start|stop)
+    "profiling_sample_interval": 0.005, # Intervalo (s) entre amostras de pilha
+}
+
+# Limites agregados do portfólio (múltiplos do patrimônio da conta)
+PORTFOLIO_RISK_PARAMS = {
+    "max_gross_leverage": 5.0,      # Soma das exposições absolutas
+    "max_net_leverage": 3.0,        # Exposição líquida (compras - vendas)
+    "max_asset_leverage": 1.0,      # Exposição máxima em um único ativo
+    "max_portfolio_vol_daily": 0.05, # Volatilidade diária máxima estimada (ajustada por correlação)
+    "bars_per_day": 288,            # Velas de 5m por dia (anualização da covariância)
+    "ewma_lambda": 0.97,            # Decaimento da covariância EWMA
+    "min_bars": 30,                 # Velas mínimas antes de aplicar o limite de volatilidade
+    "batch_max_delay": 30.0,        # Espera máxima (s) após o fechamento da vela pelo lote de ordens propostas
 }
 
 # ==============================================================================
@@ -45,7 +112,7 @@ STRATEGY_CONFIG = {
     # Estratégia de Pairs Trading (Arbitragem Estatística)
     'statistical_arbitrage': {
         'enabled': True,
-        'class': StatisticalArbitrageStrategy, # Descomentar quando a classe for criada
+        'class': 'strategies.statistical_arbitrage.StatisticalArbitrageStrategy',
         'params': {
             'pair': ['BTC/USDC:USDC', 'ETH/USDC:USDC'], # O par para negociar
             'lookback_period': 120,       # Período para calcular a média e o desvio padrão do spread
@@ -58,13 +125,108 @@ STRATEGY_CONFIG = {
     # Estratégia de Seguidor de Tendência para o Portfólio
     'trend_following': {
         'enabled': True,
-        'class': TrendFollowingStrategy,
+        'class': 'strategies.trend_following.TrendFollowingStrategy',
         'params': {
             "ema_fast": 10,
             "ema_slow": 30,
             "risk_per_trade": 0.01,
             "stop_loss_atr_multiplier": 2.0,
-            "take_profit_atr_multiplier": 4.0
+            "take_profit_atr_multiplier": 4.0,
+            "ffd_d": 0.4,                 # Ordem da diferenciação fracionária (feature do modelo)
+            "ffd_threshold": 1e-4,        # Corte dos pesos FFD (define o tamanho da janela)
+            "use_ml_filter": False,       # Filtro de meta-labeling (servidor de modelos compartilhado)
+            "ml_min_probability": 0.55,   # Probabilidade mínima do modelo para aprovar o sinal
+        }
+    },
+
+    # Reversão à Média no universo inteiro: o screener acompanha todos os perpétuos e
+    # inicia instâncias da estratégia apenas para os mercados mais esticados
+    'mean_reversion': {
+        'enabled': False,
+        'class': 'strategies.mean_reversion.MeanReversionStrategy',
+        'params': {
+            'bollinger_length': 20,
+            'bollinger_std': 2.0,
+            'rsi_length': 14,
+            'rsi_oversold': 30,
+            'rsi_overbought': 70,
+            'stop_loss_atr_multiplier': 2.0,
+            'risk_per_trade': 0.01,
+        },
+        'screener': {
+            'bar_seconds': 300,           # Velas de 5m montadas a partir dos tickers
+            'poll_interval': 30,          # Intervalo (s) entre consultas de tickers (1 requisição para o universo)
+            'min_quote_volume': 1_000_000, # Volume mínimo em 24h (USDC) para considerar o mercado
+            'top_k': 5,                   # Candidatos entregues a cada vela
+            'max_instances': 5,           # Instâncias de estratégia simultâneas
+            'retire_after_bars': 3,       # Velas fora da lista (e sem posição) antes de encerrar a instância
+            'warmup': True,               # Aquece os indicadores com velas históricas na inicialização
+        },
+    },
+}
+
+# ==============================================================================
+# MENU DE ESTRATÉGIA ÚNICA (main.py)
+# ==============================================================================
+# Cada entrada é resolvida pelo registro apenas se for escolhida no menu.
+STRATEGY_PARAMS = {
+    'triangular_arbitrage': {
+        'name': 'Arbitragem Triangular',
+        'class': 'strategies.triangular_arbitrage.TriangularArbitrageStrategy',
+        'params': {
+            'market_pairs': ['ETH/USDC:USDC', 'BTC/USDC:USDC', 'ETH/BTC:USDC'], # [A/C, B/C, A/B]
+            'min_profit_margin': 0.1,     # Margem mínima (%) para sinalizar a oportunidade
+        }
+    },
+    'market_making': {
+        'name': 'Market Making',
+        'class': 'strategies.market_making.MarketMakingStrategy',
+        'params': {
+            'spread_percentage': 0.002,   # Spread total em torno do mid-price
+            'order_amount_usd': 20.0,     # Valor de cada ordem em USD
         }
-    }
+    },
+    'trend_following': {
+        'name': 'Seguidor de Tendência (ML)',
+        'class': STRATEGY_CONFIG['trend_following']['class'],
+        'params': STRATEGY_CONFIG['trend_following']['params'],
+        'symbol': PLATFORM_PARAMS['target_symbol'],
+    },
+    'mean_reversion': {
+        'name': 'Reversão à Média',
+        'class': STRATEGY_CONFIG['mean_reversion']['class'],
+        'params': STRATEGY_CONFIG['mean_reversion']['params'],
+    },
+    'statistical_arbitrage': {
+        'name': 'Arbitragem Estatística (Pairs Trading)',
+        'class': STRATEGY_CONFIG['statistical_arbitrage']['class'],
+        'params': STRATEGY_CONFIG['statistical_arbitrage']['params'],
+    },
+    'grid_trading': {
+        'name': 'Grid Trading',
+        'class': 'strategies.grid_trading.GridTradingStrategy',
+        'params': {
+            'grid_step_percentage': 0.005, # Distância entre níveis (fração do preço)
+            'grid_levels': 5,             # Níveis de cada lado do centro
+            'amount_per_level_usd': 15.0, # Valor de cada ordem da grade
+            'recenter_margin_levels': 1,  # Níveis de folga antes de recentralizar
+        }
+    },
+    'ml_prediction': {
+        'name': 'Previsão com ML (Simulada)',
+        'class': 'strategies.ml_prediction.MLPredictionStrategy',
+        'params': {
+            'min_confidence_threshold': 0.75,
+            'risk_per_trade': 0.01,
+        }
+    },
+}
+
+# ==============================================================================
+# RUNTIME MULTIPROCESSO (sharded_orchestrator.py)
+# ==============================================================================
+SHARDING_PARAMS = {
+    "workers": None,                # Processos de estratégia (None = núcleos disponíveis - 2)
+    "market_data_interval": 10,     # Intervalo mínimo (s) entre consultas de um símbolo (o restante segue a cadência adaptativa)
+    "candle_capacity": 500,         # Velas mantidas por série na memória compartilhada
 }
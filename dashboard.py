@@ -0,0 +1,102 @@
+# Dashboard de terminal alimentado pelos snapshots de métricas
+import logging
+import threading
+import time
+from datetime import datetime
+from rich.console import Console, Group
+from rich.live import Live
+from rich.panel import Panel
+from rich.table import Table
+
+logger = logging.getLogger("Dashboard")
+
+def _fmt(value, spec: str = ".2f", default: str = "-") -> str:
+    if value is None:
+        return default
+    try:
+        return format(value, spec)
+    except (TypeError, ValueError):
+        return str(value)
+
+def _fmt_indicators(indicators: dict) -> str:
+    return "  ".join(f"{key}={_fmt(value, '.4g')}" for key, value in indicators.items())
+
+class LiveDashboard:
+    """
+    Painel `rich.Live` desenhado em uma thread própria, no seu próprio timer. Lê apenas
+    `MetricsRegistry.snapshot` (referência trocada atomicamente pelo event loop), de modo
+    que a renderização nunca roda no loop de negociação nem compete com ele por locks.
+    """
+    def __init__(self, registry, refresh_seconds: float = 1.0, console: Console = None):
+        self.registry = registry
+        self.refresh_seconds = refresh_seconds
+        self.console = console or Console()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        # O painel ocupa o terminal: os logs seguem apenas para os arquivos
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if type(handler) is logging.StreamHandler:
+                root.removeHandler(handler)
+        self._thread = threading.Thread(target=self._run, name="dashboard", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.refresh_seconds * 2)
+            self._thread = None
+
+    def _run(self):
+        try:
+            with Live(self.render(), console=self.console, auto_refresh=False, transient=False) as live:
+                while not self._stop.wait(self.refresh_seconds):
+                    live.update(self.render(), refresh=True)
+        except Exception as e:
+            logger.error(f"Dashboard encerrado por erro: {e}", exc_info=True)
+
+    def render(self):
+        snapshot = self.registry.snapshot
+        table = Table(expand=True, header_style="bold cyan")
+        for column, justify in (
+            ("Estratégia", "left"), ("Símbolo", "left"), ("Estado", "left"), ("Último sinal", "left"),
+            ("Indicadores", "left"), ("PnL", "right"), ("Ticks", "right"), ("Tick (ms)", "right"),
+            ("Média (ms)", "right"), ("Há (s)", "right"),
+        ):
+            table.add_column(column, justify=justify, no_wrap=column != "Indicadores")
+
+        now = time.time()
+        for row in snapshot["strategies"]:
+            state = row["state"] or "-"
+            if row["status"] != "ATIVA":
+                state = f"{state} / {row['status']}"
+            signal = row["last_signal"] or "-"
+            if row["last_signal_at"]:
+                signal = f"{signal} ({datetime.fromtimestamp(row['last_signal_at']):%H:%M:%S})"
+            pnl = row["pnl"]
+            pnl_style = "green" if (pnl or 0) > 0 else "red" if (pnl or 0) < 0 else ""
+            table.add_row(
+                row["name"], row["symbol"] or "-",
+                f"[yellow]{state}[/yellow]" if row["state"] == "IN_POSITION" else state,
+                signal,
+                _fmt_indicators(row["indicators"]),
+                f"[{pnl_style}]{_fmt(pnl)}[/{pnl_style}]" if pnl_style else _fmt(pnl),
+                str(row["ticks"]),
+                _fmt(row["last_tick_ms"], ".1f"),
+                _fmt(row["avg_tick_ms"], ".1f"),
+                _fmt(now - row["last_tick_at"] if row["last_tick_at"] else None, ".0f"),
+            )
+
+        rates = "  ".join(f"{endpoint}={rate:.2f}/s" for endpoint, rate in sorted(snapshot["requests_per_s"].items()))
+        footer = (
+            f"PnL não realizado: {_fmt(snapshot['pnl_total'])} USD | "
+            f"Atraso do loop: {_fmt(snapshot['loop_lag_ms'], '.1f')} ms | "
+            f"Requisições: {rates or '-'} | "
+            f"Ativo há {snapshot['uptime_s'] / 60:.0f} min | "
+            f"Snapshot {datetime.fromtimestamp(snapshot['taken_at']):%H:%M:%S}"
+        )
+        return Panel(Group(table, footer), title="[bold]Quant Nexus Architect - Estratégias[/bold]", border_style="cyan")
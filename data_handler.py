@@ -1,49 +1,102 @@
+import asyncio
 import logging
-import pandas as pd
+import ccxt.async_support as ccxt
 from handlers.execution_handler import ExecutionHandler
+from handlers.records import CandleBlock, Quote
+from handlers.cadence import get_cadence_controller, get_endpoint_breakers
+from handlers.metrics import get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
+# Erros que indicam um endpoint indisponível ou sobrecarregado (contam para o circuit breaker)
+TRANSIENT_ERRORS = (ccxt.NetworkError, asyncio.TimeoutError)
+
 class DataHandler:
     def __init__(self, platform_params):
-        self.execution_handler = ExecutionHandler(platform_params)
+        # Com o pool de contas, as estratégias de uma conta compartilham a conexão dela
+        self.execution_handler = platform_params.get("shared_execution_handler") or ExecutionHandler(platform_params)
+        self.recorder = platform_params.get("market_data_recorder")  # Gravação opcional para replay
+        self.cadence = get_cadence_controller(platform_params)
+        self.breakers = get_endpoint_breakers(platform_params)
+        self.polled_symbols = set()  # Símbolos consultados por esta instância (cadência do tick)
+
+    def _endpoint_available(self, endpoint: str, symbol: str) -> bool:
+        breaker = self.breakers.get(endpoint)
+        if breaker.allow():
+            get_metrics_registry().count_request(endpoint)
+            return True
+        logger.debug(f"Endpoint '{endpoint}' em backoff ({breaker.state}, {breaker.retry_in:.1f}s); {symbol} ignorado neste ciclo.")
+        return False
+
+    def _record_error(self, endpoint: str, error: Exception):
+        if isinstance(error, TRANSIENT_ERRORS):
+            self.breakers.get(endpoint).record_failure()
+        else:
+            # Erros de requisição (ex.: símbolo inválido) não indicam falha do endpoint
+            self.breakers.get(endpoint).record_success()
 
-    async def get_candles(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> pd.DataFrame | None:
+    async def get_candles(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> CandleBlock | None:
         """Busca dados históricos de velas (candles) de forma assíncrona."""
+        self.polled_symbols.add(symbol)
+        if not self._endpoint_available('fetch_ohlcv', symbol):
+            return None
         try:
             ohlcv = await self.execution_handler.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            self.breakers.get('fetch_ohlcv').record_success()
+            if self.recorder:
+                self.recorder.record('ohlcv', symbol, {'timeframe': timeframe, 'limit': limit}, ohlcv)
             if not ohlcv:
                 logger.warning(f"Não foram retornados dados de candles para {symbol}.")
                 return None
             
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
+            candles = CandleBlock.from_ohlcv(ohlcv)
+            self.cadence.observe_candles(symbol, candles)
+            return candles
         except Exception as e:
+            self._record_error('fetch_ohlcv', e)
             logger.error(f"Erro ao buscar candles para {symbol}: {e}", exc_info=True)
             return None
             
+    async def get_tickers(self) -> dict | None:
+        """Busca os tickers de todos os mercados em uma única requisição (usado pelo screener)."""
+        if not self._endpoint_available('fetch_tickers', 'todos os mercados'):
+            return None
+        try:
+            tickers = await self.execution_handler.exchange.fetch_tickers()
+            self.breakers.get('fetch_tickers').record_success()
+            if self.recorder:
+                self.recorder.record('tickers', '*', {}, tickers)
+            return tickers
+        except Exception as e:
+            self._record_error('fetch_tickers', e)
+            logger.error(f"Erro ao buscar os tickers: {e}", exc_info=True)
+            return None
+
     async def get_current_price(self, symbol: str) -> float | None:
         """
         Busca o preço de mercado mais recente calculando o mid-price do livro de ordens.
         Esta é a correção para o erro 'fetchTicker() not supported'.
         """
+        self.polled_symbols.add(symbol)
+        if not self._endpoint_available('fetch_order_book', symbol):
+            return None
         try:
             # Busca o topo do livro de ordens (melhor compra e melhor venda)
             order_book = await self.execution_handler.exchange.fetch_order_book(symbol, limit=1)
+            self.breakers.get('fetch_order_book').record_success()
+            if self.recorder:
+                self.recorder.record('order_book', symbol, {'limit': 1}, order_book)
             
             # Garante que o livro de ordens e os lances existem
-            if order_book and order_book.get('bids') and order_book.get('asks'):
-                best_bid = order_book['bids'][0][0]
-                best_ask = order_book['asks'][0][0]
-                
-                # Calcula o mid-price e o retorna
-                mid_price = (best_bid + best_ask) / 2
-                return mid_price
+            quote = Quote.from_order_book(symbol, order_book)
+            if quote:
+                self.cadence.observe_price(symbol, quote.mid)
+                return quote.mid
                 
             logger.warning(f"Não foi possível obter o livro de ordens para {symbol}.")
             return None
         except Exception as e:
+            self._record_error('fetch_order_book', e)
             # Log do erro específico para diagnóstico
             logger.error(f"Erro ao buscar o preço atual de {symbol}: {e}", exc_info=True)
             return None
\ No newline at end of file
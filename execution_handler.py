@@ -1,30 +1,65 @@
+import asyncio
 import logging
+import time
 import ccxt.async_support as ccxt
+from handlers.order_pipeline import OrderPipeline, PRIORITY_ENTRY, PRIORITY_EXIT, PRIORITY_HEDGE
+from handlers.records import Fill, Order, Position
+from handlers.metrics import get_metrics_registry
 
 logger = logging.getLogger(__name__)
 
 class ExecutionHandler:
     def __init__(self, platform_params):
         self.exchange = None
+        self.account = platform_params.get("account_name", "principal")  # Conta usada nas ordens e no balanço
         self.wallet_address = platform_params["wallet_address"]
         self.private_key = platform_params["private_key"]
+        self.vault_address = platform_params.get("vault_address")  # Subconta operada pela carteira (opcional)
+        self.markets_cache = platform_params.get("markets_cache")  # MarketsCache compartilhado (injetado)
+        self.order_pipeline = OrderPipeline(
+            self,
+            workers=platform_params.get("order_workers", 4),
+            default_timeout=platform_params.get("order_timeout", 10.0),
+            max_retries=platform_params.get("order_max_retries", 2),
+            lookup_timeout=platform_params.get("order_lookup_timeout", 5.0),
+        )
+        # Balanço em cache: as estratégias que compartilham a conta fazem uma consulta por intervalo
+        self.balance_cache_ttl = platform_params.get("balance_cache_ttl", 0.0)
+        self._balance = None
+        self._balance_at = 0.0
+        self._balance_lock = asyncio.Lock()
+        # Um handler pode ser compartilhado por várias estratégias (pool de contas): a conexão
+        # é aberta no primeiro `initialize` e fechada no último `close_connection`
+        self._users = 0
+        self._init_lock = asyncio.Lock()
 
     async def initialize(self):
         """Inicializa a conexão seguindo o padrão comprovado."""
         if not self.wallet_address or not self.private_key:
             raise ValueError("Credenciais da carteira não configuradas no arquivo .env.")
-        try:
-            self.exchange = ccxt.hyperliquid({
-                "walletAddress": self.wallet_address,
-                "privateKey": self.private_key,
-                "enableRateLimit": True,
-                "options": {'adjustForTimeDifference': True}
-            })
-            await self.exchange.load_markets()
-            logger.info("Handler de Execução conectado e sincronizado.")
-        except Exception as e:
-            logger.error(f"Falha ao inicializar o ExecutionHandler: {e}", exc_info=True)
-            raise
+        async with self._init_lock:
+            self._users += 1
+            if self.exchange:
+                return
+            options = {'adjustForTimeDifference': True}
+            if self.vault_address:
+                options['vaultAddress'] = self.vault_address
+            try:
+                self.exchange = ccxt.hyperliquid({
+                    "walletAddress": self.wallet_address,
+                    "privateKey": self.private_key,
+                    "enableRateLimit": True,
+                    "options": options
+                })
+                if self.markets_cache:
+                    await self.markets_cache.attach(self.exchange)
+                else:
+                    await self.exchange.load_markets()
+                logger.info(f"Handler de Execução conectado e sincronizado (conta '{self.account}').")
+            except Exception as e:
+                self._users -= 1
+                logger.error(f"Falha ao inicializar o ExecutionHandler: {e}", exc_info=True)
+                raise
 
     async def setup_trading_environment(self, symbol: str, leverage: int):
         """Define a alavancagem para um símbolo, como exigido pela API."""
@@ -35,38 +70,109 @@ class ExecutionHandler:
         except Exception as e:
             logger.warning(f"Aviso durante a configuração de ambiente para {symbol}: {e}")
 
-    async def place_order(self, symbol: str, side: str, amount: float, order_type: str = 'market', price: float = None, params: dict = None):
-        """Envia uma ordem para a exchange com a estrutura de parâmetros correta."""
+    async def place_order(self, symbol: str, side: str, amount: float, order_type: str = 'market', price: float = None, params: dict = None,
+                          priority: int = None, timeout: float = None) -> Order | None:
+        """
+        Envia uma ordem pelo pipeline de prioridade. Ordens reduce-only são tratadas como
+        saídas e passam à frente das novas entradas.
+        """
+        if priority is None:
+            priority = PRIORITY_EXIT if (params or {}).get('reduceOnly') else PRIORITY_ENTRY
         try:
             logger.info(f"Enviando ordem: {side} {amount} {symbol} @ {price} com params: {params}")
-            order = await self.exchange.create_order(symbol, order_type, side, amount, price, params)
-            logger.info(f"Ordem enviada com sucesso: ID {order.get('id')}")
+            order = await self.order_pipeline.submit(symbol, side, amount, order_type, price, params, priority=priority, timeout=timeout)
+            logger.info(f"Ordem enviada com sucesso: ID {order.id}")
             return order
         except Exception as e:
             logger.error(f"Erro ao enviar ordem para {symbol}: {e}", exc_info=True)
             return None
 
-    async def get_balance_usd(self) -> float:
-        """Busca o balanço total em USDC."""
+    async def place_linked_orders(self, legs: list, priority: int = PRIORITY_HEDGE, timeout: float = None) -> list[Order] | None:
+        """
+        Envia pernas vinculadas (dicionários com symbol, side, amount, order_type, price, params)
+        concorrentemente. Se uma perna falhar, as demais são desfeitas. Retorna as ordens ou None.
+        """
+        logger.info(f"Enviando {len(legs)} pernas vinculadas: {[(leg['side'], leg['symbol']) for leg in legs]}")
+        orders = await self.order_pipeline.submit_legs(legs, priority=priority, timeout=timeout)
+        if orders:
+            logger.info(f"Pernas vinculadas executadas: IDs {[order.id for order in orders]}")
+        return orders
+
+    async def get_open_orders(self, symbol: str) -> list[Order] | None:
+        """Busca as ordens abertas de um símbolo. Retorna None em caso de erro."""
+        try:
+            get_metrics_registry().count_request('fetch_open_orders')
+            return [Order.from_ccxt(order) for order in await self.exchange.fetch_open_orders(symbol)]
+        except Exception as e:
+            logger.error(f"Erro ao buscar ordens abertas de {symbol}: {e}")
+            return None
+
+    async def get_fills(self, symbol: str, since: int = None, limit: int = None) -> list[Fill] | None:
+        """Busca as execuções da conta em um símbolo. Retorna None em caso de erro."""
         try:
-            balance = await self.exchange.fetch_balance()
-            # A estrutura de balanço do CCXT para Hyperliquid pode variar
-            return float(balance.get('USDC', {}).get('total', 0.0))
+            get_metrics_registry().count_request('fetch_my_trades')
+            return [Fill.from_ccxt(trade) for trade in await self.exchange.fetch_my_trades(symbol, since, limit)]
         except Exception as e:
-            logger.error(f"Erro ao buscar balanço: {e}")
-            return 0.0
+            logger.error(f"Erro ao buscar execuções de {symbol}: {e}")
+            return None
+
+    async def get_order(self, order_id: str, symbol: str) -> Order | None:
+        """Consulta uma ordem (aberta ou encerrada) pelo ID. Retorna None em caso de erro."""
+        try:
+            get_metrics_registry().count_request('fetch_order')
+            return Order.from_ccxt(await self.exchange.fetch_order(order_id, symbol))
+        except Exception as e:
+            logger.error(f"Erro ao consultar a ordem {order_id} em {symbol}: {e}")
+            return None
+
+    async def cancel_order(self, order_id: str, symbol: str) -> bool:
+        """Cancela uma ordem aberta."""
+        try:
+            get_metrics_registry().count_request('cancel_order')
+            await self.exchange.cancel_order(order_id, symbol)
+            logger.info(f"Ordem {order_id} cancelada em {symbol}.")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao cancelar a ordem {order_id} em {symbol}: {e}")
+            return False
+
+    async def get_balance_usd(self) -> float:
+        """Busca o balanço total em USDC (reaproveitado por `balance_cache_ttl` segundos)."""
+        async with self._balance_lock:
+            if self._balance is not None and time.monotonic() - self._balance_at < self.balance_cache_ttl:
+                return self._balance
+            try:
+                get_metrics_registry().count_request('fetch_balance')
+                balance = await self.exchange.fetch_balance()
+                # A estrutura de balanço do CCXT para Hyperliquid pode variar
+                self._balance = float(balance.get('USDC', {}).get('total', 0.0))
+                self._balance_at = time.monotonic()
+                return self._balance
+            except Exception as e:
+                logger.error(f"Erro ao buscar balanço da conta '{self.account}': {e}")
+                return 0.0
+
+    async def fetch_open_positions(self) -> list[Position]:
+        """Busca posições abertas, propagando erros da exchange para quem chamou."""
+        get_metrics_registry().count_request('fetch_positions')
+        positions = await self.exchange.fetch_positions()
+        return [Position.from_ccxt(p) for p in positions if float(p.get('contracts') or 0) != 0]
 
-    async def get_open_positions(self):
+    async def get_open_positions(self) -> list[Position]:
         """Busca posições abertas."""
         try:
-            positions = await self.exchange.fetch_positions()
-            return [p for p in positions if float(p.get('contracts', 0)) != 0]
+            return await self.fetch_open_positions()
         except Exception as e:
             logger.error(f"Erro ao buscar posições: {e}")
             return []
 
     async def close_connection(self):
-        """Encerra a conexão com a exchange de forma limpa."""
+        """Encerra a conexão com a exchange de forma limpa (quando o último usuário sair)."""
+        self._users = max(0, self._users - 1)
+        if self._users:
+            return
+        await self.order_pipeline.stop()
         if self.exchange:
             await self.exchange.close()
-            logger.info("Conexão com a exchange encerrada.")
\ No newline at end of file
+            self.exchange = None
+            logger.info(f"Conexão com a exchange encerrada (conta '{self.account}').")
\ No newline at end of file
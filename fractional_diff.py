@@ -0,0 +1,120 @@
+# strategies/fractional_diff.py
+
+import logging
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("FractionalDiff")
+
+@lru_cache(maxsize=64)
+def get_ffd_weights(d: float, threshold: float = 1e-4, max_width: int = 10_000) -> np.ndarray:
+    """
+    Pesos da diferenciação fracionária de janela fixa (FFD, López de Prado),
+    do mais recente (w0 = 1) para o mais antigo, truncados quando |w_k| < threshold.
+    O resultado é cacheado por (d, threshold) e devolvido como somente leitura.
+    """
+    weights = [1.0]
+    for k in range(1, max_width):
+        w_k = -weights[-1] * (d - k + 1) / k
+        if abs(w_k) < threshold:
+            break
+        weights.append(w_k)
+    weights = np.array(weights, dtype=np.float64)
+    weights.setflags(write=False)
+    return weights
+
+def ffd_window(d: float, threshold: float = 1e-4) -> int:
+    """Quantidade de observações necessárias para o primeiro valor FFD."""
+    return len(get_ffd_weights(d, threshold))
+
+def frac_diff_ffd(series, d: float, threshold: float = 1e-4):
+    """
+    Diferenciação fracionária de janela fixa sobre uma série inteira (backfill),
+    calculada por convolução vetorizada. As primeiras `janela - 1` posições são NaN.
+    Aceita `pd.Series` (preservando o índice) ou array NumPy.
+    """
+    values = np.asarray(series, dtype=np.float64)
+    weights = get_ffd_weights(d, threshold)
+    out = np.full(len(values), np.nan)
+    if len(values) >= len(weights):
+        # np.convolve inverte o kernel: com pesos do mais recente para o mais antigo,
+        # cada saída é o produto escalar da janela com os pesos na ordem correta.
+        out[len(weights) - 1:] = np.convolve(values, weights, mode='valid')
+    if isinstance(series, pd.Series):
+        return pd.Series(out, index=series.index, name=series.name)
+    return out
+
+class FFDState:
+    """
+    Diferenciação fracionária incremental: mantém as últimas `janela` observações em
+    um buffer circular duplicado e calcula cada novo valor em O(janela).
+    """
+    def __init__(self, d: float, threshold: float = 1e-4):
+        self.d = d
+        self.threshold = threshold
+        # Pesos do mais antigo para o mais recente, alinhados com a janela do buffer
+        self._weights = get_ffd_weights(d, threshold)[::-1]
+        self.width = len(self._weights)
+        self._buffer = np.zeros(2 * self.width, dtype=np.float64)
+        self._pos = 0
+        self._count = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.width
+
+    def reset(self):
+        self._pos = 0
+        self._count = 0
+
+    def _window(self) -> np.ndarray:
+        return self._buffer[self._pos:self._pos + self.width]
+
+    def update(self, value: float) -> float | None:
+        """Adiciona uma nova observação e devolve o valor FFD (None até completar a janela)."""
+        self._buffer[self._pos] = value
+        self._buffer[self._pos + self.width] = value
+        self._pos = (self._pos + 1) % self.width
+        self._count += 1
+        return float(np.dot(self._weights, self._window())) if self.ready else None
+
+    def peek(self, value: float) -> float | None:
+        """Valor FFD que `value` produziria como próxima observação, sem alterar o estado."""
+        if self._count < self.width - 1:
+            return None
+        history = self._buffer[self._pos + 1:self._pos + self.width]
+        return float(np.dot(self._weights[:-1], history) + self._weights[-1] * value)
+
+    def backfill(self, values) -> np.ndarray:
+        """Reinicia o estado a partir de um histórico e devolve a série FFD completa."""
+        values = np.asarray(values, dtype=np.float64)
+        self.reset()
+        for value in values[-self.width:]:
+            self.update(value)
+        return frac_diff_ffd(values, self.d, self.threshold)
+
+def find_min_d(series, threshold: float = 1e-4, d_values=None, p_value: float = 0.05):
+    """
+    Procura o menor `d` cuja série FFD é estacionária pelo teste ADF, preservando o
+    máximo de memória da série original. Retorna (d, tabela com p-valor e correlação).
+    Requer statsmodels, importado apenas quando esta função é usada.
+    """
+    from statsmodels.tsa.stattools import adfuller
+
+    values = np.log(np.asarray(series, dtype=np.float64))
+    d_values = np.linspace(0.0, 1.0, 11) if d_values is None else d_values
+    rows = []
+    best_d = None
+    for d in d_values:
+        diffed = frac_diff_ffd(values, float(d), threshold)
+        mask = ~np.isnan(diffed)
+        if mask.sum() < 20:
+            logger.warning(f"Série curta demais para testar d={d:.2f} (janela {ffd_window(float(d), threshold)}).")
+            continue
+        adf_stat, p, *_ = adfuller(diffed[mask], maxlag=1, regression='c', autolag=None)
+        corr = np.corrcoef(values[mask], diffed[mask])[0, 1]
+        rows.append({'d': float(d), 'adf_stat': adf_stat, 'p_value': p, 'corr': corr})
+        if best_d is None and p < p_value:
+            best_d = float(d)
+    return best_d, pd.DataFrame(rows)
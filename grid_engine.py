@@ -0,0 +1,183 @@
+# strategies/grid_engine.py
+
+import logging
+import numpy as np
+
+logger = logging.getLogger("GridEngine")
+
+BUY, NONE, SELL = 1, 0, -1
+
+class GridBook:
+    """
+    Estado de uma grade para um símbolo, guardado em arrays de tamanho fixo.
+
+    Os níveis ficam em uma malha fixa `preço = âncora + k * passo` (k inteiro). A
+    janela ativa tem `2 * levels + 1` níveis em torno de `center`; o slot `i` do array
+    corresponde ao nível `k = center - levels + i`. Compras ficam abaixo do centro e
+    vendas acima; o nível central fica vazio.
+    """
+    def __init__(self, symbol: str, anchor_price: float, step: float, levels: int, amount: float):
+        self.symbol = symbol
+        self.anchor = anchor_price
+        self.step = step
+        self.levels = levels
+        self.amount = amount
+        self.center = 0
+        self.sides = np.zeros(2 * levels + 1, dtype=np.int8)          # BUY, SELL ou NONE por slot
+        self.order_ids = np.full(2 * levels + 1, None, dtype=object)  # ID da ordem aberta no slot
+        self._level_by_order = {}                                     # order_id -> k
+        self._pending_cancels = set()                                 # Retiradas da janela, cancelamento não confirmado
+
+    # --- Conversões ---
+
+    def price(self, k: int) -> float:
+        return self.anchor + k * self.step
+
+    def _slot(self, k: int) -> int | None:
+        i = k - (self.center - self.levels)
+        return i if 0 <= i < len(self.sides) else None
+
+    def _window(self) -> np.ndarray:
+        return np.arange(self.center - self.levels, self.center + self.levels + 1)
+
+    # --- Estado das ordens ---
+
+    def initial_orders(self) -> list:
+        """Níveis (k, lado) da grade inicial."""
+        return [(int(k), BUY if k < self.center else SELL) for k in self._window() if k != self.center]
+
+    def assign(self, k: int, side: int, order_id):
+        i = self._slot(k)
+        if i is None or order_id is None:
+            return
+        self.sides[i] = side
+        self.order_ids[i] = order_id
+        self._level_by_order[order_id] = k
+
+    def release(self, order_id) -> tuple[int, int] | None:
+        """
+        Remove uma ordem do livro e devolve (k, lado) que ela ocupava. Ordens já
+        retiradas da janela por uma recentralização não ocupam nível (devolve None).
+        """
+        k = self._level_by_order.pop(order_id, None)
+        if k is None:
+            self._pending_cancels.discard(order_id)
+            return None
+        i = self._slot(k)
+        side = int(self.sides[i])
+        self.sides[i] = NONE
+        self.order_ids[i] = None
+        return k, side
+
+    @property
+    def tracked_order_ids(self) -> set:
+        """Ordens que ainda podem estar no livro da exchange (incluindo cancelamentos pendentes)."""
+        return set(self._level_by_order) | self._pending_cancels
+
+    @property
+    def pending_cancel_ids(self) -> set:
+        return set(self._pending_cancels)
+
+    def confirm_cancel(self, order_id):
+        """Esquece uma ordem retirada da janela depois que o cancelamento foi confirmado."""
+        self._pending_cancels.discard(order_id)
+
+    def on_closed(self, fills: list, cancels: list = ()) -> list:
+        """
+        Processa de uma vez as ordens que saíram do livro num mesmo ciclo e devolve os
+        níveis (k, lado, quantidade) a posicionar.
+
+        `fills` são pares (order_id, filled) de ordens executadas: compra no nível k ->
+        venda em k + 1; venda no nível k -> compra em k - 1. Numa execução parcial
+        (`filled` informado) a ordem oposta cobre só o executado. `cancels` são ordens
+        canceladas ou rejeitadas sem execução, cujo próprio nível é rearmado.
+
+        Todos os níveis são liberados antes de calcular as ordens opostas: com várias
+        execuções no mesmo ciclo (ex.: compras em k e k + 1), o alvo de uma é o nível
+        que a outra acabou de liberar, e a ordem de chegada não pode decidir se ele é
+        rearmado. Cada nível recebe no máximo uma ordem; rearmes de cancelamentos têm
+        prioridade.
+        """
+        released_fills = [(self.release(order_id), filled) for order_id, filled in fills]
+        released_cancels = [self.release(order_id) for order_id in cancels]
+
+        actions, claimed = [], set()
+        for released in released_cancels:
+            if released is None:
+                continue
+            k, side = released
+            claimed.add(k)
+            actions.append((k, side, self.amount))
+        for released, filled in released_fills:
+            if released is None:
+                continue
+            k, side = released
+            target = k + 1 if side == BUY else k - 1
+            i = self._slot(target)
+            if i is None or self.sides[i] != NONE or target in claimed:
+                continue
+            claimed.add(target)
+            actions.append((target, SELL if side == BUY else BUY, filled or self.amount))
+        return actions
+
+    def on_fill(self, order_id, filled: float = None) -> tuple[int, int, float] | None:
+        """Execução de uma única ordem: devolve a ordem oposta a posicionar (ver `on_closed`)."""
+        actions = self.on_closed([(order_id, filled)])
+        return actions[0] if actions else None
+
+    def on_cancel(self, order_id) -> tuple[int, int, float] | None:
+        """
+        Processa uma ordem cancelada ou rejeitada sem execução: o nível é liberado e
+        devolvido (k, lado, quantidade) para ser rearmado.
+        """
+        actions = self.on_closed([], [order_id])
+        return actions[0] if actions else None
+
+    # --- Recentralização ---
+
+    def needs_recenter(self, price: float, margin: int = 1) -> bool:
+        k = (price - self.anchor) / self.step
+        return k < self.center - self.levels + margin or k > self.center + self.levels - margin
+
+    def recenter(self, price: float) -> tuple[list, list]:
+        """
+        Move a janela para o nível mais próximo do preço e devolve o diff mínimo:
+        (ordens a cancelar, níveis (k, lado) a posicionar). Ordens que continuam dentro
+        da nova janela e do lado correto do novo centro (compras abaixo, vendas acima)
+        são preservadas; as demais são canceladas.
+
+        As ordens a cancelar deixam de ocupar níveis, mas continuam acompanhadas até
+        `confirm_cancel` (ou até saírem do livro), pois o cancelamento pode falhar.
+        """
+        new_center = int(round((price - self.anchor) / self.step))
+        shift = new_center - self.center
+        if shift == 0:
+            return [], []
+
+        size = len(self.sides)
+        new_sides = np.zeros(size, dtype=np.int8)
+        new_ids = np.full(size, None, dtype=object)
+        # Cópia da sobreposição entre a janela antiga e a nova
+        if abs(shift) < size:
+            src = slice(max(0, shift), size + min(0, shift))
+            dst = slice(max(0, -shift), size - max(0, shift))
+            new_sides[dst] = self.sides[src]
+            new_ids[dst] = self.order_ids[src]
+
+        self.center = new_center
+        window = self._window()
+        desired = np.where(window < new_center, BUY, np.where(window > new_center, SELL, NONE)).astype(np.int8)
+        wrong_side = (new_sides != NONE) & (new_sides != desired)
+        new_sides[wrong_side] = NONE
+        new_ids[wrong_side] = None
+
+        kept = set(new_ids[new_sides != NONE])
+        cancels = [order_id for order_id in self._level_by_order if order_id not in kept]
+        for order_id in cancels:
+            self._level_by_order.pop(order_id)
+            self._pending_cancels.add(order_id)
+
+        self.sides, self.order_ids = new_sides, new_ids
+        missing = (new_sides == NONE) & (desired != NONE)
+        places = [(int(k), BUY if k < new_center else SELL) for k in window[missing]]
+        return cancels, places
@@ -1,59 +1,142 @@
 import logging
 import asyncio
 from .base_strategy import BaseStrategy
+from .grid_engine import GridBook, BUY
 
 logger = logging.getLogger("GridTradingStrategy")
 
 class GridTradingStrategy(BaseStrategy):
-    """Estratégia 7: Grid Trading Alavancado."""
+    """Estratégia 7: Grid Trading Alavancado (orientado a execuções, com recentralização)."""
     
     def __init__(self, platform_params: dict, strategy_params: dict):
         super().__init__(platform_params, strategy_params)
-        self.grid_orders_placed = False # Controle para setup inicial da grade
+        # Um ou vários símbolos; por padrão, o símbolo alvo da plataforma
+        self.symbols = self.params.get('symbols') or [self.platform_params['target_symbol']]
+        self.books = {}  # symbol -> GridBook
+        self.metrics.symbol = ", ".join(self.symbols)
 
-    async def setup_grid(self, current_price):
+    async def _place_levels(self, book: GridBook, levels: list) -> int:
+        """
+        Posiciona ordens limite para os níveis (k, lado) ou (k, lado, quantidade) e as
+        registra no livro da grade. Sem quantidade, usa a quantidade padrão por nível.
+        """
+        tasks = [
+            self.execution_handler.place_order(
+                symbol=book.symbol, side='buy' if side == BUY else 'sell',
+                amount=amount[0] if amount else book.amount, order_type='limit', price=book.price(k)
+            )
+            for k, side, *amount in levels
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        placed = 0
+        for (k, side, *_), res in zip(levels, results):
+            if res and not isinstance(res, Exception):
+                book.assign(k, side, res.id)
+                placed += 1
+        return placed
+
+    async def setup_grid(self, symbol: str, current_price: float):
         """Cria a grade inicial de ordens de compra e venda."""
-        logger.info(f"Configurando a grade em torno do preço {current_price:.2f}")
+        logger.info(f"Configurando a grade de {symbol} em torno do preço {current_price:.2f}")
         
         # Parâmetros
-        symbol = self.platform_params['target_symbol']
         leverage = self.platform_params['leverage']
-        num_levels = self.params['grid_levels']
-        step = self.params['grid_step_percentage'] * current_price
-        amount_per_level = self.params['amount_per_level_usd'] / current_price
+        book = GridBook(
+            symbol,
+            anchor_price=current_price,
+            step=self.params['grid_step_percentage'] * current_price,
+            levels=self.params['grid_levels'],
+            amount=self.params['amount_per_level_usd'] / current_price,
+        )
         
         # ETAPA 1: Configurar a alavancagem para o par UMA VEZ
         await self.execution_handler.setup_trading_environment(symbol, leverage)
         
-        tasks = []
-        # Cria as tarefas para posicionar as ordens
-        for i in range(1, num_levels + 1):
-            buy_price = current_price - i * step
-            sell_price = current_price + i * step
-            
-            # CORREÇÃO: Chamada correta da função place_order.
-            # O tipo da ordem é 'limit'.
-            # O preço é passado como o argumento 'price' (um float).
-            # 'params' está vazio (None) pois a alavancagem já foi definida.
-            tasks.append(self.execution_handler.place_order(symbol=symbol, side='buy', amount=amount_per_level, order_type='limit', price=buy_price))
-            tasks.append(self.execution_handler.place_order(symbol=symbol, side='sell', amount=amount_per_level, order_type='limit', price=sell_price))
-        
-        # ETAPA 2: Executa todas as tarefas de criação de ordem em paralelo
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        successful_orders = [res for res in results if res and not isinstance(res, Exception)]
+        # ETAPA 2: Posiciona todas as ordens da grade em paralelo
+        placed = await self._place_levels(book, book.initial_orders())
         
-        if successful_orders:
-             logger.info(f"{len(successful_orders)} ordens da grade posicionadas com sucesso.")
-             self.grid_orders_placed = True
+        if placed:
+             logger.info(f"{placed} ordens da grade de {symbol} posicionadas com sucesso.")
+             self.books[symbol] = book
         else:
-            logger.error("Nenhuma ordem da grade pôde ser posicionada. Verifique os logs de erro acima.")
+            logger.error(f"Nenhuma ordem da grade de {symbol} pôde ser posicionada. Verifique os logs de erro acima.")
 
+    async def _process_closed_orders(self, book: GridBook, order_ids: list):
+        """
+        Uma ordem que saiu do livro pode ter sido executada, cancelada ou rejeitada: o
+        status e a quantidade executada são confirmados na exchange antes de rearmar.
+        Executadas (total ou parcialmente) armam o nível oposto com a quantidade
+        executada; canceladas/rejeitadas sem execução rearmam o próprio nível. Todas as
+        ordens do ciclo são entregues juntas ao livro (ver `GridBook.on_closed`).
+        """
+        symbol = book.symbol
+        orders = await asyncio.gather(*(self.execution_handler.get_order(order_id, symbol) for order_id in order_ids))
+        fills, cancels = [], []
+        for order_id, order in zip(order_ids, orders):
+            if order is None or order.status == 'open':
+                continue  # Status não confirmado: a ordem é reavaliada no próximo ciclo
+            if order.status == 'closed' or order.filled:
+                partial = order.status != 'closed'
+                if partial:
+                    logger.info(f"Ordem {order_id} da grade de {symbol} encerrada ({order.status}) com execução parcial de {order.filled}.")
+                fills.append((order_id, order.filled if partial else None))
+            else:
+                logger.warning(f"Ordem {order_id} da grade de {symbol} encerrada sem execução ({order.status}); rearmando o nível.")
+                cancels.append(order_id)
+        replacements = book.on_closed(fills, cancels)
+        if fills:
+            logger.info(f"{len(fills)} ordens executadas na grade de {symbol}; rearmando {len(replacements)} níveis.")
+            self.metrics.record_signal(f"{len(fills)} execuções em {symbol}")
+        if replacements:
+            await self._place_levels(book, replacements)
+
+    async def _cancel_orders(self, book: GridBook, order_ids: list):
+        """Cancela ordens retiradas da janela; só as confirmadas deixam de ser acompanhadas."""
+        results = await asyncio.gather(*(self.execution_handler.cancel_order(order_id, book.symbol) for order_id in order_ids))
+        failed = 0
+        for order_id, ok in zip(order_ids, results):
+            if ok:
+                book.confirm_cancel(order_id)
+            else:
+                failed += 1
+        if failed:
+            logger.warning(f"{failed} cancelamentos na grade de {book.symbol} não confirmados; nova tentativa no próximo ciclo.")
+
+    async def sync_grid(self, symbol: str):
+        """
+        Detecta execuções (ordens que saíram do livro) e rearma o nível oposto. Se o
+        preço sair da janela, recentraliza a grade cancelando/posicionando só o diff.
+        """
+        book = self.books[symbol]
+        open_orders = await self.execution_handler.get_open_orders(symbol)
+        if open_orders is None:
+            return
+
+        open_ids = {order.id for order in open_orders}
+        gone = list(book.tracked_order_ids - open_ids)
+        if gone:
+            await self._process_closed_orders(book, gone)
+        # Cancelamentos de recentralizações anteriores que falharam: a ordem segue no livro
+        retry = [order_id for order_id in book.pending_cancel_ids if order_id in open_ids]
+        if retry:
+            await self._cancel_orders(book, retry)
+
+        current_price = await self.data_handler.get_current_price(symbol)
+        if current_price and book.needs_recenter(current_price, self.params.get('recenter_margin_levels', 1)):
+            cancels, places = book.recenter(current_price)
+            logger.info(f"Recentralizando a grade de {symbol} @ {current_price:.2f}: {len(cancels)} cancelamentos, {len(places)} novas ordens.")
+            await self._cancel_orders(book, cancels)
+            await self._place_levels(book, places)
 
     async def process_tick(self):
-        """Verifica se a grade precisa ser criada."""
-        # A lógica só executa uma vez para configurar a grade inicial.
-        if not self.grid_orders_placed:
-             current_price = await self.data_handler.get_current_price(self.platform_params['target_symbol'])
-             if current_price:
-                 await self.setup_grid(current_price)
\ No newline at end of file
+        """Cria a grade de cada símbolo na primeira vez e depois a mantém a partir das execuções."""
+        async def tick_symbol(symbol):
+            if symbol in self.books:
+                await self.sync_grid(symbol)
+                return
+            current_price = await self.data_handler.get_current_price(symbol)
+            if current_price:
+                await self.setup_grid(symbol, current_price)
+
+        await asyncio.gather(*(tick_symbol(symbol) for symbol in self.symbols))
@@ -1,48 +1,63 @@
-
+import argparse
 import asyncio
 import ccxt.async_support as ccxt
 import os
 from dotenv import load_dotenv
+from config import PLATFORM_PARAMS
+from handlers.markets_cache import open_markets_cache
 
-async def main():
+async def main(offline: bool = False, refresh: bool = False):
     """
-    Conecta-se à Hyperliquid e lista todos os mercados disponíveis para encontrar
-    símbolos válidos para as estratégias.
+    Lista todos os mercados disponíveis na Hyperliquid para encontrar símbolos válidos
+    para as estratégias. Usa o cache local de mercados quando disponível e atualizado;
+    caso contrário, conecta-se à exchange e atualiza o cache.
     """
     load_dotenv()
-    
-    wallet_address = os.getenv("HYPERLIQUID_WALLET_ADDRESS")
-    private_key = os.getenv("HYPERLIQUID_PRIVATE_KEY")
+    cache = open_markets_cache(PLATFORM_PARAMS)
 
-    if not wallet_address or not private_key:
-        print("Erro: As variáveis de ambiente HYPERLIQUID_WALLET_ADDRESS e HYPERLIQUID_PRIVATE_KEY não estão definidas.")
-        print("Por favor, configure-as no arquivo .env")
+    if offline and cache.markets is None:
+        print(f"Erro: cache de mercados '{cache.path}' não encontrado. Execute sem --offline para criá-lo.")
         return
 
-    exchange = ccxt.hyperliquid({
-        "walletAddress": wallet_address,
-        "privateKey": private_key,
-    })
-
-    try:
-        # Carrega os mercados da exchange
-        markets = await exchange.load_markets()
-        
-        print("==================================================")
-        print("Mercados Disponíveis na Hyperliquid (via CCXT)")
-        print("==================================================")
-        
-        # Imprime os símbolos de cada mercado
-        for symbol in markets:
-            print(symbol)
-            
-        print("\nTotal de mercados encontrados:", len(markets))
-
-    except Exception as e:
-        print(f"Ocorreu um erro ao buscar os mercados: {e}")
-    finally:
-        # É crucial fechar a conexão
-        await exchange.close()
+    if not offline and (refresh or cache.is_stale):
+        wallet_address = os.getenv("HYPERLIQUID_WALLET_ADDRESS")
+        private_key = os.getenv("HYPERLIQUID_PRIVATE_KEY")
+
+        if not wallet_address or not private_key:
+            print("Erro: As variáveis de ambiente HYPERLIQUID_WALLET_ADDRESS e HYPERLIQUID_PRIVATE_KEY não estão definidas.")
+            print("Por favor, configure-as no arquivo .env")
+            return
+
+        exchange = ccxt.hyperliquid({
+            "walletAddress": wallet_address,
+            "privateKey": private_key,
+        })
+
+        try:
+            # Carrega os mercados da exchange e atualiza o cache usado pelos handlers
+            await cache.refresh(exchange)
+        except Exception as e:
+            print(f"Ocorreu um erro ao buscar os mercados: {e}")
+            return
+        finally:
+            # É crucial fechar a conexão
+            await exchange.close()
+
+    markets = cache.markets
+    print("==================================================")
+    print("Mercados Disponíveis na Hyperliquid (via CCXT)")
+    print(f"Cache: '{cache.path}' (atualizado há {cache.age / 60:.0f} min)")
+    print("==================================================")
+
+    # Imprime os símbolos de cada mercado
+    for symbol in markets:
+        print(symbol)
+
+    print("\nTotal de mercados encontrados:", len(markets))
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Lista os mercados da Hyperliquid.")
+    parser.add_argument("--offline", action="store_true", help="Usa apenas o cache local, sem acessar a rede")
+    parser.add_argument("--refresh", action="store_true", help="Força o download dos mercados")
+    args = parser.parse_args()
+    asyncio.run(main(offline=args.offline, refresh=args.refresh))
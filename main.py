@@ -2,16 +2,18 @@
 
 import asyncio
 import logging
+import time
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
 
 # Importações dos Módulos e Configurações
 from config import PLATFORM_PARAMS, STRATEGY_PARAMS
-from handlers.data_handler import DataHandler
-from handlers.execution_handler import ExecutionHandler
-from handlers.risk_manager import RiskManager
-from handlers.state_manager import StateManager
+from strategies.strategy_registry import resolve_strategy
+from handlers.markets_cache import open_markets_cache
+from handlers.metrics import get_metrics_registry
+from handlers.profiler import get_runtime_profiler, tag_current_task
+from handlers.position_reconciler import PositionReconciler
 
 # Configuração do Logging Profissional
 logging.basicConfig(
@@ -73,16 +75,21 @@ async def main():
     # 3. Conexão e Sincronização
     # A conexão será iniciada dentro da própria estratégia quando necessário.
 
-    # 4. Instanciação da Estratégia Escolhida
+    # 4. Instanciação da Estratégia Escolhida (apenas o módulo escolhido é importado)
     try:
-        StrategyClass = strategy_config.get('class')
-        if not StrategyClass:
-            logger.critical(f"Classe de estratégia não definida para '{chosen_strategy_key}' no config.py.")
+        try:
+            StrategyClass = resolve_strategy(chosen_strategy_key, strategy_config)
+        except (KeyError, ImportError, ValueError) as e:
+            logger.critical(f"Classe de estratégia inválida para '{chosen_strategy_key}' no config.py: {e}")
             return
-            
+
+        # Estratégias de ativo único (ex.: seguidor de tendência) recebem o símbolo
+        extra_args = {'symbol': strategy_config['symbol']} if 'symbol' in strategy_config else {}
+        markets_cache = open_markets_cache(PLATFORM_PARAMS)
         strategy_instance = StrategyClass(
-            platform_params=PLATFORM_PARAMS,
-            strategy_params=strategy_config['params']
+            platform_params={**PLATFORM_PARAMS, "markets_cache": markets_cache},
+            strategy_params=strategy_config['params'],
+            **extra_args
         )
         
         # Inicializa a conexão DEPOIS de instanciar a estratégia
@@ -92,16 +99,47 @@ async def main():
         logger.critical(f"Erro ao instanciar a classe da estratégia: {e}", exc_info=True)
         return
 
-    # 5. Loop Principal de Execução
+    # 5. Loop Principal de Execução (metadados de mercado atualizados em segundo plano)
+    markets_refresh = asyncio.create_task(markets_cache.run())
+    registry = get_metrics_registry(PLATFORM_PARAMS)
+    metrics_snapshots = asyncio.create_task(registry.run())
+    profiler = get_runtime_profiler(PLATFORM_PARAMS)
+    profiler_control = asyncio.create_task(profiler.run())
+    # Estratégias de ativo único voltam para IDLE quando o stop/take profit encerra a posição
+    reconciler_task = None
+    if getattr(strategy_instance, "symbol", None):
+        reconciler = PositionReconciler(
+            strategy_instance.execution_handler,
+            interval=PLATFORM_PARAMS["reconcile_interval"],
+            grace_period=PLATFORM_PARAMS["reconcile_grace_period"],
+        )
+        reconciler.register(strategy_instance.symbol, strategy_instance.state_manager)
+        reconciler_task = asyncio.create_task(reconciler.run())
+    tag_current_task(strategy_instance)
+    dashboard = None
+    if PLATFORM_PARAMS["dashboard_enabled"]:
+        from handlers.dashboard import LiveDashboard
+        dashboard = LiveDashboard(registry, PLATFORM_PARAMS["dashboard_refresh_seconds"], console)
+        dashboard.start()
     try:
         while True:
-            await strategy_instance.process_tick()
+            started = time.perf_counter()
+            with profiler.scope(strategy_instance):
+                await strategy_instance.process_tick()
+            strategy_instance.metrics.record_tick((time.perf_counter() - started) * 1000)
             await asyncio.sleep(2)  # Pausa para não sobrecarregar a API
     except KeyboardInterrupt:
         logger.info("Desligamento solicitado pelo usuário.")
     except Exception as e:
         logger.critical(f"Erro fatal no loop principal: {e}", exc_info=True)
     finally:
+        if dashboard:
+            dashboard.stop()
+        markets_refresh.cancel()
+        metrics_snapshots.cancel()
+        profiler_control.cancel()
+        if reconciler_task:
+            reconciler_task.cancel()
         if 'strategy_instance' in locals() and strategy_instance.execution_handler:
             await strategy_instance.execution_handler.close_connection()
         console.print(Panel("[bold]Sistema encerrado.[/bold]", title="[bold]Shutdown[/bold]", border_style="red"))
@@ -3,13 +3,20 @@
 import asyncio
 import logging
 import random
+import time
 from rich.console import Console
 from rich.panel import Panel
 
 # Importações dos Módulos e Configurações
-from config import PLATFORM_PARAMS, STRATEGY_CONFIG, PORTFOLIO_ASSETS
-from strategies.statistical_arbitrage import StatisticalArbitrageStrategy
-from strategies.trend_following import TrendFollowingStrategy
+from config import PLATFORM_PARAMS, STRATEGY_CONFIG, PORTFOLIO_ASSETS, PORTFOLIO_RISK_PARAMS, ACCOUNTS
+from strategies.strategy_registry import resolve_strategy
+from handlers.account_pool import AccountPool
+from handlers.portfolio_risk import PortfolioRiskEngine
+from handlers.compute_offload import LoopLagMonitor, get_compute_offloader
+from handlers.markets_cache import open_markets_cache
+from handlers.model_server import get_model_server
+from handlers.metrics import get_metrics_registry
+from handlers.profiler import get_runtime_profiler, tag_current_task
 
 # Configuração do Logging Profissional
 logging.basicConfig(
@@ -31,9 +38,11 @@ def display_header():
         border_style="cyan"
     ))
 
-async def run_strategy(strategy_class, platform_params, strategy_params, symbol=None):
+async def run_strategy(strategy_class, platform_params, strategy_params, symbol=None, reconciler=None):
     """Função wrapper para inicializar e executar uma única instância de estratégia."""
     instance = None  # Garantir que a variável exista no escopo
+    account_pool = platform_params.get("account_pool")
+    account = None
     try:
         # --- CONTROLE DE RATE LIMIT ---
         # Adiciona um atraso aleatório de até 5 segundos antes de iniciar cada estratégia
@@ -42,6 +51,12 @@ async def run_strategy(strategy_class, platform_params, strategy_params, symbol=
         logger.info(f"Aguardando {initial_delay:.2f}s antes de iniciar a estratégia para {symbol or 'Pairs Trading'}...")
         await asyncio.sleep(initial_delay)
 
+        # Com o pool, a instância usa a conexão e o reconciliador da conta atribuída
+        if account_pool:
+            account = account_pool.assign(strategy_class.__name__, symbol)
+            platform_params = {**platform_params, "shared_execution_handler": account.execution_handler}
+            reconciler = account.reconciler
+
         # Adapta a inicialização para a TrendFollowingStrategy que requer um símbolo
         if symbol:
             instance = strategy_class(platform_params, strategy_params, symbol)
@@ -49,19 +64,105 @@ async def run_strategy(strategy_class, platform_params, strategy_params, symbol=
             instance = strategy_class(platform_params, strategy_params)
         
         await instance.execution_handler.initialize()
+        # Nome 'Estratégia|símbolo' na task: o profiler atribui as amostras a esta instância
+        tag_current_task(instance)
+        profiler = get_runtime_profiler(platform_params)
+
+        # Estratégias de ativo único (atributo `symbol`, explícito ou o `target_symbol`)
+        # passam a ter o estado mantido pelo reconciliador
+        traded_symbol = getattr(instance, "symbol", None)
+        if traded_symbol and reconciler:
+            reconciler.register(traded_symbol, instance.state_manager)
 
         while True:
-            await instance.process_tick()
-            # Aumenta a pausa para reduzir a carga geral na API
-            await asyncio.sleep(30)
+            started = time.perf_counter()
+            with profiler.scope(instance):
+                await instance.process_tick()
+            instance.metrics.record_tick((time.perf_counter() - started) * 1000)
+            # Cadência adaptativa: mercados ativos são consultados com mais frequência
+            await asyncio.sleep(instance.next_tick_interval())
             
     except Exception as e:
         strategy_name = strategy_class.__name__
         asset_info = f" para o ativo {symbol}" if symbol else ""
         logger.critical(f"Erro fatal na {strategy_name}{asset_info}: {e}", exc_info=True)
+        if instance:
+            instance.metrics.record_error("PARADA")
     finally:
+        if instance and reconciler and getattr(instance, "symbol", None):
+            reconciler.unregister(instance.symbol, instance.state_manager)
+        if instance:
+            # Instâncias encerradas (ex.: retiradas pelo screener) saem do dashboard
+            get_metrics_registry().remove(instance.metrics)
         if instance and instance.execution_handler:
             await instance.execution_handler.close_connection()
+        if account:
+            account_pool.release(account)
+
+async def run_reversion_screener(strategy_class, platform_params, strategy_params, screener_params,
+                                 reconciler, exclude_symbols=()):
+    """
+    Executa o screener do universo e mantém instâncias da estratégia de reversão apenas
+    para os mercados mais esticados. Instâncias sem posição que saem da lista por
+    `retire_after_bars` velas são encerradas (o `finally` de `run_strategy` as desregistra).
+    `reconciler` pode ser o pool de contas: basta expor `open_positions`.
+    """
+    from handlers.data_handler import DataHandler
+    from handlers.universe_screener import ReversionScreener
+
+    data_handler = DataHandler(platform_params)
+    screener = ReversionScreener(
+        bollinger_length=strategy_params['bollinger_length'],
+        bollinger_std=strategy_params['bollinger_std'],
+        rsi_length=strategy_params['rsi_length'],
+        rsi_oversold=strategy_params['rsi_oversold'],
+        rsi_overbought=strategy_params['rsi_overbought'],
+        bar_seconds=screener_params['bar_seconds'],
+        min_quote_volume=screener_params['min_quote_volume'],
+        exclude_symbols=exclude_symbols,
+    )
+    running = {}  # symbol -> task de run_strategy
+    idle_bars = {}
+
+    def on_bar(candidates):
+        shortlisted = {c['symbol'] for c in candidates}
+        for symbol, task in list(running.items()):
+            if task.done():
+                running.pop(symbol)
+                continue
+            if symbol in shortlisted or symbol in reconciler.open_positions:
+                idle_bars[symbol] = 0
+                continue
+            idle_bars[symbol] = idle_bars.get(symbol, 0) + 1
+            if idle_bars[symbol] >= screener_params['retire_after_bars']:
+                logger.info(f"{symbol} saiu da lista do screener; encerrando a instância de reversão.")
+                task.cancel()
+                running.pop(symbol)
+        for candidate in candidates:
+            symbol = candidate['symbol']
+            if symbol in running or len(running) >= screener_params['max_instances']:
+                continue
+            logger.info(f"Iniciando reversão à média para {symbol} (esticado {candidate['stretch']:.2f} ATRs).")
+            idle_bars[symbol] = 0
+            running[symbol] = asyncio.create_task(run_strategy(
+                strategy_class=strategy_class,
+                platform_params=platform_params,
+                strategy_params=strategy_params,
+                symbol=symbol,
+                reconciler=reconciler,
+            ))
+
+    try:
+        await data_handler.execution_handler.initialize()
+        if screener_params['warmup']:
+            await screener.warm_up(data_handler)
+        await screener.run(data_handler, on_bar, screener_params['poll_interval'], screener_params['top_k'])
+    except Exception as e:
+        logger.critical(f"Erro fatal no screener de reversão à média: {e}", exc_info=True)
+    finally:
+        for task in running.values():
+            task.cancel()
+        await data_handler.execution_handler.close_connection()
 
 async def main():
     """Função principal que orquestra a inicialização e execução de todas as estratégias."""
@@ -69,15 +170,41 @@ async def main():
     tasks = []
     active_strategies = []
 
+    # Metadados de mercado lidos do disco e compartilhados por todos os ExecutionHandlers
+    markets_cache = open_markets_cache(PLATFORM_PARAMS)
+    platform_params = {**PLATFORM_PARAMS, "markets_cache": markets_cache}
+
+    # Pool de contas: cada conta tem conexão, limite de requisições, balanço em cache e
+    # reconciliador próprios (uma consulta de posições por ciclo e por conta)
+    account_pool = AccountPool(ACCOUNTS, platform_params, PLATFORM_PARAMS["account_assignment"])
+    platform_params["account_pool"] = account_pool
+
+    # Motor de risco compartilhado: exposições de todas as contas, covariância das velas
+    # (os ativos escolhidos pelo screener de reversão são incluídos quando aparecem)
+    portfolio_risk = PortfolioRiskEngine(PORTFOLIO_ASSETS, PORTFOLIO_RISK_PARAMS)
+    account_pool.add_listener(portfolio_risk.sync_positions)
+    platform_params["portfolio_risk"] = portfolio_risk
+
+    # Gravação opcional de todas as respostas de mercado para replay determinístico
+    recorder = None
+    if PLATFORM_PARAMS["record_market_data"]:
+        from handlers.market_data_recorder import MarketDataRecorder
+        recorder = MarketDataRecorder(PLATFORM_PARAMS["market_data_dir"])
+    platform_params["market_data_recorder"] = recorder
+
+    # Métricas em memória: snapshots periódicos lidos pelo dashboard em outra thread
+    registry = get_metrics_registry(PLATFORM_PARAMS)
+    registry.loop_lag_monitor = LoopLagMonitor(
+        PLATFORM_PARAMS["loop_lag_target_ms"], offloader=get_compute_offloader(platform_params)
+    )
+    account_pool.add_listener(registry.update_positions)
+
     # --- Carregar Estratégia de Arbitragem Estatística ---
     if STRATEGY_CONFIG['statistical_arbitrage']['enabled']:
         config = STRATEGY_CONFIG['statistical_arbitrage']
-        # A classe ainda não foi importada, então usamos o nome por enquanto
-        # Quando o arquivo for criado, a importação no topo será descomentada
-        config['class'] = StatisticalArbitrageStrategy
         tasks.append(run_strategy(
-            strategy_class=config['class'],
-            platform_params=PLATFORM_PARAMS,
+            strategy_class=resolve_strategy('statistical_arbitrage', config),
+            platform_params=platform_params,
             strategy_params=config['params']
         ))
         active_strategies.append("Arbitragem Estatística (Pairs Trading)")
@@ -85,28 +212,61 @@ async def main():
     # --- Carregar Estratégia de Seguidor de Tendência para o Portfólio ---
     if STRATEGY_CONFIG['trend_following']['enabled']:
         config = STRATEGY_CONFIG['trend_following']
+        strategy_class = resolve_strategy('trend_following', config)
         for asset in PORTFOLIO_ASSETS:
             tasks.append(run_strategy(
-                strategy_class=config['class'],
-                platform_params=PLATFORM_PARAMS,
+                strategy_class=strategy_class,
+                platform_params=platform_params,
                 strategy_params=config['params'],
-                symbol=asset
+                symbol=asset,
             ))
         active_strategies.append(f"Seguidor de Tendência ({len(PORTFOLIO_ASSETS)} ativos)")
 
+    # --- Carregar Reversão à Média sobre o universo (instâncias iniciadas pelo screener) ---
+    if STRATEGY_CONFIG['mean_reversion']['enabled']:
+        config = STRATEGY_CONFIG['mean_reversion']
+        # Ativos do seguidor de tendência ficam fora: um símbolo, uma estratégia dona
+        exclude = PORTFOLIO_ASSETS if STRATEGY_CONFIG['trend_following']['enabled'] else ()
+        tasks.append(run_reversion_screener(
+            strategy_class=resolve_strategy('mean_reversion', config),
+            platform_params=platform_params,
+            strategy_params=config['params'],
+            screener_params=config['screener'],
+            reconciler=account_pool,
+            exclude_symbols=exclude,
+        ))
+        active_strategies.append(f"Reversão à Média (até {config['screener']['max_instances']} ativos via screener)")
+
     if not tasks:
         logger.error("Nenhuma estratégia foi habilitada no config.py. Encerrando.")
         return
 
     console.print(f"Iniciando as seguintes estratégias: [bold green]{', '.join(active_strategies)}[/bold green]...\n")
+    tasks.append(account_pool.run())
+    tasks.append(registry.loop_lag_monitor.run())
+    tasks.append(get_model_server(PLATFORM_PARAMS).watch())
+    tasks.append(markets_cache.run())
+    tasks.append(registry.run())
+    # Profiling sob demanda: SIGUSR1/SIGUSR2 ou arquivo de controle (python profiler.py start ...)
+    tasks.append(get_runtime_profiler(PLATFORM_PARAMS).run())
+
+    dashboard = None
+    if PLATFORM_PARAMS["dashboard_enabled"]:
+        from handlers.dashboard import LiveDashboard
+        dashboard = LiveDashboard(registry, PLATFORM_PARAMS["dashboard_refresh_seconds"], console)
+        dashboard.start()
 
     try:
         await asyncio.gather(*tasks)
     except KeyboardInterrupt:
         logger.info("Desligamento solicitado pelo usuário.")
     finally:
+        if dashboard:
+            dashboard.stop()
         logger.info("Encerrando todas as conexões...")
         # O encerramento agora é tratado dentro de cada task `run_strategy`
+        if recorder:
+            recorder.close()
         console.print(Panel("[bold]Sistema encerrado.[/bold]", title="[bold]Shutdown[/bold]", border_style="red"))
 
 if __name__ == "__main__":
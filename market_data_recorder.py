@@ -0,0 +1,140 @@
+# Gravação e reprodução determinística dos dados de mercado
+import asyncio
+import gzip
+import json
+import logging
+import time
+import zlib
+from collections import defaultdict, deque
+from pathlib import Path
+
+logger = logging.getLogger("MarketDataRecorder")
+
+class MarketDataRecorder:
+    """
+    Grava cada resposta de dados de mercado (e mensagens de stream) com o horário de
+    recebimento em segmentos JSONL comprimidos com gzip, somente anexados. Um novo
+    segmento é aberto quando o atual atinge o tamanho ou a idade máxima.
+    """
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 segment_max_seconds: float = 3600.0, flush_interval: float = 1.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_seconds = segment_max_seconds
+        self.flush_interval = flush_interval
+        self._file = None
+        self._segment_started = 0.0
+        self._segment_bytes = 0
+        self._last_flush = 0.0
+        self._sequence = 0
+        self.records_written = 0
+
+    def _open_segment(self):
+        self.close()
+        self._segment_started = time.time()
+        self._sequence += 1
+        path = self.directory / f"segment-{int(self._segment_started * 1000)}-{self._sequence:05d}.jsonl.gz"
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._segment_bytes = 0
+        logger.info(f"Gravando dados de mercado em '{path.name}'.")
+
+    def record(self, kind: str, symbol: str, request: dict, response, recv_ts: float = None):
+        """Anexa um registro. `kind` identifica o endpoint (ex.: 'ohlcv', 'order_book', 'stream')."""
+        recv_ts = recv_ts or time.time()
+        if (self._file is None or self._segment_bytes >= self.segment_max_bytes
+                or recv_ts - self._segment_started >= self.segment_max_seconds):
+            self._open_segment()
+        line = json.dumps(
+            {"ts": recv_ts, "kind": kind, "symbol": symbol, "request": request, "response": response},
+            separators=(',', ':'),
+        )
+        self._file.write(line + "\n")
+        self._segment_bytes += len(line) + 1
+        self.records_written += 1
+        if recv_ts - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = recv_ts
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def iter_records(directory: str):
+    """
+    Lê todos os registros gravados, em ordem de segmento e de gravação. Um segmento
+    interrompido (processo encerrado antes do `close`) não tem o final do stream gzip:
+    os registros descarregados até o último flush são lidos e a leitura segue para o
+    próximo segmento.
+    """
+    for path in sorted(Path(directory).glob("segment-*.jsonl.gz")):
+        read = 0
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Último registro de um segmento interrompido pode estar incompleto
+                        logger.warning(f"Registro truncado ignorado em '{path.name}'.")
+                        continue
+                    read += 1
+                    yield record
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            logger.warning(f"Segmento '{path.name}' interrompido após {read} registros: {e}")
+
+class ReplayExhausted(Exception):
+    """Não há mais respostas gravadas para a requisição solicitada."""
+
+class ReplayExchange:
+    """
+    Substitui a exchange do ccxt devolvendo as respostas gravadas, na mesma ordem, para
+    cada série (endpoint, símbolo, timeframe). Com `speed > 0` cada resposta só é
+    entregue no instante relativo em que foi recebida (dividido por `speed`); com
+    `speed = 0` a reprodução é tão rápida quanto possível.
+    """
+    def __init__(self, directory: str, speed: float = 0.0):
+        self.speed = speed
+        self._queues = defaultdict(deque)
+        self._first_ts = None
+        self.records_loaded = 0
+        for record in iter_records(directory):
+            self._queues[self._key(record['kind'], record['symbol'], record['request'])].append(record)
+            self._first_ts = record['ts'] if self._first_ts is None else min(self._first_ts, record['ts'])
+            self.records_loaded += 1
+        self.records_served = 0
+        self.exhausted = False
+        self._started = None
+        logger.info(f"{self.records_loaded} registros carregados para replay de '{directory}'.")
+
+    @staticmethod
+    def _key(kind: str, symbol: str, request: dict) -> tuple:
+        return kind, symbol, (request or {}).get('timeframe')
+
+    async def _next(self, kind: str, symbol: str, request: dict):
+        queue = self._queues.get(self._key(kind, symbol, request))
+        if not queue:
+            self.exhausted = True
+            raise ReplayExhausted(f"Sem respostas gravadas para {kind} {symbol} {request}.")
+        record = queue.popleft()
+        if self.speed > 0:
+            if self._started is None:
+                self._started = time.monotonic()
+            delay = (record['ts'] - self._first_ts) / self.speed - (time.monotonic() - self._started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self.records_served += 1
+        return record['response']
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since=None, limit=None, params=None):
+        return await self._next('ohlcv', symbol, {'timeframe': timeframe})
+
+    async def fetch_order_book(self, symbol: str, limit=None, params=None):
+        return await self._next('order_book', symbol, {})
+
+    async def fetch_tickers(self, symbols=None, params=None):
+        return await self._next('tickers', '*', {})
+
+    async def close(self):
+        pass
@@ -30,6 +30,7 @@ class MarketMakingStrategy(BaseStrategy):
             await self.execution_handler.setup_trading_environment(symbol, self.platform_params['leverage'])
             
             logger.info(f"Posicionando ordens: COMPRA @ {bid_price:.2f}, VENDA @ {ask_price:.2f}")
+            self.metrics.set_indicators(mid=mid_price, bid=bid_price, ask=ask_price)
 
             # ETAPA 2: Posicionar ordens com a chamada de API correta
             await asyncio.gather(
@@ -0,0 +1,144 @@
+# Cache em disco dos metadados de mercado da exchange
+import asyncio
+import json
+import logging
+import os
+import time
+import weakref
+from pathlib import Path
+
+logger = logging.getLogger("MarketsCache")
+
+# Incrementar quando o formato do arquivo mudar; arquivos de outra versão são ignorados
+CACHE_VERSION = 1
+
+def _ccxt_version() -> str | None:
+    try:
+        import ccxt
+        return getattr(ccxt, '__version__', None)
+    except ImportError:
+        return None
+
+class MarketsCache:
+    """
+    Metadados de mercado (símbolos, precisão, limites, IDs de ativo) compartilhados por
+    todos os clientes do processo. São lidos do disco na inicialização e atualizados em
+    segundo plano quando ficam mais velhos que `ttl`; a cada atualização, os clientes
+    conectados recebem os novos mercados sem baixá-los individualmente.
+
+    O arquivo guarda a versão do formato e a versão do ccxt que o gerou: um formato
+    diferente é descartado, e outra versão do ccxt apenas antecipa a atualização.
+    """
+    def __init__(self, path: str, ttl: float = 6 * 3600, exchange_id: str = "hyperliquid"):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.exchange_id = exchange_id
+        self.markets = None
+        self.fetched_at = 0.0
+        self.ccxt_version = None
+        self._clients = weakref.WeakSet()  # Exchanges que recebem as atualizações
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.markets is None or self.age >= self.ttl or self.ccxt_version != _ccxt_version()
+
+    # --- Disco ---
+
+    def load(self) -> bool:
+        """Lê o arquivo de cache (sem rede). Retorna False se ausente, ilegível ou de outra versão."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache de mercados '{self.path}' ilegível: {e}")
+            return False
+        if payload.get('version') != CACHE_VERSION or payload.get('exchange') != self.exchange_id:
+            logger.info(f"Cache de mercados '{self.path}' de outra versão/exchange; será recriado.")
+            return False
+        self.markets = payload['markets']
+        self.fetched_at = payload['fetched_at']
+        self.ccxt_version = payload.get('ccxt_version')
+        logger.info(f"{len(self.markets)} mercados carregados de '{self.path}' (idade {self.age / 60:.0f} min).")
+        return True
+
+    def save(self):
+        """Grava o cache de forma atômica (arquivo temporário + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'version': CACHE_VERSION,
+            'exchange': self.exchange_id,
+            'ccxt_version': self.ccxt_version,
+            'fetched_at': self.fetched_at,
+            'markets': self.markets,
+        }
+        tmp = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+    # --- Clientes ---
+
+    async def attach(self, exchange):
+        """
+        Entrega os mercados a uma exchange do ccxt. Só bloqueia na rede se ainda não
+        houver cache algum; cache velho é usado imediatamente e atualizado pelo `run`.
+        """
+        if self.markets is None:
+            await self.refresh(exchange)
+        exchange.set_markets(self.markets)
+        self._clients.add(exchange)
+
+    async def refresh(self, exchange):
+        """Baixa os mercados com `exchange`, grava o cache e atualiza os clientes conectados."""
+        requested_at = self.fetched_at
+        async with self._refresh_lock:
+            if self.fetched_at > requested_at:
+                return  # Atualizado por outra tarefa enquanto esperávamos
+            markets = await exchange.load_markets(reload=True)
+            self.markets = markets
+            self.fetched_at = time.time()
+            self.ccxt_version = _ccxt_version()
+            self.save()
+        for client in list(self._clients):
+            if client is not exchange:
+                client.set_markets(self.markets)
+        logger.info(f"{len(self.markets)} mercados atualizados e salvos em '{self.path}'.")
+
+    async def run(self, exchange_factory=None):
+        """
+        Atualiza o cache em segundo plano a cada `ttl`. Antes de baixar, relê o disco:
+        se outro processo já atualizou o arquivo, basta distribuir a versão dele.
+        `exchange_factory` cria a conexão pública usada no download.
+        """
+        if exchange_factory is None:
+            import ccxt.async_support as ccxt
+            exchange_factory = lambda: getattr(ccxt, self.exchange_id)({"enableRateLimit": True})
+        while True:
+            await asyncio.sleep(max(0.0, self.ttl - self.age) if not self.is_stale else 0.0)
+            previous = self.fetched_at
+            if self.load() and not self.is_stale:
+                if self.fetched_at > previous:
+                    for client in list(self._clients):
+                        client.set_markets(self.markets)
+                continue
+            exchange = exchange_factory()
+            try:
+                await self.refresh(exchange)
+            except Exception as e:
+                logger.error(f"Falha ao atualizar o cache de mercados: {e}. Nova tentativa em 60s.")
+                await asyncio.sleep(60)
+            finally:
+                await exchange.close()
+
+def open_markets_cache(platform_params: dict) -> MarketsCache:
+    """Cria o cache a partir dos parâmetros da plataforma e carrega o arquivo, se existir."""
+    cache = MarketsCache(platform_params["markets_cache_file"], platform_params.get("markets_cache_ttl", 6 * 3600))
+    cache.load()
+    return cache
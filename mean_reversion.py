@@ -3,18 +3,50 @@
 import logging
 import pandas_ta as ta
 from .base_strategy import BaseStrategy
+from handlers.records import CandleBlock
 
 logger = logging.getLogger("MeanReversionStrategy")
 
+def compute_reversion_indicators(candles: CandleBlock, bollinger_length: int, bollinger_std: float, rsi_length: int) -> dict:
+    """
+    Calcula Bandas de Bollinger, IFR e ATR da última vela.
+    Função pura de CPU, executada fora do event loop via `BaseStrategy.offload`.
+    """
+    candles = candles.to_frame()
+    candles.ta.bbands(length=bollinger_length, std=bollinger_std, append=True)
+    candles.ta.rsi(length=rsi_length, append=True)
+    candles.ta.atr(length=14, append=True)
+
+    last_candle = candles.iloc[-1]
+    return {
+        'lower_band': last_candle[f'BBL_{bollinger_length}_{bollinger_std}'],
+        'middle_band': last_candle[f'BBM_{bollinger_length}_{bollinger_std}'],
+        'upper_band': last_candle[f'BBU_{bollinger_length}_{bollinger_std}'],
+        'rsi': last_candle[f'RSI_{rsi_length}'],
+        'atr': last_candle['ATRr_14'],
+    }
+
 class MeanReversionStrategy(BaseStrategy):
     """Estratégia 4: Reversão à Média com Bandas de Bollinger e IFR (VERSÃO COM LOGS MELHORADOS)."""
 
+    def __init__(self, platform_params: dict, strategy_params: dict, symbol: str = None):
+        super().__init__(platform_params, strategy_params)
+        # Sem símbolo explícito (menu do main.py), opera o `target_symbol` da plataforma;
+        # o screener do universo inicia instâncias com o símbolo selecionado
+        self.symbol = symbol or platform_params["target_symbol"]
+        self.metrics.symbol = self.symbol
+
     async def process_tick(self):
-        symbol = self.platform_params["target_symbol"]
+        symbol = self.symbol
         
         if self.state_manager.state == "IN_POSITION":
             # Adicionado log para clareza quando já estiver em uma posição
             logger.info("Já em posição. Aguardando saída antes de avaliar novas entradas.")
+            # O ativo continua alimentando a covariância do risco de portfólio
+            candles = await self.data_handler.get_candles(symbol, '5m', 2)
+            if candles is not None and len(candles) >= 2:
+                self.risk_manager.observe_close(symbol, candles.timestamp[-2], candles.close[-2])
+                self.risk_manager.skip_bar(symbol, candles.timestamp[-2])
             return
 
         candles = await self.data_handler.get_candles(symbol, '5m', 100)
@@ -22,12 +54,21 @@ class MeanReversionStrategy(BaseStrategy):
             logger.warning("Dados de candles insuficientes para calcular indicadores.")
             return
 
-        # Calcular indicadores
-        candles.ta.bbands(length=self.params['bollinger_length'], std=self.params['bollinger_std'], append=True)
-        candles.ta.rsi(length=self.params['rsi_length'], append=True)
-        candles.ta.atr(length=14, append=True)
+        bar_timestamp = candles.timestamp[-2]  # Última vela fechada
+        self.risk_manager.observe_close(symbol, bar_timestamp, candles.close[-2])
+        try:
+            await self._evaluate_entry(symbol, candles, bar_timestamp)
+        finally:
+            # Libera a barreira do lote de risco quando a vela não teve entrada
+            self.risk_manager.skip_bar(symbol, bar_timestamp)
 
-        last_candle = candles.iloc[-1]
+    async def _evaluate_entry(self, symbol: str, candles: CandleBlock, bar_timestamp):
+        """Calcula os indicadores da última vela e abre a posição quando há sinal."""
+        # Calcular indicadores (fora do event loop)
+        indicators = await self.offload(
+            compute_reversion_indicators, candles,
+            self.params['bollinger_length'], self.params['bollinger_std'], self.params['rsi_length']
+        )
         current_price = await self.data_handler.get_current_price(symbol)
         
         if current_price is None:
@@ -35,10 +76,11 @@ class MeanReversionStrategy(BaseStrategy):
 
         # --- MELHORIA DE LOGGING ---
         # Extrair valores dos indicadores para logar
-        lower_band = last_candle[f'BBL_{self.params["bollinger_length"]}_{self.params["bollinger_std"]}']
-        middle_band = last_candle[f'BBM_{self.params["bollinger_length"]}_{self.params["bollinger_std"]}']
-        upper_band = last_candle[f'BBU_{self.params["bollinger_length"]}_{self.params["bollinger_std"]}']
-        rsi = last_candle[f'RSI_{self.params["rsi_length"]}']
+        lower_band = indicators['lower_band']
+        middle_band = indicators['middle_band']
+        upper_band = indicators['upper_band']
+        rsi = indicators['rsi']
+        self.metrics.set_indicators(price=current_price, bb_low=lower_band, bb_up=upper_band, rsi=rsi)
 
         # Logar o estado atual do mercado a cada ciclo
         logger.info(
@@ -51,11 +93,13 @@ class MeanReversionStrategy(BaseStrategy):
         if current_price < lower_band and rsi < self.params['rsi_oversold']:
             signal = 1
             logger.info(f"SINAL DE COMPRA (Reversão) DETECTADO para {symbol}")
+            self.metrics.record_signal('COMPRA')
         
         # Sinal de VENDA (Preço acima da banda superior + RSI sobrecomprado)
         elif current_price > upper_band and rsi > self.params['rsi_overbought']:
             signal = -1
             logger.info(f"SINAL DE VENDA (Reversão) DETECTADO para {symbol}")
+            self.metrics.record_signal('VENDA')
         
         else:
             # Log quando nenhuma condição for atendida
@@ -63,16 +107,18 @@ class MeanReversionStrategy(BaseStrategy):
 
         if signal != 0:
             side = 'buy' if signal == 1 else 'sell'
-            atr = last_candle['ATRr_14']
+            atr = indicators['atr']
             stop_loss_price = current_price - (atr * self.params['stop_loss_atr_multiplier']) if side == 'buy' else current_price + (atr * self.params['stop_loss_atr_multiplier'])
             take_profit_price = middle_band # Alvo na média
 
             size = await self.risk_manager.calculate_position_size(
-                self.params['risk_per_trade'], current_price, stop_loss_price
+                self.params['risk_per_trade'], current_price, stop_loss_price,
+                symbol=symbol, bar_timestamp=bar_timestamp
             )
 
             if size:
                 await self.execution_handler.setup_trading_environment(symbol, self.platform_params['leverage'])
                 order_params = {'stopLoss': {'triggerPrice': stop_loss_price}, 'takeProfit': {'triggerPrice': take_profit_price}}
-                await self.execution_handler.place_order(symbol, 'market', side, size, params=order_params)
-                self.state_manager.set_in_position()
\ No newline at end of file
+                order = await self.execution_handler.place_order(symbol, side, size, 'market', params=order_params)
+                if order:
+                    self.state_manager.set_in_position()
\ No newline at end of file
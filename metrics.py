@@ -0,0 +1,135 @@
+# Métricas em memória das estratégias, publicadas em snapshots imutáveis
+import asyncio
+import logging
+import time
+from collections import Counter
+
+logger = logging.getLogger("Metrics")
+
+class StrategyMetrics:
+    """
+    Métricas de uma instância de estratégia, escritas apenas pelo event loop de
+    negociação (atribuições simples, sem locks nem I/O).
+    """
+    __slots__ = ('name', 'symbol', 'state_manager', 'status', 'last_signal', 'last_signal_at',
+                 'indicators', 'ticks', 'errors', 'last_tick_ms', 'avg_tick_ms', 'last_tick_at')
+
+    def __init__(self, name: str, symbol: str = None, state_manager=None):
+        self.name = name
+        self.symbol = symbol
+        self.state_manager = state_manager
+        self.status = "INICIANDO"
+        self.last_signal = None
+        self.last_signal_at = None
+        self.indicators = {}
+        self.ticks = 0
+        self.errors = 0
+        self.last_tick_ms = None
+        self.avg_tick_ms = None
+        self.last_tick_at = None
+
+    def record_signal(self, signal: str):
+        self.last_signal = signal
+        self.last_signal_at = time.time()
+
+    def set_indicators(self, **values):
+        self.indicators.update(values)
+
+    def record_tick(self, elapsed_ms: float):
+        self.ticks += 1
+        self.status = "ATIVA"
+        self.last_tick_ms = elapsed_ms
+        self.avg_tick_ms = elapsed_ms if self.avg_tick_ms is None else 0.9 * self.avg_tick_ms + 0.1 * elapsed_ms
+        self.last_tick_at = time.time()
+
+    def record_error(self, status: str = "ERRO"):
+        self.errors += 1
+        self.status = status
+
+class MetricsRegistry:
+    """
+    Registro das métricas do processo. O event loop escreve nos objetos de métricas e,
+    a cada `interval`, monta um snapshot imutável (tupla de dicionários) e troca a
+    referência `snapshot` de uma só vez. Leitores em outras threads (ex.: o dashboard)
+    apenas leem essa referência: nunca veem um estado parcial e nunca bloqueiam o loop.
+    """
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.started_at = time.time()
+        self._strategies = []
+        self.requests = Counter()  # endpoint -> requisições acumuladas
+        self._pnl = {}             # symbol -> PnL não realizado da última reconciliação
+        self._last_requests = Counter()
+        self._last_snapshot_at = time.monotonic()
+        self.loop_lag_monitor = None
+        self.snapshot = {"strategies": (), "requests_per_s": {}, "pnl_total": 0.0, "loop_lag_ms": None,
+                         "uptime_s": 0.0, "taken_at": time.time()}
+
+    def strategy(self, name: str, symbol: str = None, state_manager=None) -> StrategyMetrics:
+        metrics = StrategyMetrics(name, symbol, state_manager)
+        self._strategies.append(metrics)
+        return metrics
+
+    def remove(self, metrics: StrategyMetrics):
+        if metrics in self._strategies:
+            self._strategies.remove(metrics)
+
+    def count_request(self, endpoint: str):
+        self.requests[endpoint] += 1
+
+    def update_positions(self, positions: list):
+        """Listener do reconciliador: PnL não realizado por símbolo."""
+        self._pnl = {p.symbol: p.unrealized_pnl or 0.0 for p in positions}
+
+    def take_snapshot(self):
+        now = time.monotonic()
+        elapsed = max(now - self._last_snapshot_at, 1e-9)
+        rates = {endpoint: (count - self._last_requests[endpoint]) / elapsed for endpoint, count in self.requests.items()}
+        self._last_requests = self.requests.copy()
+        self._last_snapshot_at = now
+
+        pnl = self._pnl
+        rows = tuple(
+            {
+                "name": m.name,
+                "symbol": m.symbol,
+                "state": m.state_manager.state if m.state_manager else None,
+                "status": m.status,
+                "last_signal": m.last_signal,
+                "last_signal_at": m.last_signal_at,
+                "indicators": dict(m.indicators),
+                "pnl": pnl.get(m.symbol),
+                "ticks": m.ticks,
+                "errors": m.errors,
+                "last_tick_ms": m.last_tick_ms,
+                "avg_tick_ms": m.avg_tick_ms,
+                "last_tick_at": m.last_tick_at,
+            }
+            for m in self._strategies
+        )
+        monitor = self.loop_lag_monitor
+        # Atribuição única: o leitor vê o snapshot anterior ou o novo, nunca um misto
+        self.snapshot = {
+            "strategies": rows,
+            "requests_per_s": rates,
+            "pnl_total": sum(pnl.values()),
+            "loop_lag_ms": monitor.last_lag_ms if monitor else None,
+            "uptime_s": time.time() - self.started_at,
+            "taken_at": time.time(),
+        }
+
+    async def run(self):
+        """Publica um novo snapshot a cada `interval` segundos."""
+        while True:
+            self.take_snapshot()
+            await asyncio.sleep(self.interval)
+
+_registry = None
+
+def get_metrics_registry(platform_params: dict = None) -> MetricsRegistry:
+    """Retorna o registro de métricas do processo, criando-o na primeira chamada."""
+    global _registry
+    if _registry is None:
+        params = platform_params or {}
+        _registry = MetricsRegistry(interval=params.get("metrics_snapshot_interval", 1.0))
+    return _registry
@@ -0,0 +1,128 @@
+# Agrupamento das requisições das estratégias por vela fechada
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class _PendingBar:
+    __slots__ = ('items', 'futures', 'reported', 'deadline', 'handle')
+
+    def __init__(self, deadline: float):
+        self.items = []
+        self.futures = []
+        self.reported = set()      # Participantes que já enviaram ou dispensaram esta vela
+        self.deadline = deadline   # Prazo máximo de espera (epoch, s)
+        self.handle = None
+
+class BarBatcher:
+    """
+    Junta os itens enviados pelas instâncias de estratégia para a mesma vela fechada e
+    os processa em uma única chamada vetorizada.
+
+    As instâncias avançam em cadências próprias (de segundos a minutos depois do
+    fechamento), então uma janela curta a partir do primeiro envio quase sempre
+    produziria lotes de um item. Aqui o lote de uma vela é uma barreira:
+
+    - cada participante (ex.: o símbolo da instância) se reporta uma vez por vela, com
+      `submit` (quando tem um item) ou `skip` (quando não tem);
+    - o lote é processado assim que todos os participantes da vela anterior se
+      reportaram, ou quando vence o prazo de `max_delay` segundos após o fechamento da
+      vela, o que ocorrer primeiro;
+    - participantes cujo próximo tick só ocorrerá depois do prazo não são esperados:
+      com a cadência adaptativa (até 120 s entre ticks) eles não chegariam a tempo e
+      apenas atrasariam o lote dos demais. O próximo tick é estimado pelo intervalo
+      entre os dois últimos reportes do participante (todo tick se reporta, inclusive
+      os que chegam a uma vela já processada);
+    - itens que chegam depois que a vela já foi processada seguem sozinhos, sem espera.
+
+    `process_batch` é uma coroutine que recebe a lista de itens e devolve uma lista
+    de resultados na mesma ordem. As velas são identificadas pelo timestamp de abertura
+    (ms) da vela fechada.
+    """
+    def __init__(self, process_batch, bar_seconds: int = 300, max_delay: float = 30.0):
+        self.process_batch = process_batch
+        self.bar_seconds = bar_seconds
+        self.max_delay = max_delay  # Espera máxima (s) após o fechamento da vela
+        self._bars = {}             # timestamp da vela -> _PendingBar
+        self._expected = set()      # Participantes da última vela processada
+        self._last_flushed = None
+        self._reports = {}          # Participante -> (horário do último reporte, intervalo até ele)
+
+    def _is_late(self, bar: int, key) -> bool:
+        late = bar not in self._bars and self._last_flushed is not None and bar <= self._last_flushed
+        if late and bar == self._last_flushed:
+            # Participou da vela, só que depois do lote: continua esperado na próxima
+            self._expected.add(key)
+        return late
+
+    def _pending(self, bar: int) -> _PendingBar:
+        pending = self._bars.get(bar)
+        if pending is None:
+            pending = self._bars[bar] = _PendingBar(bar / 1000 + self.bar_seconds + self.max_delay)
+            delay = pending.deadline - time.time()
+            pending.handle = asyncio.get_running_loop().call_later(max(delay, 0.0), self._start_flush, bar)
+        return pending
+
+    def _note_report(self, key):
+        now = time.time()
+        last = self._reports.get(key)
+        self._reports[key] = (now, now - last[0] if last else None)
+
+    def _arrives_after(self, key, deadline: float) -> bool:
+        """Se o próximo reporte estimado de `key` cai depois de `deadline`."""
+        last = self._reports.get(key)
+        return last is not None and last[1] is not None and last[0] + last[1] > deadline
+
+    async def submit(self, bar, key, item):
+        """Adiciona o item de `key` ao lote da vela `bar` e aguarda o seu resultado."""
+        bar = int(bar)
+        self._note_report(key)
+        if self._is_late(bar, key):
+            return (await self.process_batch([item]))[0]
+        pending = self._pending(bar)
+        future = asyncio.get_running_loop().create_future()
+        pending.items.append(item)
+        pending.futures.append(future)
+        self._report(bar, pending, key)
+        return await future
+
+    def skip(self, bar, key):
+        """Informa que `key` não enviará itens para a vela `bar` (libera a barreira)."""
+        bar = int(bar)
+        self._note_report(key)
+        if self._is_late(bar, key):
+            return
+        self._report(bar, self._pending(bar), key)
+
+    def _report(self, bar: int, pending: _PendingBar, key):
+        pending.reported.add(key)
+        if not self._expected:
+            return
+        waiting = self._expected - pending.reported
+        if all(self._arrives_after(k, pending.deadline) for k in waiting):
+            self._start_flush(bar)
+
+    def _start_flush(self, bar: int):
+        pending = self._bars.pop(bar, None)
+        if pending is None:
+            return
+        pending.handle.cancel()
+        if self._last_flushed is None or bar >= self._last_flushed:
+            self._last_flushed = bar
+            self._expected = pending.reported
+        if pending.items:
+            asyncio.ensure_future(self._flush(pending.items, pending.futures))
+
+    async def _flush(self, items, futures):
+        try:
+            results = await self.process_batch(items)
+        except Exception as e:
+            logger.error(f"Erro ao processar lote de {len(items)} itens: {e}", exc_info=True)
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
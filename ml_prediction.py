@@ -7,8 +7,12 @@ logger = logging.getLogger("MLPredictionStrategy")
 class MLPredictionStrategy(BaseStrategy):
     """Estratégia 8: Previsão Direcional com Machine Learning (Simulado)."""
 
-    def __init__(self, platform_params: dict, strategy_params: dict):
+    def __init__(self, platform_params: dict, strategy_params: dict, symbol: str = None):
         super().__init__(platform_params, strategy_params)
+        # Ativo operado (por padrão, o `target_symbol` da plataforma); o reconciliador
+        # de posições usa o mesmo atributo para rearmar a estratégia
+        self.symbol = symbol or platform_params["target_symbol"]
+        self.metrics.symbol = self.symbol
         logger.info("Estratégia de ML inicializada (Modo de Simulação).")
 
     async def get_ml_prediction(self, data):
@@ -23,17 +27,19 @@ class MLPredictionStrategy(BaseStrategy):
         if self.state_manager.state == "IN_POSITION":
             return
 
-        symbol = self.platform_params['target_symbol']
+        symbol = self.symbol
         
         features = await self.data_handler.get_candles(symbol, '1m', 20)
         if features is None:
             return
 
         prediction, confidence = await self.get_ml_prediction(features)
+        self.metrics.set_indicators(prediction=prediction, confidence=confidence)
         
         if prediction != 0 and confidence > self.params['min_confidence_threshold']:
             side = 'buy' if prediction == 1 else 'sell'
             logger.info(f"Executando ordem baseada em ML: {side.upper()}")
+            self.metrics.record_signal(side.upper())
             
             current_price = await self.data_handler.get_current_price(symbol)
             if not current_price: return
@@ -0,0 +1,117 @@
+# Servidor de modelos compartilhado com inferência em lote
+import asyncio
+import logging
+import os
+from pathlib import Path
+import numpy as np
+from handlers.micro_batcher import BarBatcher
+
+logger = logging.getLogger("ModelServer")
+
+class ModelServer:
+    """
+    Carrega cada modelo uma única vez por processo e atende todas as estratégias.
+
+    - Os arrays do modelo são mapeados em memória (joblib `mmap_mode='r'`), então
+      processos diferentes compartilham as mesmas páginas do sistema operacional.
+    - As linhas de features enviadas para a mesma vela fechada são agrupadas em uma
+      única chamada vetorizada a `predict_proba` (barreira por vela, ver `BarBatcher`).
+      As instâncias que não consultam o modelo numa vela devem chamar `skip`.
+    - O arquivo é monitorado e recarregado sem reiniciar o bot quando é alterado.
+    """
+    def __init__(self, bar_seconds: int = 300, max_delay: float = 30.0):
+        self.bar_seconds = bar_seconds
+        self.max_delay = max_delay
+        self._models = {}    # path -> (modelo, mtime)
+        self._batchers = {}  # path -> BarBatcher
+
+    @staticmethod
+    def _load(path: Path):
+        import joblib  # Dependência pesada: só é importada quando um modelo é usado
+        return joblib.load(path, mmap_mode='r')
+
+    def get(self, path):
+        """Retorna o modelo carregado (carregando-o na primeira chamada) ou None se não existir."""
+        path = Path(path)
+        if path in self._models:
+            return self._models[path][0]
+        try:
+            mtime = os.path.getmtime(path)
+            model = self._load(path)
+        except FileNotFoundError:
+            logger.error(f"Modelo '{path}' não encontrado.")
+            return None
+        self._models[path] = (model, mtime)
+        logger.info(f"Modelo '{path.name}' carregado (compartilhado por todas as estratégias do processo).")
+        return model
+
+    async def reload_if_changed(self, path) -> bool:
+        """Recarrega o modelo se o arquivo foi modificado. A troca é atômica para os leitores."""
+        path = Path(path)
+        if path not in self._models:
+            return False
+        try:
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            return False
+        if mtime == self._models[path][1]:
+            return False
+        try:
+            model = await asyncio.to_thread(self._load, path)
+        except Exception as e:
+            logger.error(f"Falha ao recarregar o modelo '{path.name}'; mantendo a versão atual: {e}")
+            return False
+        self._models[path] = (model, mtime)
+        logger.info(f"Modelo '{path.name}' recarregado a quente.")
+        return True
+
+    async def watch(self, interval: float = 30.0):
+        """Loop de hot-reload para todos os modelos carregados."""
+        while True:
+            await asyncio.sleep(interval)
+            for path in list(self._models):
+                await self.reload_if_changed(path)
+
+    def _batcher(self, path: Path) -> BarBatcher:
+        batcher = self._batchers.get(path)
+        if batcher is None:
+            batcher = BarBatcher(
+                lambda rows, path=path: self._predict_batch(path, rows),
+                bar_seconds=self.bar_seconds, max_delay=self.max_delay,
+            )
+            self._batchers[path] = batcher
+        return batcher
+
+    async def predict_proba(self, path, features_row, bar_timestamp, key) -> float | None:
+        """
+        Probabilidade da classe positiva para uma linha de features. As linhas das
+        instâncias (`key`) para a mesma vela `bar_timestamp` são avaliadas em um único lote.
+        """
+        path = Path(path)
+        if self.get(path) is None:
+            return None
+        return await self._batcher(path).submit(bar_timestamp, key, np.asarray(features_row, dtype=np.float64))
+
+    def skip(self, path, bar_timestamp, key):
+        """Informa que a instância `key` não consultará o modelo na vela `bar_timestamp`."""
+        path = Path(path)
+        if path in self._models:
+            self._batcher(path).skip(bar_timestamp, key)
+
+    async def _predict_batch(self, path: Path, rows: list) -> list:
+        model = self._models[path][0]
+        matrix = np.vstack(rows)
+        # O modelo é compartilhado em memória: thread em vez de processo para evitar serializá-lo
+        probabilities = await asyncio.to_thread(model.predict_proba, matrix)
+        logger.info(f"Inferência em lote: {len(rows)} linhas em uma chamada para '{path.name}'.")
+        return [float(p) for p in probabilities[:, 1]]
+
+_model_server = None
+
+def get_model_server(platform_params: dict = None) -> ModelServer:
+    """Retorna o servidor de modelos do processo, criando-o na primeira chamada."""
+    global _model_server
+    if _model_server is None:
+        params = platform_params or {}
+        _model_server = ModelServer(max_delay=params.get("batch_max_delay", 30.0))
+    return _model_server
@@ -0,0 +1,199 @@
+# Pipeline de ordens com prioridade, prazos, retentativas idempotentes e pernas vinculadas
+import asyncio
+import itertools
+import logging
+import secrets
+import time
+import ccxt.async_support as ccxt
+from handlers.records import Order
+from handlers.metrics import get_metrics_registry
+
+logger = logging.getLogger("OrderPipeline")
+
+# Quanto menor o número, mais cedo a ordem é enviada
+PRIORITY_EXIT = 0   # Saídas e reduções de posição
+PRIORITY_HEDGE = 1  # Pernas de hedge / estratégias multi-perna
+PRIORITY_ENTRY = 2  # Novas entradas
+
+class OrderStatusUnknown(Exception):
+    """O envio falhou e não foi possível confirmar pelo clientOrderId se a ordem chegou à exchange."""
+    def __init__(self, client_order_id: str, message: str):
+        super().__init__(message)
+        self.client_order_id = client_order_id
+
+def new_client_order_id() -> str:
+    """ID de cliente de 128 bits em hexadecimal, no formato aceito pela Hyperliquid (cloid)."""
+    return "0x" + secrets.token_hex(16)
+
+class OrderPipeline:
+    """
+    Fila de prioridade para o envio de ordens. Saídas e hedges passam à frente de novas
+    entradas; cada requisição tem um prazo, e as retentativas reutilizam o mesmo
+    `clientOrderId`, de modo que uma ordem nunca é duplicada na exchange.
+
+    A fila pertence ao ExecutionHandler: a prioridade só ordena as estratégias que
+    compartilham a mesma conexão (a conta do pool ou o roteador do runtime
+    multiprocesso); handlers diferentes não se preemptam.
+    """
+    def __init__(self, execution_handler, workers: int = 4, default_timeout: float = 10.0,
+                 max_retries: int = 2, retry_backoff: float = 0.5, lookup_timeout: float = 5.0):
+        self.execution_handler = execution_handler
+        self.workers = workers
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # Orçamento próprio da consulta pelo clientOrderId: não sai do prazo do envio, que
+        # já pode ter se esgotado justamente quando a confirmação é mais necessária
+        self.lookup_timeout = lookup_timeout
+        self._queue = None
+        self._tasks = []
+        self._sequence = itertools.count()  # Desempate FIFO dentro da mesma prioridade
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def submit(self, symbol: str, side: str, amount: float, order_type: str = 'market',
+                     price: float = None, params: dict = None, priority: int = PRIORITY_ENTRY,
+                     timeout: float = None) -> Order:
+        """Enfileira uma ordem e aguarda a confirmação. Levanta exceção em caso de falha ou prazo esgotado."""
+        self._ensure_started()
+        params = dict(params or {})
+        params.setdefault('clientOrderId', new_client_order_id())
+        deadline = time.monotonic() + (timeout or self.default_timeout)
+        future = asyncio.get_running_loop().create_future()
+        request = (symbol, order_type, side, amount, price, params, deadline)
+        await self._queue.put((priority, next(self._sequence), request, future))
+        return await future
+
+    async def _worker(self):
+        while True:
+            _, _, request, future = await self._queue.get()
+            try:
+                if not future.done():
+                    future.set_result(await self._send(*request))
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, symbol, order_type, side, amount, price, params, deadline):
+        exchange = self.execution_handler.exchange
+        client_order_id = params['clientOrderId']
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"Prazo esgotado antes do envio da ordem {client_order_id} ({symbol}).")
+            try:
+                get_metrics_registry().count_request('create_order')
+                order = await asyncio.wait_for(
+                    exchange.create_order(symbol, order_type, side, amount, price, params), remaining
+                )
+                return Order.from_ccxt(order)
+            except (ccxt.NetworkError, asyncio.TimeoutError) as e:
+                # A ordem pode ter chegado à exchange: verificar pelo clientOrderId antes de reenviar
+                confirmed, existing = await self._lookup_client_id(symbol, client_order_id)
+                if existing:
+                    return existing
+                if not confirmed:
+                    # Reenviar sem saber se a primeira chegou arriscaria duplicar a ordem
+                    raise OrderStatusUnknown(
+                        client_order_id, f"Ordem {client_order_id} ({symbol}) em estado desconhecido após {e!r}."
+                    ) from e
+                attempt += 1
+                if attempt > self.max_retries or deadline - time.monotonic() <= 0:
+                    raise
+                logger.warning(f"Falha transitória ao enviar {client_order_id} ({symbol}): {e}. Retentativa {attempt}/{self.max_retries}.")
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+    async def _lookup_client_id(self, symbol: str, client_order_id: str) -> tuple[bool, Order | None]:
+        """
+        Procura a ordem pelo clientOrderId (com `lookup_timeout` próprio). Devolve
+        (confirmado, ordem): `confirmado` é False quando a consulta falhou ou esgotou o
+        tempo, ou seja, quando não se sabe se a ordem existe.
+        """
+        try:
+            get_metrics_registry().count_request('fetch_order')
+            order = await asyncio.wait_for(
+                self.execution_handler.exchange.fetch_order(None, symbol, {'clientOrderId': client_order_id}),
+                self.lookup_timeout,
+            )
+        except ccxt.OrderNotFound:
+            return True, None
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar a ordem {client_order_id} ({symbol}) pelo clientOrderId: {e!r}")
+            return False, None
+        return True, (Order.from_ccxt(order) if order else None)
+
+    async def submit_legs(self, legs: list, priority: int = PRIORITY_HEDGE, timeout: float = None) -> list[Order] | None:
+        """
+        Envia as pernas vinculadas concorrentemente (mesma prioridade e prazo). Se alguma
+        falhar, as demais são desfeitas com ordens reduce-only na prioridade de saída:
+
+        - pernas confirmadas: desfeitas pela quantidade executada;
+        - pernas que falharam: consultadas pelo clientOrderId, pois podem ter sido
+          executadas depois do prazo; as encontradas são canceladas (se ainda abertas)
+          e desfeitas pela quantidade executada;
+        - pernas em estado desconhecido (consulta sem resposta): desfeitas pela
+          quantidade total; reduce-only nunca abre uma posição nova.
+
+        Retorna as ordens de todas as pernas ou None.
+        """
+        legs = [
+            {**leg, 'params': {**(leg.get('params') or {}), 'clientOrderId': new_client_order_id()}}
+            for leg in legs
+        ]
+        results = await asyncio.gather(
+            *(self.submit(**leg, priority=priority, timeout=timeout) for leg in legs),
+            return_exceptions=True,
+        )
+        failed = [leg['symbol'] for leg, res in zip(legs, results) if isinstance(res, Exception) or not res]
+        if not failed:
+            return results
+
+        logger.error(f"Falha nas pernas {failed}. Desfazendo as pernas executadas ou em estado desconhecido.")
+        amounts = await asyncio.gather(*(self._executed_amount(leg, res) for leg, res in zip(legs, results)))
+        unwinds = []
+        for leg, res, amount in zip(legs, results, amounts):
+            if not amount:
+                continue
+            unwinds.append(self.submit(
+                symbol=leg['symbol'],
+                side='sell' if leg['side'] == 'buy' else 'buy',
+                amount=amount,
+                order_type='market',
+                price=(res.average if isinstance(res, Order) else None) or leg.get('price'),
+                params={'reduceOnly': True},
+                priority=PRIORITY_EXIT,
+            ))
+        for res in await asyncio.gather(*unwinds, return_exceptions=True):
+            if isinstance(res, Exception):
+                logger.critical(f"Falha ao desfazer perna executada: {res}. Verifique a posição manualmente.")
+        return None
+
+    async def _executed_amount(self, leg: dict, result) -> float:
+        """Quantidade a desfazer de uma perna, confirmada pelo clientOrderId quando ela falhou."""
+        if isinstance(result, Order):
+            return result.filled or leg['amount']
+        symbol, client_order_id = leg['symbol'], leg['params']['clientOrderId']
+        confirmed, order = await self._lookup_client_id(symbol, client_order_id)
+        if not confirmed:
+            logger.critical(f"Perna {client_order_id} ({symbol}) em estado desconhecido; desfazendo a quantidade total.")
+            return leg['amount']
+        if order is None:
+            return 0.0
+        if order.status == 'open':
+            await self.execution_handler.cancel_order(order.id, symbol)
+        if order.filled is not None:
+            return order.filled
+        return leg['amount'] if order.status == 'closed' else 0.0
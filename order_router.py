@@ -0,0 +1,196 @@
+# Roteamento centralizado de ordens entre processos
+import asyncio
+import itertools
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Apenas estes métodos do ExecutionHandler podem ser chamados remotamente
+ROUTED_METHODS = {
+    "setup_trading_environment",
+    "place_order",
+    "place_linked_orders",
+    "get_open_orders",
+    "get_order",
+    "cancel_order",
+    "get_fills",
+    "get_balance_usd",
+    "fetch_open_positions",
+    "get_open_positions",
+}
+
+_STOP = None  # Sentinela que encerra os loops de fila
+ROUTER_DOWN = "router-down"  # Publicada nas filas de resposta quando o processo roteador termina
+
+class OrderRouterClient:
+    """
+    Lado do processo de estratégia: envia chamadas para o roteador e resolve as
+    respostas. Uma única instância é compartilhada por todas as estratégias do processo.
+    Se o roteador termina (ou o cliente é encerrado), as chamadas pendentes e as
+    seguintes falham com ConnectionError em vez de aguardar para sempre.
+    """
+    def __init__(self, worker_id: int, request_queue, response_queue):
+        self.worker_id = worker_id
+        self.request_queue = request_queue
+        self.response_queue = response_queue
+        self._ids = itertools.count()
+        self._pending = {}
+        self._loop = None
+        self._listener = None
+        self._closed = None  # Motivo do encerramento, após o qual as chamadas falham
+
+    def start(self):
+        """Inicia a thread que recebe as respostas do roteador (idempotente)."""
+        if self._listener:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._listener = threading.Thread(target=self._listen, name=f"order-router-client-{self.worker_id}", daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        while True:
+            message = self.response_queue.get()
+            if message is _STOP or message == ROUTER_DOWN:
+                reason = "Roteador de ordens encerrado." if message == ROUTER_DOWN else "Cliente do roteador encerrado."
+                try:
+                    self._loop.call_soon_threadsafe(self._fail_pending, reason)
+                except RuntimeError:
+                    pass  # Event loop já fechado: não há chamadas a resolver
+                return
+            self._loop.call_soon_threadsafe(self._resolve, *message)
+
+    def _fail_pending(self, reason: str):
+        self._closed = reason
+        pending, self._pending = self._pending, {}
+        if pending:
+            logger.error(f"{reason} {len(pending)} chamadas pendentes canceladas.")
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(reason))
+
+    def _resolve(self, request_id, ok, value):
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def send(self, method: str, *args, **kwargs):
+        """Envia uma chamada sem aguardar resposta (ex.: atualizações de dados)."""
+        self.request_queue.put((self.worker_id, None, method, args, kwargs))
+
+    async def call(self, method: str, *args, **kwargs):
+        self.start()
+        if self._closed:
+            raise ConnectionError(self._closed)
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        self.request_queue.put((self.worker_id, request_id, method, args, kwargs))
+        return await future
+
+    def stop(self):
+        self.response_queue.put(_STOP)
+
+class RoutedExecutionHandler:
+    """Mesma interface do ExecutionHandler, mas as chamadas são executadas pelo roteador central."""
+    def __init__(self, client: OrderRouterClient):
+        self.client = client
+        self.exchange = None  # A conexão real pertence ao processo roteador
+
+    async def initialize(self):
+        self.client.start()
+
+    async def setup_trading_environment(self, symbol: str, leverage: int):
+        return await self.client.call("setup_trading_environment", symbol, leverage)
+
+    async def place_order(self, symbol: str, side: str, amount: float, order_type: str = 'market', price: float = None, params: dict = None,
+                          priority: int = None, timeout: float = None):
+        return await self.client.call("place_order", symbol, side, amount, order_type, price, params, priority=priority, timeout=timeout)
+
+    async def place_linked_orders(self, legs: list, priority: int = None, timeout: float = None):
+        kwargs = {"timeout": timeout} if priority is None else {"priority": priority, "timeout": timeout}
+        return await self.client.call("place_linked_orders", legs, **kwargs)
+
+    async def get_open_orders(self, symbol: str):
+        return await self.client.call("get_open_orders", symbol)
+
+    async def get_order(self, order_id: str, symbol: str):
+        return await self.client.call("get_order", order_id, symbol)
+
+    async def cancel_order(self, order_id: str, symbol: str) -> bool:
+        return await self.client.call("cancel_order", order_id, symbol)
+
+    async def get_fills(self, symbol: str, since: int = None, limit: int = None):
+        return await self.client.call("get_fills", symbol, since, limit)
+
+    async def get_balance_usd(self) -> float:
+        return await self.client.call("get_balance_usd")
+
+    async def fetch_open_positions(self):
+        return await self.client.call("fetch_open_positions")
+
+    async def get_open_positions(self):
+        return await self.client.call("get_open_positions")
+
+    async def close_connection(self):
+        """A conexão é compartilhada; o encerramento é feito pelo roteador."""
+
+async def serve_order_router(execution_handler, request_queue, response_queues: dict, store=None,
+                             positions_interval: float = 15.0, risk_engine=None):
+    """
+    Loop do processo roteador: executa as chamadas de todos os processos de
+    estratégia sobre uma única conexão, mantendo rate limit e estado de conta globais.
+    Se `store` for informado, também publica as posições abertas na memória compartilhada.
+    Se `risk_engine` for informado, atende as chamadas `risk.*` com o motor de portfólio global.
+    """
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+
+    async def handle(worker_id, request_id, method, args, kwargs):
+        try:
+            if method == "risk.submit" and risk_engine is not None:
+                result = (True, await risk_engine.submit(*args, **kwargs))
+            elif method == "risk.observe_close" and risk_engine is not None:
+                result = (True, risk_engine.observe_close(*args, **kwargs))
+            elif method == "risk.skip" and risk_engine is not None:
+                result = (True, risk_engine.skip(*args, **kwargs))
+            elif method in ROUTED_METHODS:
+                result = (True, await getattr(execution_handler, method)(*args, **kwargs))
+            else:
+                raise AttributeError(f"Método '{method}' não pode ser roteado.")
+        except Exception as e:
+            # Exceções da exchange nem sempre são serializáveis entre processos
+            result = (False, RuntimeError(f"{type(e).__name__}: {e}"))
+        if request_id is not None:
+            response_queues[worker_id].put((request_id, *result))
+
+    async def publish_positions():
+        while True:
+            try:
+                positions = await execution_handler.fetch_open_positions()
+                store.write_positions(positions)
+                if risk_engine is not None:
+                    risk_engine.sync_positions(positions)
+            except Exception as e:
+                logger.error(f"Erro ao publicar posições na memória compartilhada: {e}")
+            await asyncio.sleep(positions_interval)
+
+    positions_task = asyncio.create_task(publish_positions()) if store is not None else None
+    logger.info("Roteador de ordens pronto para receber requisições.")
+    try:
+        while True:
+            message = await loop.run_in_executor(None, request_queue.get)
+            if message is _STOP:
+                break
+            task = asyncio.create_task(handle(*message))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+    finally:
+        if positions_task:
+            positions_task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
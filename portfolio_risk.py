@@ -0,0 +1,193 @@
+# Risco no nível do portfólio: exposição agregada e limites ajustados por correlação
+import logging
+import numpy as np
+from handlers.micro_batcher import BarBatcher
+
+logger = logging.getLogger("PortfolioRisk")
+
+class PortfolioRiskEngine:
+    """
+    Mantém as exposições atuais (USD, com sinal) e uma matriz de covariância EWMA dos
+    retornos por vela em arrays NumPy, ambas atualizadas incrementalmente.
+
+    As ordens propostas na mesma vela por várias estratégias são avaliadas juntas
+    contra os limites de exposição bruta, líquida, por ativo e de volatilidade do
+    portfólio (que considera a correlação entre os ativos). Os limites são expressos
+    como múltiplos do patrimônio total (com o pool, a soma das contas).
+
+    `symbols` é o universo inicial; ativos fora dele (ex.: os escolhidos pelo screener
+    de reversão) são incluídos na primeira vez em que aparecem, para que suas
+    exposições contem nos limites bruto e líquido. A covariância de um ativo incluído
+    começa zerada e passa a ser estimada a partir das velas seguintes.
+    """
+    def __init__(self, symbols: list, params: dict):
+        self.symbols = list(symbols)
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+
+        self.max_gross_leverage = params.get("max_gross_leverage", 5.0)
+        self.max_net_leverage = params.get("max_net_leverage", 3.0)
+        self.max_asset_leverage = params.get("max_asset_leverage", 1.0)
+        self.max_portfolio_vol = params.get("max_portfolio_vol_daily", 0.05)
+        self.bars_per_day = params.get("bars_per_day", 288)
+        self.ewma_lambda = params.get("ewma_lambda", 0.97)
+        self.min_bars = params.get("min_bars", 30)
+
+        self.exposures = np.zeros(n)
+        self.covariance = np.zeros((n, n))
+        self.bars_observed = 0
+        self._last_close = np.full(n, np.nan)
+        self._last_seq = np.full(n, -1)      # Período (sequencial) do último fechamento de cada ativo
+        self._bar_close = np.full(n, np.nan)
+        self._bar_timestamp = None
+        self._bar_seq = 0
+
+        # Barreira por vela: o lote sai quando todas as instâncias se reportaram (submit/skip)
+        self._batcher = BarBatcher(
+            self._evaluate_batch,
+            bar_seconds=86400 // self.bars_per_day,
+            max_delay=params.get("batch_max_delay", 30.0),
+        )
+
+    # --- Atualizações incrementais ---
+
+    def _ensure(self, symbol: str) -> int:
+        """Devolve o índice do ativo, incluindo-o nos arrays se ainda não for acompanhado."""
+        i = self._index.get(symbol)
+        if i is not None:
+            return i
+        i = len(self.symbols)
+        self.symbols.append(symbol)
+        self._index[symbol] = i
+        self.exposures = np.append(self.exposures, 0.0)
+        self.covariance = np.pad(self.covariance, ((0, 1), (0, 1)))
+        self._last_close = np.append(self._last_close, np.nan)
+        self._last_seq = np.append(self._last_seq, -1)
+        self._bar_close = np.append(self._bar_close, np.nan)
+        logger.info(f"{symbol} incluído no risco de portfólio ({len(self.symbols)} ativos).")
+        return i
+
+    def observe_close(self, symbol: str, bar_timestamp, close: float):
+        """
+        Registra o fechamento de uma vela. Quando chega a primeira vela de um novo
+        período, o período anterior é consolidado na covariância (O(N²) por vela).
+        """
+        i = self._ensure(symbol)
+        if self._bar_timestamp is None:
+            self._bar_timestamp = bar_timestamp
+        elif bar_timestamp > self._bar_timestamp:
+            self._roll_bar()
+            self._bar_timestamp = bar_timestamp
+        elif bar_timestamp < self._bar_timestamp:
+            return  # Vela atrasada de um período já consolidado
+        self._bar_close[i] = close
+
+    def _roll_bar(self):
+        """
+        Consolida o período na covariância. Só entram os ativos com fechamento neste
+        período e no anterior: a submatriz deles é atualizada e as demais entradas ficam
+        intactas (um ativo sem observação não recebe retorno zero, que faria sua
+        variância decair artificialmente).
+        """
+        observed = np.isfinite(self._bar_close)
+        valid = np.flatnonzero(observed & np.isfinite(self._last_close) & (self._last_seq == self._bar_seq - 1))
+        if valid.size:
+            returns = np.log(self._bar_close[valid] / self._last_close[valid])
+            block = np.ix_(valid, valid)
+            lam = self.ewma_lambda
+            self.covariance[block] = lam * self.covariance[block] + (1 - lam) * np.outer(returns, returns)
+            self.bars_observed += 1
+        self._last_close[observed] = self._bar_close[observed]
+        self._last_seq[observed] = self._bar_seq
+        self._bar_seq += 1
+        self._bar_close[:] = np.nan
+
+    def set_exposure(self, symbol: str, notional_usd: float):
+        self.exposures[self._ensure(symbol)] = notional_usd
+
+    def sync_positions(self, positions: list):
+        """
+        Substitui as exposições pelas posições reais (chamado pelo reconciliador). Posições
+        do mesmo símbolo em contas diferentes são somadas.
+        """
+        for p in positions:
+            self._ensure(p.symbol)
+        exposures = np.zeros(len(self.symbols))
+        for p in positions:
+            exposures[self._index[p.symbol]] += p.signed_notional
+        self.exposures = exposures
+
+    # --- Avaliação em lote ---
+
+    def evaluate(self, symbols: list, notionals, equity: float) -> np.ndarray:
+        """
+        Avalia um lote de ordens (na ordem recebida) e devolve uma máscara de aprovação.
+
+        1. Ordens que violam sozinhas o limite por ativo são rejeitadas.
+        2. As demais são acumuladas em sequência (matriz lote x ativos) e é aprovado o
+           maior prefixo que respeita os limites bruto, líquido, por ativo e de volatilidade.
+        """
+        notionals = np.asarray(notionals, dtype=np.float64)
+        idx = np.array([self._ensure(s) for s in symbols], dtype=np.int64)
+        approved = np.zeros(len(notionals), dtype=bool)
+        if equity <= 0 or not len(notionals):
+            return approved
+
+        asset_limit = self.max_asset_leverage * equity
+        single_ok = np.abs(self.exposures[idx] + notionals) <= asset_limit
+        candidates = np.flatnonzero(single_ok)
+        if not len(candidates):
+            return approved
+
+        deltas = np.zeros((len(candidates), len(self.symbols)))
+        deltas[np.arange(len(candidates)), idx[candidates]] = notionals[candidates]
+        paths = self.exposures + np.cumsum(deltas, axis=0)  # Exposição após cada ordem
+
+        ok = np.abs(paths).sum(axis=1) <= self.max_gross_leverage * equity
+        ok &= np.abs(paths.sum(axis=1)) <= self.max_net_leverage * equity
+        ok &= (np.abs(paths) <= asset_limit).all(axis=1)
+        if self.bars_observed >= self.min_bars:
+            daily_var = np.einsum('kn,nm,km->k', paths, self.covariance, paths) * self.bars_per_day
+            ok &= np.sqrt(np.maximum(daily_var, 0.0)) <= self.max_portfolio_vol * equity
+
+        prefix = len(ok) if ok.all() else int(np.argmin(ok))
+        approved[candidates[:prefix]] = True
+        return approved
+
+    async def submit(self, symbol: str, notional_usd: float, equity: float, bar_timestamp) -> bool:
+        """
+        Envia uma ordem proposta para o lote da vela `bar_timestamp`. Se aprovada, a
+        exposição é reservada imediatamente; o reconciliador a substitui pela posição real depois.
+        """
+        return await self._batcher.submit(bar_timestamp, symbol, (symbol, notional_usd, equity))
+
+    def skip(self, symbol: str, bar_timestamp):
+        """Informa que `symbol` não proporá entradas na vela `bar_timestamp`."""
+        self._batcher.skip(bar_timestamp, symbol)
+
+    async def _evaluate_batch(self, items: list) -> list:
+        symbols = [symbol for symbol, _, _ in items]
+        notionals = [notional for _, notional, _ in items]
+        equity = items[-1][2]  # Patrimônio mais recente informado
+        approved = self.evaluate(symbols, notionals, equity)
+        for (symbol, notional, _), ok in zip(items, approved):
+            if ok:
+                self.exposures[self._index[symbol]] += notional
+        if not approved.all():
+            rejected = [s for s, ok in zip(symbols, approved) if not ok]
+            logger.warning(f"Limites de portfólio: {len(rejected)} de {len(items)} ordens rejeitadas ({', '.join(rejected)}).")
+        return [bool(ok) for ok in approved]
+
+class RoutedPortfolioRisk:
+    """Proxy do motor de risco para os processos de estratégia do runtime multiprocesso."""
+    def __init__(self, client):
+        self.client = client
+
+    def observe_close(self, symbol: str, bar_timestamp, close: float):
+        self.client.send("risk.observe_close", symbol, bar_timestamp, close)
+
+    async def submit(self, symbol: str, notional_usd: float, equity: float, bar_timestamp) -> bool:
+        return await self.client.call("risk.submit", symbol, notional_usd, equity, int(bar_timestamp))
+
+    def skip(self, symbol: str, bar_timestamp):
+        self.client.send("risk.skip", symbol, int(bar_timestamp))
@@ -0,0 +1,72 @@
+# Reconciliação centralizada de posições para todas as instâncias de estratégia
+import asyncio
+import logging
+
+logger = logging.getLogger("PositionReconciler")
+
+class PositionReconciler:
+    """
+    Consulta as posições da conta inteira uma única vez por ciclo e distribui as
+    transições de estado para os StateManagers das estratégias donas de cada símbolo.
+
+    Sem este componente, uma estratégia que entra em posição nunca volta para IDLE,
+    pois ninguém observa a execução do stop loss ou do take profit.
+    """
+    def __init__(self, execution_handler, interval: float = 15.0, grace_period: float = 60.0):
+        self.execution_handler = execution_handler
+        self.interval = interval          # Intervalo entre consultas (segundos)
+        self.grace_period = grace_period  # Tempo para uma ordem recém-enviada aparecer como posição
+        self._owners = {}                 # symbol -> lista de StateManagers
+        self.open_positions = {}          # symbol -> última Position recebida
+        self._listeners = []              # Callbacks que recebem a lista de posições a cada ciclo
+
+    def register(self, symbol: str, state_manager):
+        """Associa o StateManager de uma estratégia ao símbolo que ela opera."""
+        self._owners.setdefault(symbol, []).append(state_manager)
+        logger.info(f"Estratégia registrada no reconciliador para {symbol}.")
+
+    def add_listener(self, callback):
+        """Registra um callback chamado com as posições abertas após cada consulta bem-sucedida."""
+        self._listeners.append(callback)
+
+    def unregister(self, symbol: str, state_manager):
+        """Remove o StateManager de uma estratégia encerrada."""
+        owners = self._owners.get(symbol, [])
+        if state_manager in owners:
+            owners.remove(state_manager)
+        if not owners:
+            self._owners.pop(symbol, None)
+
+    async def reconcile_once(self) -> bool:
+        """Executa um ciclo de reconciliação. Retorna False se a consulta falhar."""
+        try:
+            positions = await self.execution_handler.fetch_open_positions()
+        except Exception as e:
+            # Em caso de erro não alteramos nenhum estado: uma lista vazia aqui
+            # faria todas as estratégias voltarem para IDLE indevidamente.
+            logger.error(f"Erro ao consultar posições para reconciliação: {e}")
+            return False
+
+        self.open_positions = {p.symbol: p for p in positions if p.symbol}
+        for callback in self._listeners:
+            callback(positions)
+
+        for symbol, owners in self._owners.items():
+            has_position = symbol in self.open_positions
+            for state_manager in owners:
+                if state_manager.state == "IN_POSITION" and not has_position:
+                    # Aguarda o período de carência antes de considerar a posição encerrada
+                    if state_manager.seconds_in_state >= self.grace_period:
+                        logger.info(f"Posição em {symbol} encerrada (stop/take profit). Rearmando a estratégia.")
+                        state_manager.set_idle()
+                elif state_manager.state == "IDLE" and has_position:
+                    logger.info(f"Posição existente detectada em {symbol}. Marcando a estratégia como IN_POSITION.")
+                    state_manager.set_in_position()
+        return True
+
+    async def run(self):
+        """Loop contínuo de reconciliação (uma requisição por ciclo para a conta inteira)."""
+        logger.info(f"Reconciliador de posições iniciado (intervalo de {self.interval:.0f}s).")
+        while True:
+            await self.reconcile_once()
+            await asyncio.sleep(self.interval)
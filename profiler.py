@@ -0,0 +1,309 @@
+# Profiling sob demanda do processo em execução (amostragem de pilhas ou cProfile)
+import argparse
+import asyncio
+import cProfile
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger("Profiler")
+
+# Separador entre estratégia e símbolo no nome das tasks (símbolos usam '/' e ':')
+TASK_TAG_SEPARATOR = "|"
+# Separadores dos rótulos de estratégias com vários símbolos ('A, B' e 'A / B')
+MULTI_SYMBOL_SEPARATOR = re.compile(r",\s*|\s+/\s+")
+
+def tag_current_task(instance):
+    """Nomeia a task atual como 'Estratégia|símbolo' para atribuir as amostras a ela."""
+    task = asyncio.current_task()
+    if task is not None:
+        task.set_name(f"{type(instance).__name__}{TASK_TAG_SEPARATOR}{instance.metrics.symbol or '-'}")
+
+def _task_tag(task) -> tuple:
+    if task is None:
+        return "event_loop", "-"
+    strategy, sep, symbol = task.get_name().partition(TASK_TAG_SEPARATOR)
+    return (strategy, symbol) if sep else ("outras_tasks", "-")
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_")
+
+class ProfilingSession:
+    """Parâmetros de uma sessão: modo ('sample' ou 'cprofile') e escopo opcional."""
+    __slots__ = ('mode', 'strategy', 'symbol', 'duration', 'started_at', 'source')
+
+    def __init__(self, mode: str = "sample", strategy: str = None, symbol: str = None,
+                 duration: float = None, source: str = "sinal"):
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"Modo de profiling inválido: '{mode}'. Use 'sample' ou 'cprofile'.")
+        self.mode = mode
+        self.strategy = strategy
+        self.symbol = symbol
+        self.duration = duration
+        self.started_at = time.time()
+        self.source = source
+
+    def matches(self, strategy: str, symbol: str) -> bool:
+        """
+        Compara a estratégia e o símbolo exatos. Instâncias com vários símbolos (grade,
+        pares) são incluídas quando o símbolo da sessão é um dos seus.
+        """
+        if self.strategy and strategy != self.strategy:
+            return False
+        return not self.symbol or self.symbol in MULTI_SYMBOL_SEPARATOR.split(symbol)
+
+    @property
+    def expired(self) -> bool:
+        return self.duration is not None and time.time() - self.started_at >= self.duration
+
+    @property
+    def label(self) -> str:
+        scope = "-".join(_slug(part) for part in (self.strategy, self.symbol) if part) or "processo"
+        return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))}-{self.mode}-{scope}-{os.getpid()}"
+
+class StackSampler:
+    """
+    Thread que amostra, a cada `interval`, a pilha da thread do event loop
+    (`sys._current_frames`) e a task asyncio em execução naquele instante. Cada amostra
+    é agregada como pilha "dobrada" (formato do flamegraph.pl / speedscope), prefixada
+    com a estratégia e o símbolo da task. Não instrumenta o código: o custo fica na
+    thread de amostragem e as tasks seguem rodando sem reinício.
+
+    A thread só obtém o GIL quando o loop o libera; enquanto amostra, o intervalo de troca
+    do GIL é reduzido para que trechos de CPU mais curtos que o padrão (5 ms) apareçam.
+    """
+    def __init__(self, loop, loop_thread_id: int, session: ProfilingSession, interval: float = 0.005):
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.session = session
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}  # code -> rótulo do frame
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._switch_interval = None
+
+    def start(self):
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 5))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _frame_label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            strategy, symbol = _task_tag(asyncio.current_task(self.loop))
+            if not self.session.matches(strategy, symbol):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.extend((symbol, strategy))
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class RuntimeProfiler:
+    """
+    Liga e desliga o profiling do processo sem reiniciar as estratégias.
+
+    - SIGUSR1 alterna a amostragem de pilhas de todo o processo; SIGUSR2 alterna uma
+      sessão cProfile de todo o processo.
+    - O arquivo de controle (JSON) permite escolher o modo e restringir a sessão a uma
+      estratégia e/ou símbolo, com duração opcional. A sessão começa quando o arquivo é
+      criado ou alterado e termina quando ele é removido ou a duração se esgota.
+
+    Saídas em `output_dir`: pilhas dobradas (`.folded`, para flamegraph.pl/speedscope)
+    na amostragem e estatísticas do cProfile (`.prof`, para snakeviz/flameprof).
+    """
+    def __init__(self, output_dir: str = "profiles", control_file: str = "profiles/control.json",
+                 sample_interval: float = 0.005, poll_interval: float = 1.0):
+        self.output_dir = Path(output_dir)
+        self.control_file = Path(control_file)
+        self.sample_interval = sample_interval
+        self.poll_interval = poll_interval
+        self.session = None
+        self._sampler = None
+        self._profile = None
+        self._profile_depth = 0
+        self._control_mtime = None
+        self._loop = None
+        self._loop_thread_id = None
+
+    # --- Sessões ---
+
+    def start(self, session: ProfilingSession):
+        if self.session:
+            self.stop()
+        self.session = session
+        if session.mode == "sample":
+            self._sampler = StackSampler(self._loop, self._loop_thread_id, session, self.sample_interval)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            if not session.strategy and not session.symbol:
+                # Sem escopo: perfila toda a thread do event loop (chamado a partir dela)
+                self._profile.enable()
+        scope = " / ".join(part for part in (session.strategy, session.symbol) if part) or "todo o processo"
+        logger.info(f"Profiling '{session.mode}' iniciado ({session.source}) para {scope}.")
+
+    def stop(self):
+        session = self.session
+        if session is None:
+            return
+        self.session = None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self._sampler:
+            self._sampler.stop()
+            path = self.output_dir / f"{session.label}.folded"
+            self._sampler.write(path)
+            logger.info(f"Profiling encerrado: {self._sampler.samples} amostras gravadas em '{path}'.")
+            self._sampler = None
+        elif self._profile:
+            self._profile.disable()
+            path = self.output_dir / f"{session.label}.prof"
+            self._profile.dump_stats(path)
+            logger.info(f"Profiling encerrado: estatísticas do cProfile gravadas em '{path}'.")
+            self._profile = None
+            self._profile_depth = 0
+
+    def toggle(self, mode: str):
+        if self.session:
+            self.stop()
+        else:
+            self.start(ProfilingSession(mode))
+
+    @contextmanager
+    def scope(self, instance):
+        """
+        Envolve o `process_tick` de uma instância: numa sessão cProfile com escopo, o
+        profiler fica ligado apenas enquanto um tick da estratégia/símbolo escolhido está
+        em andamento (outras tasks que rodarem nos seus `await` também são contadas).
+        """
+        profile, session = self._profile, self.session
+        if profile is None or not (session.strategy or session.symbol) or \
+                not session.matches(type(instance).__name__, instance.metrics.symbol or "-"):
+            yield
+            return
+        if self._profile_depth == 0:
+            profile.enable()
+        self._profile_depth += 1
+        try:
+            yield
+        finally:
+            # Se a sessão foi trocada durante o tick, a contagem já pertence ao novo profile
+            if self._profile is profile:
+                self._profile_depth -= 1
+                if self._profile_depth == 0:
+                    profile.disable()
+
+    # --- Controle ---
+
+    def _read_control_file(self):
+        try:
+            mtime = self.control_file.stat().st_mtime
+        except FileNotFoundError:
+            if self.session and self.session.source == "arquivo":
+                self.stop()
+            self._control_mtime = None
+            return
+        if mtime == self._control_mtime:
+            return
+        self._control_mtime = mtime
+        try:
+            command = json.loads(self.control_file.read_text(encoding='utf-8') or "{}")
+            session = ProfilingSession(
+                mode=command.get("mode", "sample"),
+                strategy=command.get("strategy"),
+                symbol=command.get("symbol"),
+                duration=command.get("duration"),
+                source="arquivo",
+            )
+        except (OSError, ValueError) as e:
+            logger.error(f"Arquivo de controle do profiler '{self.control_file}' inválido: {e}")
+            return
+        self.start(session)
+
+    async def run(self):
+        """Registra os sinais e acompanha o arquivo de controle e a duração das sessões."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        for signum, mode in ((getattr(signal, "SIGUSR1", None), "sample"), (getattr(signal, "SIGUSR2", None), "cprofile")):
+            if signum is None:
+                continue
+            try:
+                self._loop.add_signal_handler(signum, self.toggle, mode)
+            except (NotImplementedError, RuntimeError):
+                pass  # Sem suporte a sinais (Windows ou loop fora da thread principal)
+        try:
+            while True:
+                self._read_control_file()
+                if self.session and self.session.expired:
+                    self.stop()
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            self.stop()
+
+_profiler = None
+
+def get_runtime_profiler(platform_params: dict = None) -> RuntimeProfiler:
+    """Retorna o profiler do processo, criando-o na primeira chamada."""
+    global _profiler
+    if _profiler is None:
+        params = platform_params or {}
+        _profiler = RuntimeProfiler(
+            output_dir=params.get("profiling_dir", "profiles"),
+            control_file=params.get("profiling_control_file", "profiles/control.json"),
+            sample_interval=params.get("profiling_sample_interval", 0.005),
+        )
+    return _profiler
+
+def main():
+    """Inicia ou encerra uma sessão nos processos em execução via arquivo de controle."""
+    from config import PLATFORM_PARAMS
+    parser = argparse.ArgumentParser(description="Controla o profiler dos bots em execução.")
+    parser.add_argument("action", choices=["start", "stop"])
+    parser.add_argument("--mode", choices=["sample", "cprofile"], default="sample")
+    parser.add_argument("--strategy", help="Nome da classe da estratégia (ex.: TrendFollowingStrategy)")
+    parser.add_argument("--symbol", help="Símbolo a perfilar (ex.: ETH/USDC:USDC)")
+    parser.add_argument("--duration", type=float, help="Duração da sessão em segundos")
+    args = parser.parse_args()
+
+    control_file = Path(PLATFORM_PARAMS["profiling_control_file"])
+    if args.action == "stop":
+        control_file.unlink(missing_ok=True)
+        print(f"Sessão encerrada: '{control_file}' removido.")
+        return
+    control_file.parent.mkdir(parents=True, exist_ok=True)
+    command = {"mode": args.mode, "strategy": args.strategy, "symbol": args.symbol, "duration": args.duration}
+    control_file.write_text(json.dumps(command), encoding='utf-8')
+    print(f"Sessão solicitada em '{control_file}': {command}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# Registros compactos do domínio, convertidos uma única vez na borda da exchange
+import numpy as np
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def _float(value) -> float | None:
+    return None if value is None else float(value)
+
+def candles_to_frame(ohlcv):
+    """Converte linhas OHLCV (lista da exchange ou array) em um DataFrame."""
+    import pandas as pd
+
+    df = pd.DataFrame(ohlcv, columns=CANDLE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+class Record:
+    """
+    Base dos registros: atributos fixos em `__slots__` (sem `__dict__` por objeto),
+    igualdade por valor e serialização simples para logs e digests.
+    """
+    __slots__ = ()
+
+    def astuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Order(Record):
+    __slots__ = ('id', 'client_order_id', 'symbol', 'side', 'type', 'amount', 'price',
+                 'filled', 'average', 'status', 'timestamp')
+
+    def __init__(self, id, symbol: str, side: str, type: str, amount: float, price: float = None,
+                 client_order_id: str = None, filled: float = None, average: float = None,
+                 status: str = None, timestamp: int = None):
+        self.id = id
+        self.client_order_id = client_order_id
+        self.symbol = symbol
+        self.side = side
+        self.type = type
+        self.amount = amount
+        self.price = price
+        self.filled = filled
+        self.average = average
+        self.status = status
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_ccxt(cls, order: dict) -> 'Order':
+        return cls(
+            id=order.get('id'),
+            client_order_id=order.get('clientOrderId'),
+            symbol=order.get('symbol'),
+            side=order.get('side'),
+            type=order.get('type'),
+            amount=_float(order.get('amount')),
+            price=_float(order.get('price')),
+            filled=_float(order.get('filled')),
+            average=_float(order.get('average')),
+            status=order.get('status'),
+            timestamp=order.get('timestamp'),
+        )
+
+class Position(Record):
+    __slots__ = ('symbol', 'side', 'contracts', 'entry_price', 'notional', 'unrealized_pnl', 'leverage')
+
+    def __init__(self, symbol: str, side: str, contracts: float, entry_price: float = None,
+                 notional: float = None, unrealized_pnl: float = None, leverage: float = None):
+        self.symbol = symbol
+        self.side = side
+        self.contracts = contracts
+        self.entry_price = entry_price
+        self.notional = notional
+        self.unrealized_pnl = unrealized_pnl
+        self.leverage = leverage
+
+    @classmethod
+    def from_ccxt(cls, position: dict) -> 'Position':
+        return cls(
+            symbol=position.get('symbol'),
+            side=position.get('side'),
+            contracts=abs(float(position.get('contracts') or 0)),
+            entry_price=_float(position.get('entryPrice')),
+            notional=abs(float(position.get('notional') or 0)),
+            unrealized_pnl=_float(position.get('unrealizedPnl')),
+            leverage=_float(position.get('leverage')),
+        )
+
+    @property
+    def direction(self) -> int:
+        return -1 if self.side == 'short' else 1
+
+    @property
+    def signed_contracts(self) -> float:
+        return self.direction * self.contracts
+
+    @property
+    def signed_notional(self) -> float:
+        return self.direction * (self.notional or 0.0)
+
+class Fill(Record):
+    __slots__ = ('id', 'order_id', 'symbol', 'side', 'amount', 'price', 'fee', 'timestamp')
+
+    def __init__(self, id, order_id, symbol: str, side: str, amount: float, price: float,
+                 fee: float = 0.0, timestamp: int = None):
+        self.id = id
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.amount = amount
+        self.price = price
+        self.fee = fee
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_ccxt(cls, trade: dict) -> 'Fill':
+        return cls(
+            id=trade.get('id'),
+            order_id=trade.get('order'),
+            symbol=trade.get('symbol'),
+            side=trade.get('side'),
+            amount=float(trade.get('amount') or 0),
+            price=float(trade.get('price') or 0),
+            fee=float((trade.get('fee') or {}).get('cost') or 0),
+            timestamp=trade.get('timestamp'),
+        )
+
+class Quote(Record):
+    __slots__ = ('symbol', 'bid', 'ask', 'bid_size', 'ask_size', 'timestamp')
+
+    def __init__(self, symbol: str, bid: float, ask: float, bid_size: float = None,
+                 ask_size: float = None, timestamp: int = None):
+        self.symbol = symbol
+        self.bid = bid
+        self.ask = ask
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_order_book(cls, symbol: str, order_book: dict) -> 'Quote | None':
+        """Topo do livro de ordens; None se algum dos lados estiver vazio."""
+        if not order_book or not order_book.get('bids') or not order_book.get('asks'):
+            return None
+        best_bid, best_ask = order_book['bids'][0], order_book['asks'][0]
+        return cls(
+            symbol=symbol,
+            bid=float(best_bid[0]),
+            ask=float(best_ask[0]),
+            bid_size=_float(best_bid[1]) if len(best_bid) > 1 else None,
+            ask_size=_float(best_ask[1]) if len(best_ask) > 1 else None,
+            timestamp=order_book.get('timestamp'),
+        )
+
+    @property
+    def mid(self) -> float:
+        return (self.bid + self.ask) / 2
+
+class CandleBlock:
+    """
+    Velas OHLCV em um único array float64 (linhas x 6 colunas). As colunas são views
+    sem cópia; o DataFrame só é montado (`to_frame`) quando um indicador do pandas_ta
+    precisa dele, de preferência fora do event loop.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    @classmethod
+    def from_ohlcv(cls, ohlcv) -> 'CandleBlock':
+        return cls(np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS)))
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.data[:, 0]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.data[:, 4]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.data[:, 5]
+
+    def closed(self) -> 'CandleBlock':
+        """Velas já fechadas (sem a última, ainda em formação)."""
+        return CandleBlock(self.data[:-1])
+
+    def to_frame(self):
+        return candles_to_frame(self.data)
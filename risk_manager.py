@@ -4,11 +4,23 @@ import logging
 logger = logging.getLogger(__name__)
 
 class RiskManager:
-    def __init__(self, execution_handler, platform_params):
+    def __init__(self, execution_handler, platform_params, portfolio_risk=None):
         self.execution_handler = execution_handler
         self.platform_params = platform_params
+        self.portfolio_risk = portfolio_risk  # Motor de risco de portfólio compartilhado (opcional)
 
-    async def calculate_position_size(self, risk_per_trade: float, entry_price: float, stop_loss_price: float) -> float | None:
+    def observe_close(self, symbol: str, bar_timestamp, close: float):
+        """Alimenta o motor de risco de portfólio com o fechamento de uma vela."""
+        if self.portfolio_risk is not None:
+            self.portfolio_risk.observe_close(symbol, bar_timestamp, close)
+
+    def skip_bar(self, symbol: str, bar_timestamp):
+        """Libera a barreira do lote de risco da vela quando a instância não propõe entrada nela."""
+        if self.portfolio_risk is not None:
+            self.portfolio_risk.skip(symbol, bar_timestamp)
+
+    async def calculate_position_size(self, risk_per_trade: float, entry_price: float, stop_loss_price: float,
+                                      symbol: str = None, bar_timestamp=None) -> float | None:
         """Calcula o tamanho da posição com base no risco por trade (López de Prado)."""
         balance = await self.execution_handler.get_balance_usd()
         if balance <= 0:
@@ -29,6 +41,16 @@ class RiskManager:
         if position_value_usd < self.platform_params["min_entry_value_usd"]:
             logger.warning(f"Tamanho da posição calculado ({position_value_usd:.2f} USD) é menor que o mínimo de {self.platform_params['min_entry_value_usd']} USD.")
             return None
+
+        # Validação contra os limites agregados do portfólio (avaliada em lote com as demais entradas do candle).
+        # As exposições somam todas as contas do pool, então os limites usam o patrimônio total
+        if self.portfolio_risk is not None and symbol and bar_timestamp is not None:
+            signed_notional = position_value_usd if entry_price > stop_loss_price else -position_value_usd
+            account_pool = self.platform_params.get("account_pool")
+            equity = await account_pool.get_balance_usd() if account_pool else balance
+            if not await self.portfolio_risk.submit(symbol, signed_notional, equity, bar_timestamp):
+                logger.warning(f"Entrada em {symbol} ({position_value_usd:.2f} USD) rejeitada pelos limites de portfólio.")
+                return None
             
         logger.info(f"Cálculo de Posição: Balanço={balance:.2f} USD, Risco={risk_per_trade*100}%, Tamanho={position_size_asset:.4f} Ativo")
         return position_size_asset
\ No newline at end of file
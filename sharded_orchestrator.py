@@ -0,0 +1,258 @@
+# sharded_orchestrator.py
+
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+from rich.console import Console
+from rich.panel import Panel
+
+# Importações dos Módulos e Configurações
+from config import PLATFORM_PARAMS, STRATEGY_CONFIG, PORTFOLIO_ASSETS, PORTFOLIO_RISK_PARAMS, SHARDING_PARAMS
+
+logger = logging.getLogger("ShardedOrchestrator")
+console = Console()
+
+def market_data_requirements(strategy_key: str, params: dict, symbol: str = None) -> list:
+    """
+    Séries de candles (símbolo, timeframe, limite) que cada estratégia consome.
+    Precisa acompanhar as chamadas a `get_candles` feitas em `process_tick`.
+    """
+    if strategy_key == 'trend_following':
+        from strategies.trend_following import candles_required
+        return [(symbol, '5m', candles_required(params))]
+    if strategy_key == 'statistical_arbitrage':
+        return [(asset, '1m', params['lookback_period']) for asset in params['pair']]
+    return []
+
+def build_strategy_specs() -> list:
+    """Lista plana de instâncias a executar, no mesmo formato usado pelo main_orchestrator."""
+    specs = []
+    if STRATEGY_CONFIG['statistical_arbitrage']['enabled']:
+        specs.append({"key": 'statistical_arbitrage', "symbol": None})
+    if STRATEGY_CONFIG['trend_following']['enabled']:
+        specs.extend({"key": 'trend_following', "symbol": asset} for asset in PORTFOLIO_ASSETS)
+    if STRATEGY_CONFIG['mean_reversion']['enabled']:
+        # As instâncias de reversão são criadas pelo screener do universo em tempo de
+        # execução, o que o particionamento estático dos processos não comporta
+        logger.warning("'mean_reversion' está habilitada, mas não é suportada pelo runtime multiprocesso; "
+                       "use o main_orchestrator para executá-la.")
+    return specs
+
+def shard(specs: list, n_workers: int) -> list:
+    """Distribui as instâncias entre os processos em round-robin."""
+    return [specs[i::n_workers] for i in range(n_workers) if specs[i::n_workers]]
+
+def _setup_process_logging(name: str):
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"[%(asctime)s] %(levelname)-8s [{name}] [%(name)s] %(message)s",
+        handlers=[logging.FileHandler("trading_bot.log"), logging.StreamHandler()],
+    )
+
+def market_data_process(store_spec: dict, subscriptions: list, interval: float):
+    """Processo único que busca dados de mercado e os publica na memória compartilhada."""
+    from handlers.cadence import get_cadence_controller, get_endpoint_breakers
+    from handlers.execution_handler import ExecutionHandler
+    from handlers.market_data_recorder import MarketDataRecorder
+    from handlers.markets_cache import open_markets_cache
+    from handlers.shared_market_data import SharedMarketDataStore, publish_market_data
+    _setup_process_logging("market-data")
+
+    async def run():
+        store = SharedMarketDataStore.attach(store_spec)
+        markets_cache = open_markets_cache(PLATFORM_PARAMS)
+        handler = ExecutionHandler({**PLATFORM_PARAMS, "markets_cache": markets_cache})
+        recorder = MarketDataRecorder(PLATFORM_PARAMS["market_data_dir"]) if PLATFORM_PARAMS["record_market_data"] else None
+        try:
+            await handler.initialize()
+            # O roteador também atualiza o cache; quem acordar depois reaproveita o arquivo do outro
+            await asyncio.gather(
+                publish_market_data(
+                    handler.exchange, store, subscriptions, interval,
+                    recorder=recorder, breakers=get_endpoint_breakers(PLATFORM_PARAMS),
+                    cadence=get_cadence_controller(PLATFORM_PARAMS),
+                ),
+                markets_cache.run(),
+            )
+        finally:
+            await handler.close_connection()
+            store.close()
+            if recorder:
+                recorder.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+def order_router_process(store_spec: dict, request_queue, response_queues: dict):
+    """Processo único dono da conexão de execução: ordens, balanço e posições."""
+    from handlers.execution_handler import ExecutionHandler
+    from handlers.order_router import serve_order_router
+    from handlers.markets_cache import open_markets_cache
+    from handlers.portfolio_risk import PortfolioRiskEngine
+    from handlers.shared_market_data import SharedMarketDataStore
+    _setup_process_logging("order-router")
+
+    async def run():
+        store = SharedMarketDataStore.attach(store_spec)
+        markets_cache = open_markets_cache(PLATFORM_PARAMS)
+        handler = ExecutionHandler({**PLATFORM_PARAMS, "markets_cache": markets_cache})
+        try:
+            await handler.initialize()
+            refresh_task = asyncio.create_task(markets_cache.run())
+            try:
+                await serve_order_router(
+                    handler, request_queue, response_queues, store=store,
+                    positions_interval=PLATFORM_PARAMS["reconcile_interval"],
+                    risk_engine=PortfolioRiskEngine(PORTFOLIO_ASSETS, PORTFOLIO_RISK_PARAMS),
+                )
+            finally:
+                refresh_task.cancel()
+        finally:
+            await handler.close_connection()
+            store.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+def strategy_worker_process(worker_id: int, specs: list, store_spec: dict, request_queue, response_queue):
+    """Processo de estratégias: executa um shard de instâncias em seu próprio event loop."""
+    from handlers.compute_offload import LoopLagMonitor, get_compute_offloader
+    from handlers.model_server import get_model_server
+    from handlers.order_router import OrderRouterClient, RoutedExecutionHandler
+    from handlers.portfolio_risk import RoutedPortfolioRisk
+    from handlers.position_reconciler import PositionReconciler
+    from handlers.profiler import get_runtime_profiler
+    from handlers.shared_market_data import SharedMarketDataStore, SharedMemoryDataHandler
+    from strategies.strategy_registry import resolve_strategy
+    _setup_process_logging(f"worker-{worker_id}")
+    from main_orchestrator import run_strategy
+
+    async def run():
+        store = SharedMarketDataStore.attach(store_spec)
+        client = OrderRouterClient(worker_id, request_queue, response_queue)
+        platform_params = {
+            **PLATFORM_PARAMS,
+            "data_handler_factory": SharedMemoryDataHandler,
+            "shared_market_data": store,
+            "routed_execution_handler": RoutedExecutionHandler(client),
+            "portfolio_risk": RoutedPortfolioRisk(client),
+            # Os shards já ocupam os núcleos: um processo de cálculo por worker basta para
+            # tirar o pandas_ta do event loop sem multiplicar os processos
+            "compute_max_workers": 1,
+        }
+        # As posições chegam pela memória compartilhada: nenhuma requisição extra por processo
+        reconciler = PositionReconciler(
+            store,
+            interval=PLATFORM_PARAMS["reconcile_interval"],
+            grace_period=PLATFORM_PARAMS["reconcile_grace_period"],
+        )
+        tasks = [
+            run_strategy(
+                strategy_class=resolve_strategy(spec["key"], STRATEGY_CONFIG[spec["key"]]),
+                platform_params=platform_params,
+                strategy_params=STRATEGY_CONFIG[spec["key"]]['params'],
+                symbol=spec["symbol"],
+                reconciler=reconciler,
+            )
+            for spec in specs
+        ]
+        try:
+            await asyncio.gather(
+                reconciler.run(),
+                LoopLagMonitor(
+                    PLATFORM_PARAMS["loop_lag_target_ms"], offloader=get_compute_offloader(platform_params)
+                ).run(),
+                get_model_server(PLATFORM_PARAMS).watch(),
+                # Cada worker acompanha o arquivo de controle e grava seus próprios perfis
+                get_runtime_profiler(PLATFORM_PARAMS).run(),
+                *tasks,
+            )
+        finally:
+            client.stop()
+            store.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    """Cria a memória compartilhada, o publicador, o roteador e os processos de estratégia."""
+    from handlers.order_router import ROUTER_DOWN
+    from handlers.shared_market_data import SharedMarketDataStore
+
+    console.print(Panel(
+        "[bold magenta]Quant Nexus Architect[/bold magenta] - Runtime Multiprocesso para Hyperliquid",
+        title="[bold]Inicialização[/bold]",
+        border_style="cyan"
+    ))
+    _setup_process_logging("main")
+
+    specs = build_strategy_specs()
+    if not specs:
+        logger.error("Nenhuma estratégia foi habilitada no config.py. Encerrando.")
+        return
+
+    subscriptions = []
+    for spec in specs:
+        params = STRATEGY_CONFIG[spec["key"]]['params']
+        for sub in market_data_requirements(spec["key"], params, spec["symbol"]):
+            if sub not in subscriptions:
+                subscriptions.append(sub)
+    candle_keys = [(symbol, timeframe) for symbol, timeframe, _ in subscriptions]
+    symbols = list(dict.fromkeys(symbol for symbol, _ in candle_keys))
+    capacity = max([SHARDING_PARAMS["candle_capacity"]] + [limit for _, _, limit in subscriptions])
+
+    n_workers = SHARDING_PARAMS["workers"] or max(1, (os.cpu_count() or 1) - 2)
+    shards = shard(specs, n_workers)
+
+    ctx = mp.get_context("spawn")
+    store = SharedMarketDataStore.create(candle_keys, symbols, capacity)
+    request_queue = ctx.Queue()
+    response_queues = {worker_id: ctx.Queue() for worker_id in range(len(shards))}
+
+    processes = [
+        ctx.Process(target=market_data_process, name="market-data",
+                    args=(store.spec, subscriptions, SHARDING_PARAMS["market_data_interval"])),
+        ctx.Process(target=order_router_process, name="order-router",
+                    args=(store.spec, request_queue, response_queues)),
+    ]
+    processes += [
+        ctx.Process(target=strategy_worker_process, name=f"worker-{worker_id}",
+                    args=(worker_id, shard_specs, store.spec, request_queue, response_queues[worker_id]))
+        for worker_id, shard_specs in enumerate(shards)
+    ]
+
+    console.print(
+        f"Iniciando [bold green]{len(specs)}[/bold green] instâncias em "
+        f"[bold green]{len(shards)}[/bold green] processos de estratégia...\n"
+    )
+    try:
+        for process in processes:
+            process.start()
+        router = processes[1]
+        router.join()
+        # Sem o roteador, nenhuma chamada dos workers seria respondida: os clientes
+        # falham as chamadas pendentes em vez de aguardar para sempre
+        logger.critical(f"Roteador de ordens encerrado (código {router.exitcode}); avisando os processos de estratégia.")
+        for queue in response_queues.values():
+            queue.put(ROUTER_DOWN)
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        logger.info("Desligamento solicitado pelo usuário.")
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        store.close()
+        console.print(Panel("[bold]Sistema encerrado.[/bold]", title="[bold]Shutdown[/bold]", border_style="red"))
+
+if __name__ == "__main__":
+    main()
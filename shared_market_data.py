@@ -0,0 +1,274 @@
+# Dados de mercado em memória compartilhada para o runtime multiprocesso
+import asyncio
+import itertools
+import logging
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from handlers.data_handler import DataHandler, TRANSIENT_ERRORS
+from handlers.cadence import get_cadence_controller, get_endpoint_breakers
+from handlers.records import CANDLE_COLUMNS, CandleBlock, Position, Quote
+
+logger = logging.getLogger(__name__)
+
+CANDLE_FIELDS = len(CANDLE_COLUMNS)
+
+class SharedMarketDataStore:
+    """
+    Armazena candles, preços e posições em blocos de memória compartilhada.
+
+    Cada linha possui um contador de sequência (seqlock): o único processo escritor
+    torna o contador ímpar durante a escrita e par ao terminar. Os leitores copiam os
+    dados e repetem a leitura se o contador mudou, sem nenhum lock entre processos.
+    """
+    READ_SPINS = 100        # Tentativas imediatas antes de começar a ceder o event loop
+    READ_MAX_WAIT = 0.01    # Espera máxima (s) por uma leitura consistente
+
+    def __init__(self, spec: dict, blocks: dict, owner: bool):
+        self.spec = spec
+        self._blocks = blocks
+        self._owner = owner
+        self._candle_index = {tuple(key): i for i, key in enumerate(spec["candle_keys"])}
+        self._symbol_index = {symbol: i for i, symbol in enumerate(spec["symbols"])}
+
+        n_keys, n_symbols, capacity = len(spec["candle_keys"]), len(spec["symbols"]), spec["capacity"]
+        self.candles = np.ndarray((n_keys, capacity, CANDLE_FIELDS), dtype=np.float64, buffer=blocks["candles"].buf)
+        self.candle_meta = np.ndarray((n_keys, 2), dtype=np.int64, buffer=blocks["candle_meta"].buf)  # [seq, count]
+        self.prices = np.ndarray((n_symbols, 2), dtype=np.float64, buffer=blocks["prices"].buf)        # [mid, recv_ts]
+        self.positions = np.ndarray((n_symbols,), dtype=np.float64, buffer=blocks["positions"].buf)    # contratos (com sinal)
+        self.price_seq = np.ndarray((n_symbols,), dtype=np.int64, buffer=blocks["price_seq"].buf)
+        self.positions_meta = np.ndarray((2,), dtype=np.int64, buffer=blocks["positions_meta"].buf)    # [seq, atualizado_em_ms]
+
+    @classmethod
+    def create(cls, candle_keys: list, symbols: list, capacity: int):
+        """Cria os blocos de memória compartilhada (chamado pelo processo principal)."""
+        candle_keys = [tuple(key) for key in candle_keys]
+        sizes = {
+            "candles": max(1, len(candle_keys)) * capacity * CANDLE_FIELDS * 8,
+            "candle_meta": max(1, len(candle_keys)) * 2 * 8,
+            "prices": max(1, len(symbols)) * 2 * 8,
+            "positions": max(1, len(symbols)) * 8,
+            "price_seq": max(1, len(symbols)) * 8,
+            "positions_meta": 2 * 8,
+        }
+        blocks = {name: shared_memory.SharedMemory(create=True, size=size) for name, size in sizes.items()}
+        for block in blocks.values():
+            block.buf[:] = b"\x00" * block.size
+        spec = {
+            "candle_keys": candle_keys,
+            "symbols": list(symbols),
+            "capacity": capacity,
+            "blocks": {name: block.name for name, block in blocks.items()},
+        }
+        logger.info(f"Memória compartilhada criada: {len(candle_keys)} séries de candles, {len(symbols)} símbolos.")
+        return cls(spec, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, spec: dict):
+        """Conecta-se a blocos já existentes (chamado pelos processos filhos)."""
+        blocks = {name: shared_memory.SharedMemory(name=block_name) for name, block_name in spec["blocks"].items()}
+        return cls(spec, blocks, owner=False)
+
+    def close(self):
+        """Libera os mapeamentos locais e, no processo dono, remove os blocos."""
+        for block in self._blocks.values():
+            block.close()
+            if self._owner:
+                block.unlink()
+
+    # --- Escrita (processo publicador / roteador de ordens) ---
+
+    def write_candles(self, symbol: str, timeframe: str, ohlcv: list):
+        i = self._candle_index.get((symbol, timeframe))
+        if i is None or not ohlcv:
+            return
+        rows = np.asarray(ohlcv, dtype=np.float64)[-self.spec["capacity"]:]
+        meta = self.candle_meta[i]
+        meta[0] += 1
+        self.candles[i, :len(rows)] = rows
+        meta[1] = len(rows)
+        meta[0] += 1
+
+    def write_price(self, symbol: str, mid_price: float):
+        i = self._symbol_index.get(symbol)
+        if i is None:
+            return
+        self.price_seq[i] += 1
+        self.prices[i] = (mid_price, time.time())
+        self.price_seq[i] += 1
+
+    def write_positions(self, positions: list):
+        """Publica as posições abertas da conta (contratos com sinal por símbolo)."""
+        contracts = np.zeros(len(self._symbol_index), dtype=np.float64)
+        for p in positions:
+            i = self._symbol_index.get(p.symbol)
+            if i is not None:
+                contracts[i] = p.signed_contracts
+        self.positions_meta[0] += 1
+        self.positions[:] = contracts
+        self.positions_meta[1] = int(time.time() * 1000)
+        self.positions_meta[0] += 1
+
+    # --- Leitura (processos de estratégia) ---
+
+    @classmethod
+    async def _consistent_read(cls, seq_view, index, reader):
+        """
+        Lê uma linha protegida pelo seqlock. Após `READ_SPINS` tentativas imediatas, cada
+        nova tentativa cede o event loop (sem bloquear as demais tasks do processo) e a
+        leitura desiste em `READ_MAX_WAIT` segundos, devolvendo None: o escritor pode ter
+        parado no meio de uma escrita.
+        """
+        deadline = None
+        for attempt in itertools.count():
+            before = int(seq_view[index])
+            if not before % 2:
+                value = reader()
+                if int(seq_view[index]) == before:
+                    return value
+            if attempt < cls.READ_SPINS:
+                continue
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + cls.READ_MAX_WAIT
+            elif now >= deadline:
+                logger.warning("Leitura inconsistente na memória compartilhada (escrita não concluída); dado ignorado.")
+                return None
+            await asyncio.sleep(0)
+
+    async def read_candles(self, symbol: str, timeframe: str, limit: int):
+        """Retorna as últimas `limit` velas como array (linhas OHLCV) ou None."""
+        i = self._candle_index.get((symbol, timeframe))
+        if i is None:
+            return None
+        meta = self.candle_meta[i]
+
+        def reader():
+            count = int(meta[1])
+            return self.candles[i, max(0, count - limit):count].copy()
+
+        rows = await self._consistent_read(meta, 0, reader)
+        return rows if rows is not None and len(rows) else None
+
+    async def read_price(self, symbol: str):
+        i = self._symbol_index.get(symbol)
+        if i is None:
+            return None
+        row = await self._consistent_read(self.price_seq, i, lambda: tuple(self.prices[i]))
+        return (row[0] or None) if row else None
+
+    async def fetch_open_positions(self):
+        """Mesma interface do ExecutionHandler, servida a partir da memória compartilhada."""
+        if not self.positions_meta[1]:
+            raise RuntimeError("Posições ainda não publicadas pelo roteador de ordens.")
+        contracts = await self._consistent_read(self.positions_meta, 0, lambda: self.positions.copy())
+        if contracts is None:
+            raise RuntimeError("Leitura das posições na memória compartilhada não concluída.")
+        return [
+            Position(symbol, 'long' if c > 0 else 'short', abs(float(c)))
+            for symbol, c in zip(self.spec["symbols"], contracts) if c != 0
+        ]
+
+class SharedMemoryDataHandler(DataHandler):
+    """
+    DataHandler usado pelos processos de estratégia: lê candles e preços da memória
+    compartilhada e envia as chamadas de execução para o roteador central de ordens.
+    """
+    def __init__(self, platform_params):
+        self.store = platform_params["shared_market_data"]
+        self.execution_handler = platform_params["routed_execution_handler"]
+        self.cadence = get_cadence_controller(platform_params)
+        self.polled_symbols = set()
+
+    async def get_candles(self, symbol: str, timeframe: str = '1m', limit: int = 100) -> CandleBlock | None:
+        self.polled_symbols.add(symbol)
+        rows = await self.store.read_candles(symbol, timeframe, limit)
+        if rows is None:
+            logger.warning(f"Sem candles publicados para {symbol} ({timeframe}) na memória compartilhada.")
+            return None
+        candles = CandleBlock(rows)
+        self.cadence.observe_candles(symbol, candles)
+        return candles
+
+    async def get_current_price(self, symbol: str) -> float | None:
+        self.polled_symbols.add(symbol)
+        price = await self.store.read_price(symbol)
+        if price is None:
+            logger.warning(f"Sem preço publicado para {symbol} na memória compartilhada.")
+        else:
+            self.cadence.observe_price(symbol, price)
+        return price
+
+async def publish_market_data(exchange, store: SharedMarketDataStore, subscriptions: list, interval: float,
+                              max_concurrency: int = 4, recorder=None, breakers=None, cadence=None):
+    """
+    Loop do processo de dados de mercado: uma única conexão busca todas as séries
+    assinadas e os preços de todos os símbolos e publica na memória compartilhada.
+    Se `recorder` for informado, cada resposta também é gravada para replay.
+    Endpoints com falhas seguidas entram em backoff (ver CircuitBreaker).
+
+    Se `cadence` for informado, cada símbolo é consultado no intervalo definido pela
+    sua atividade (ver CadenceController), nunca abaixo de `interval`; sem ele, todos
+    os símbolos são consultados a cada `interval`.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    breakers = breakers or get_endpoint_breakers()
+
+    async def guarded(endpoint, fetch, *args, **kwargs):
+        breaker = breakers.get(endpoint)
+        if not breaker.allow():
+            return None
+        try:
+            result = await fetch(*args, **kwargs)
+        except TRANSIENT_ERRORS:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+    async def refresh_candles(symbol, timeframe, limit):
+        async with semaphore:
+            try:
+                ohlcv = await guarded('fetch_ohlcv', exchange.fetch_ohlcv, symbol, timeframe, limit=limit)
+                if ohlcv is None:
+                    return
+                if recorder:
+                    recorder.record('ohlcv', symbol, {'timeframe': timeframe, 'limit': limit}, ohlcv)
+                store.write_candles(symbol, timeframe, ohlcv)
+                if cadence:
+                    cadence.observe_candles(symbol, CandleBlock.from_ohlcv(ohlcv))
+            except Exception as e:
+                logger.error(f"Erro ao publicar candles de {symbol} ({timeframe}): {e}")
+
+    async def refresh_price(symbol):
+        async with semaphore:
+            try:
+                order_book = await guarded('fetch_order_book', exchange.fetch_order_book, symbol, limit=1)
+                if order_book is None:
+                    return
+                if recorder:
+                    recorder.record('order_book', symbol, {'limit': 1}, order_book)
+                quote = Quote.from_order_book(symbol, order_book)
+                if quote:
+                    store.write_price(symbol, quote.mid)
+                    if cadence:
+                        cadence.observe_price(symbol, quote.mid)
+            except Exception as e:
+                logger.error(f"Erro ao publicar preço de {symbol}: {e}")
+
+    symbols = list(dict.fromkeys([*store.spec["symbols"], *(symbol for symbol, _, _ in subscriptions)]))
+    price_symbols = set(store.spec["symbols"])
+    next_due = dict.fromkeys(symbols, 0.0)  # symbol -> instante (monotônico) da próxima consulta
+
+    while True:
+        started = time.monotonic()
+        due = {symbol for symbol in symbols if next_due[symbol] <= started}
+        await asyncio.gather(
+            *(refresh_candles(*sub) for sub in subscriptions if sub[0] in due),
+            *(refresh_price(symbol) for symbol in due if symbol in price_symbols),
+        )
+        now = time.monotonic()
+        for symbol in due:
+            next_due[symbol] = now + (max(interval, cadence.next_interval(symbol)) if cadence else interval)
+        logger.info(f"Dados de mercado de {len(due)}/{len(symbols)} símbolos publicados em {now - started:.2f}s.")
+        await asyncio.sleep(max(0.0, min(next_due.values(), default=now + interval) - time.monotonic()))
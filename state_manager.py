@@ -1,25 +1,34 @@
 # Controle de estado (ocioso, em posição)
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class StateManager:
     def __init__(self):
         self._state = "IDLE"  # Estado inicial
+        self._changed_at = time.monotonic()  # Momento da última transição
         logger.info(f"StateManager iniciado no estado: {self._state}")
 
     @property
     def state(self):
         return self._state
 
+    @property
+    def seconds_in_state(self) -> float:
+        """Tempo (em segundos) desde a última transição de estado."""
+        return time.monotonic() - self._changed_at
+
     def set_in_position(self):
         """Define o estado para indicar que uma posição está aberta."""
         if self._state != "IN_POSITION":
             self._state = "IN_POSITION"
+            self._changed_at = time.monotonic()
             logger.info("Estado alterado para: IN_POSITION")
 
     def set_idle(self):
         """Define o estado para ocioso, pronto para buscar novas entradas."""
         if self._state != "IDLE":
             self._state = "IDLE"
-            logger.info("Estado alterado para: IDLE")
\ No newline at end of file
+            self._changed_at = time.monotonic()
+            logger.info("Estado alterado para: IDLE")
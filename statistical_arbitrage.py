@@ -2,12 +2,24 @@
 
 import logging
 import asyncio
-import pandas as pd
 import numpy as np
 from .base_strategy import BaseStrategy
 
 logger = logging.getLogger("StatisticalArbitrage")
 
+def compute_spread_statistics(close_a: np.ndarray, close_b: np.ndarray, lookback_period: int) -> tuple[float, float, float]:
+    """
+    Calcula o spread atual e a média/desvio padrão do spread na janela mais recente.
+    Função pura de CPU, executada fora do event loop via `BaseStrategy.offload`.
+    """
+    # O spread é a razão entre os preços, uma abordagem comum para ativos de cripto
+    n = min(len(close_a), len(close_b))
+    spread = close_a[-n:] / close_b[-n:]
+    if n < lookback_period:
+        return spread[-1], np.nan, np.nan
+    window = spread[-lookback_period:]
+    return spread[-1], window.mean(), window.std(ddof=1)
+
 class StatisticalArbitrageStrategy(BaseStrategy):
     """
     Estratégia de Arbitragem Estatística (Pairs Trading) baseada em Z-score.
@@ -19,7 +31,8 @@ class StatisticalArbitrageStrategy(BaseStrategy):
         self.lookback_period = self.params['lookback_period']
         self.z_score_threshold = self.params['z_score_threshold']
         self.exit_z_score = self.params['exit_z_score']
-        self.historical_data = {self.pair[0]: pd.DataFrame(), self.pair[1]: pd.DataFrame()}
+        self.metrics.symbol = f"{self.pair[0]} / {self.pair[1]}"
+        self.historical_data = {self.pair[0]: None, self.pair[1]: None}  # symbol -> CandleBlock
 
         logger.info(f"Estratégia de Arbitragem Estatística iniciada para o par: {self.pair}")
 
@@ -33,38 +46,43 @@ class StatisticalArbitrageStrategy(BaseStrategy):
 
         for i, res in enumerate(results):
             asset = self.pair[i]
-            if isinstance(res, Exception) or res is None or res.empty:
+            if isinstance(res, Exception) or res is None or not len(res):
                 logger.error(f"Não foi possível obter dados históricos para {asset}. A estratégia não pode continuar.")
                 return False
             self.historical_data[asset] = res
         return True
 
-    def calculate_spread(self) -> pd.Series:
+    def calculate_spread(self) -> np.ndarray:
         """Calcula o spread de preços entre os dois ativos."""
-        close_a = self.historical_data[self.pair[0]]['close']
-        close_b = self.historical_data[self.pair[1]]['close']
+        close_a = self.historical_data[self.pair[0]].close
+        close_b = self.historical_data[self.pair[1]].close
+        n = min(len(close_a), len(close_b))
         # O spread é a razão entre os preços, uma abordagem comum para ativos de cripto
-        spread = close_a / close_b
+        spread = close_a[-n:] / close_b[-n:]
         return spread
 
     async def process_tick(self):
         """Analisa o Z-score do spread e gera sinais de negociação."""
         # 1. Garantir que temos dados históricos suficientes
-        if len(self.historical_data[self.pair[0]]) < self.lookback_period:
+        data_a = self.historical_data[self.pair[0]]
+        if data_a is None or len(data_a) < self.lookback_period:
             if not await self.fetch_historical_data():
                 return # Aguarda o próximo ciclo se os dados não puderem ser carregados
 
-        # 2. Calcular o spread e o Z-score
-        spread = self.calculate_spread()
-        mean_spread = spread.rolling(window=self.lookback_period).mean().iloc[-1]
-        std_spread = spread.rolling(window=self.lookback_period).std().iloc[-1]
+        # 2. Calcular o spread e o Z-score (fora do event loop)
+        current_spread, mean_spread, std_spread = await self.offload(
+            compute_spread_statistics,
+            self.historical_data[self.pair[0]].close,
+            self.historical_data[self.pair[1]].close,
+            self.lookback_period,
+        )
 
         if std_spread == 0:
             logger.warning("Desvio padrão do spread é zero. Impossível calcular Z-score.")
             return
 
-        current_spread = spread.iloc[-1]
         z_score = (current_spread - mean_spread) / std_spread
+        self.metrics.set_indicators(z=z_score, spread=current_spread)
 
         logger.info(
             f"Análise de Pares ({self.pair[0]} / {self.pair[1]}): "
@@ -79,12 +97,14 @@ class StatisticalArbitrageStrategy(BaseStrategy):
             # Z-score alto: Spread está caro. Vender o spread (Vender A, Comprar B)
             if z_score > self.z_score_threshold:
                 logger.info(f"SINAL DE VENDA (SHORT SPREAD): Z-score ({z_score:.4f}) > Limiar ({self.z_score_threshold})")
+                self.metrics.record_signal('SHORT SPREAD')
                 # Lógica de execução de ordem de venda aqui
                 # self.state_manager.set_in_position("SHORT_SPREAD")
 
             # Z-score baixo: Spread está barato. Comprar o spread (Comprar A, Vender B)
             elif z_score < -self.z_score_threshold:
                 logger.info(f"SINAL DE COMPRA (LONG SPREAD): Z-score ({z_score:.4f}) < Limiar (-{self.z_score_threshold})")
+                self.metrics.record_signal('LONG SPREAD')
                 # Lógica de execução de ordem de compra aqui
                 # self.state_manager.set_in_position("LONG_SPREAD")
 
@@ -0,0 +1,33 @@
+# Registro de estratégias resolvidas sob demanda
+import importlib
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger("StrategyRegistry")
+
+@lru_cache(maxsize=None)
+def import_class(path: str):
+    """Importa uma classe a partir do caminho pontilhado 'pacote.modulo.Classe'."""
+    module_name, _, class_name = path.rpartition('.')
+    if not module_name:
+        raise ValueError(f"Caminho de classe inválido: '{path}'.")
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, class_name)
+    except AttributeError:
+        raise ImportError(f"Classe '{class_name}' não encontrada em '{module_name}'.") from None
+
+def resolve_strategy(key: str, config: dict):
+    """
+    Devolve a classe de uma entrada de configuração. `class` (a única fonte do
+    mapeamento, em config.py) pode ser a própria classe ou um caminho pontilhado; os
+    módulos, e suas dependências pesadas como pandas_ta e joblib, só são importados
+    quando a estratégia é usada.
+    """
+    target = config.get('class')
+    if target is None:
+        raise KeyError(f"Estratégia '{key}' sem 'class' definida no config.py.")
+    if isinstance(target, str):
+        target = import_class(target)
+        logger.debug(f"Estratégia '{key}' resolvida para {target.__module__}.{target.__name__}.")
+    return target
@@ -0,0 +1,22 @@
+from handlers.account_pool import sum_positions
+from handlers.records import Position
+
+def test_positions_of_the_same_symbol_are_summed_across_accounts():
+    merged = sum_positions([
+        Position('BTC', 'long', 1.0, entry_price=100.0, notional=100.0, unrealized_pnl=5.0),
+        Position('BTC', 'long', 3.0, entry_price=200.0, notional=600.0, unrealized_pnl=-1.0),
+        Position('ETH', 'short', 2.0, notional=50.0),
+    ])
+    btc = merged['BTC']
+    assert (btc.side, btc.contracts, btc.notional, btc.unrealized_pnl) == ('long', 4.0, 700.0, 4.0)
+    assert btc.entry_price == 175.0
+    assert merged['ETH'].signed_notional == -50.0
+
+def test_opposite_positions_net_out():
+    merged = sum_positions([
+        Position('BTC', 'long', 1.0, entry_price=100.0, notional=100.0),
+        Position('BTC', 'short', 3.0, entry_price=110.0, notional=330.0),
+    ])
+    assert merged['BTC'].signed_contracts == -2.0
+    assert merged['BTC'].signed_notional == -230.0
+    assert merged['BTC'].entry_price is None
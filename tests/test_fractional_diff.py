@@ -0,0 +1,26 @@
+import numpy as np
+from handlers.fractional_diff import FFDState, frac_diff_ffd
+
+def prices(n=400, seed=3):
+    return 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.01, n)))
+
+def test_incremental_state_matches_the_batch_series():
+    series = np.log(prices())
+    state = FFDState(0.4, threshold=1e-3)
+    incremental = [state.update(value) for value in series]
+    expected = frac_diff_ffd(series, 0.4, threshold=1e-3)
+
+    warmup = state.width - 1
+    assert all(value is None for value in incremental[:warmup])
+    assert np.isnan(expected[:warmup]).all()
+    np.testing.assert_allclose(incremental[warmup:], expected[warmup:], rtol=1e-10)
+
+def test_peek_and_backfill_agree_with_update():
+    series = np.log(prices())
+    state = FFDState(0.4, threshold=1e-3)
+    backfilled = state.backfill(series[:-1])
+    np.testing.assert_allclose(backfilled, frac_diff_ffd(series[:-1], 0.4, threshold=1e-3))
+
+    peeked = state.peek(series[-1])
+    assert peeked == state.update(series[-1])
+    assert np.isclose(peeked, frac_diff_ffd(series, 0.4, threshold=1e-3)[-1])
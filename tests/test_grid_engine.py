@@ -0,0 +1,38 @@
+from handlers.grid_engine import GridBook, BUY, SELL, NONE
+
+def make_book(levels=3):
+    book = GridBook('BTC', anchor_price=100.0, step=1.0, levels=levels, amount=1.0)
+    for k, side in book.initial_orders():
+        book.assign(k, side, f"o{k}")
+    return book
+
+def test_multiple_fills_in_one_sync_do_not_depend_on_arrival_order():
+    for order in (['o-2', 'o-1'], ['o-1', 'o-2']):
+        book = make_book()
+        actions = book.on_closed([(order_id, None) for order_id in order])
+        # Compra em -2 -> venda em -1 (liberado pela execução de -1); compra em -1 -> venda em 0
+        assert sorted(actions) == [(-1, SELL, 1.0), (0, SELL, 1.0)]
+
+def test_partial_fill_and_cancel_in_the_same_sync():
+    book = make_book()
+    actions = book.on_closed([('o1', 0.4)], ['o-1'])
+    assert sorted(actions) == [(-1, BUY, 1.0), (0, BUY, 0.4)]
+
+def test_fills_targeting_the_same_level_get_a_single_order():
+    book = make_book()
+    actions = book.on_closed([('o-1', None), ('o1', None)])
+    assert [k for k, *_ in actions] == [0]
+
+def test_recenter_keeps_orders_on_the_right_side_and_tracks_cancels():
+    book = make_book()
+    cancels, places = book.recenter(102.0)
+    assert book.center == 2
+    # Saem da janela [-1, 5]: -3 e -2; mudam de lado do centro: 1 (venda abaixo do novo centro) e 2 (centro)
+    assert sorted(cancels) == ['o-2', 'o-3', 'o1', 'o2']
+    assert sorted(places) == [(0, BUY), (1, BUY), (4, SELL), (5, SELL)]
+    assert book.order_ids[book._slot(-1)] == 'o-1' and book.sides[book._slot(2)] == NONE
+    # Cancelamentos seguem acompanhados até a confirmação e não rearmam níveis ao sair do livro
+    assert set(cancels) <= book.tracked_order_ids
+    assert book.on_closed([('o-3', None)]) == []
+    book.confirm_cancel('o1')
+    assert 'o1' not in book.tracked_order_ids
@@ -0,0 +1,44 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+from handlers.market_data_recorder import MarketDataRecorder, ReplayExchange, iter_records
+
+def record_and_crash(directory, count):
+    """Grava `count` velas em outro processo e o encerra com os._exit, sem fechar o segmento."""
+    script = textwrap.dedent(f"""
+        import os
+        from handlers.market_data_recorder import MarketDataRecorder
+        recorder = MarketDataRecorder({str(directory)!r}, flush_interval=0.0)
+        for i in range({count}):
+            recorder.record('ohlcv', 'BTC', {{'timeframe': '5m'}}, [[i, 1, 2, 0.5, 1.5, 10]], recv_ts=1000.0 + i)
+        os._exit(0)
+    """)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)
+
+def test_replay_reads_records_of_a_truncated_segment(tmp_path):
+    record_and_crash(tmp_path, 3)
+    recorder = MarketDataRecorder(str(tmp_path))
+    recorder.record('ohlcv', 'BTC', {'timeframe': '5m'}, [[3, 1, 2, 0.5, 1.5, 10]], recv_ts=1003.0)
+    recorder.close()
+
+    assert len(list(tmp_path.glob("segment-*.jsonl.gz"))) == 2
+    assert [r['response'][0][0] for r in iter_records(str(tmp_path))] == [0, 1, 2, 3]
+
+    async def replay():
+        exchange = ReplayExchange(str(tmp_path))
+        return [(await exchange.fetch_ohlcv('BTC', '5m'))[0][0] for _ in range(exchange.records_loaded)]
+
+    assert asyncio.run(replay()) == [0, 1, 2, 3]
+
+def test_segment_cut_mid_block_keeps_the_following_segments(tmp_path):
+    recorder = MarketDataRecorder(str(tmp_path), segment_max_bytes=1)
+    for i in range(2):
+        recorder.record('tickers', '*', {}, {'i': i}, recv_ts=1000.0 + i)
+    recorder.close()
+    first = sorted(tmp_path.glob("segment-*.jsonl.gz"))[0]
+    first.write_bytes(first.read_bytes()[:-6])  # Corta o trailer do gzip
+
+    assert [r['response']['i'] for r in iter_records(str(tmp_path))] == [0, 1]
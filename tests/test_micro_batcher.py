@@ -0,0 +1,81 @@
+import asyncio
+import time
+from handlers.micro_batcher import BarBatcher
+
+BAR_SECONDS, MAX_DELAY = 1, 0.3
+
+def bar_with_deadline_in(seconds: float) -> int:
+    """Timestamp (ms) de uma vela cujo prazo de espera vence em `seconds`."""
+    return int((time.time() + seconds - BAR_SECONDS - MAX_DELAY) * 1000)
+
+def make_batcher():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    return BarBatcher(process_batch, bar_seconds=BAR_SECONDS, max_delay=MAX_DELAY), batches
+
+async def first_bar(batcher, keys):
+    """Primeira vela: sem participantes conhecidos, o lote sai pelo prazo."""
+    bar = bar_with_deadline_in(0.05)
+    await asyncio.gather(*(batcher.submit(bar, key, 0) for key in keys))
+
+def test_batch_is_flushed_when_every_participant_reported():
+    async def scenario():
+        batcher, batches = make_batcher()
+        await first_bar(batcher, ['a', 'b'])
+        bar = bar_with_deadline_in(10.0)
+        started = time.monotonic()
+        batcher.skip(bar, 'b')
+        result = await batcher.submit(bar, 'a', 1)
+        return result, time.monotonic() - started, batches
+
+    result, elapsed, batches = asyncio.run(scenario())
+    assert result == 10
+    assert elapsed < 0.1
+    assert batches[-1] == [1]
+
+def test_batch_is_flushed_at_the_deadline_without_missing_participants():
+    async def scenario():
+        batcher, batches = make_batcher()
+        await first_bar(batcher, ['a', 'b'])
+        bar = bar_with_deadline_in(0.2)
+        started = time.monotonic()
+        result = await batcher.submit(bar, 'a', 1)  # 'b' não se reporta
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == 10
+    assert 0.15 < elapsed < 0.5
+
+def test_late_submit_is_processed_alone_and_expected_again():
+    async def scenario():
+        batcher, batches = make_batcher()
+        await first_bar(batcher, ['a'])
+        bar = bar_with_deadline_in(0.05)
+        await batcher.submit(bar, 'a', 1)  # Lote da vela sai só com 'a'
+        late = await batcher.submit(bar, 'b', 2)
+        return late, batches, batcher._expected
+
+    late, batches, expected = asyncio.run(scenario())
+    assert late == 20
+    assert batches[-1] == [2]
+    assert expected == {'a', 'b'}
+
+def test_participant_whose_next_tick_is_after_the_deadline_is_not_awaited():
+    async def scenario():
+        batcher, batches = make_batcher()
+        await first_bar(batcher, ['fast', 'slow'])
+        # Ticks de 'slow' espaçados em 0.5 s: o próximo cai depois do prazo da vela seguinte
+        await asyncio.sleep(0.5)
+        batcher.skip(bar_with_deadline_in(-1.0), 'slow')
+        bar = bar_with_deadline_in(0.3)
+        started = time.monotonic()
+        result = await batcher.submit(bar, 'fast', 1)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == 10
+    assert elapsed < 0.1
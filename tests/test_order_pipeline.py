@@ -0,0 +1,141 @@
+import asyncio
+import ccxt.async_support as ccxt
+from handlers.order_pipeline import OrderPipeline, PRIORITY_ENTRY, PRIORITY_EXIT
+
+class FakeExchange:
+    """Exchange em memória: ordens indexadas pelo clientOrderId."""
+    def __init__(self, create_delay: float = 0.0, network_failures: int = 0):
+        self.create_delay = create_delay
+        self.network_failures = network_failures  # Envios que chegam à exchange, mas a resposta se perde
+        self.orders = {}
+        self.created = []  # (symbol, side, amount, params) na ordem de chegada
+
+    async def create_order(self, symbol, order_type, side, amount, price=None, params=None):
+        cloid = params['clientOrderId']
+        self.created.append((symbol, side, amount, dict(params)))
+        order = {'id': str(len(self.created)), 'clientOrderId': cloid, 'symbol': symbol, 'side': side,
+                 'type': order_type, 'amount': amount, 'filled': amount, 'status': 'closed'}
+        self.orders.setdefault(cloid, order)
+        if self.network_failures:
+            self.network_failures -= 1
+            raise ccxt.NetworkError("conexão encerrada")
+        await asyncio.sleep(self.create_delay)
+        return order
+
+    async def fetch_order(self, order_id, symbol, params=None):
+        order = self.orders.get(params['clientOrderId'])
+        if order is None:
+            raise ccxt.OrderNotFound(params['clientOrderId'])
+        return order
+
+class FakeHandler:
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.cancelled = []
+
+    async def cancel_order(self, order_id, symbol):
+        self.cancelled.append(order_id)
+        return True
+
+def make_pipeline(exchange, **kwargs):
+    return OrderPipeline(FakeHandler(exchange), retry_backoff=0.0, **kwargs)
+
+def test_order_filled_after_the_deadline_is_recovered_by_client_id():
+    async def scenario():
+        exchange = FakeExchange(create_delay=0.2)  # Executada, mas a resposta chega depois do prazo
+        pipeline = make_pipeline(exchange)
+        order = await pipeline.submit('BTC', 'buy', 1.0, timeout=0.05)
+        await pipeline.stop()
+        return exchange, order
+
+    exchange, order = asyncio.run(scenario())
+    assert order.filled == 1.0
+    assert len(exchange.created) == 1
+
+def test_retry_reuses_client_id_and_does_not_duplicate():
+    async def scenario():
+        exchange = FakeExchange(network_failures=1)
+        pipeline = make_pipeline(exchange)
+        order = await pipeline.submit('BTC', 'buy', 1.0, params={'clientOrderId': '0xabc'})
+        await pipeline.stop()
+        return exchange, order
+
+    exchange, order = asyncio.run(scenario())
+    # A primeira tentativa chegou à exchange: a consulta a encontra e não há reenvio
+    assert order.client_order_id == '0xabc'
+    assert len(exchange.created) == 1
+
+def test_exits_are_sent_before_queued_entries():
+    async def scenario():
+        exchange = FakeExchange()
+        pipeline = make_pipeline(exchange, workers=1)
+        blocker = asyncio.create_task(pipeline.submit('A', 'buy', 1.0, priority=PRIORITY_ENTRY))
+        await asyncio.sleep(0)
+        entries = [asyncio.create_task(pipeline.submit('E', 'buy', 1.0, priority=PRIORITY_ENTRY)) for _ in range(2)]
+        exit_order = asyncio.create_task(pipeline.submit('X', 'sell', 1.0, priority=PRIORITY_EXIT))
+        await asyncio.gather(blocker, *entries, exit_order)
+        await pipeline.stop()
+        return [symbol for symbol, *_ in exchange.created]
+
+    assert asyncio.run(scenario()) == ['A', 'X', 'E', 'E']
+
+def test_leg_that_timed_out_but_filled_is_unwound():
+    async def scenario():
+        exchange = FakeExchange()
+        original_create = exchange.create_order
+
+        async def create_order(symbol, order_type, side, amount, price=None, params=None):
+            if symbol == 'SLOW':  # Executada na exchange, mas a confirmação passa do prazo
+                order = await original_create(symbol, order_type, side, amount, price, params)
+                await asyncio.sleep(0.2)
+                return order
+            if symbol == 'FAIL':
+                raise ccxt.ExchangeError("margem insuficiente")
+            return await original_create(symbol, order_type, side, amount, price, params)
+
+        exchange.create_order = create_order
+        pipeline = make_pipeline(exchange)
+        legs = [
+            {'symbol': 'SLOW', 'side': 'buy', 'amount': 2.0},
+            {'symbol': 'FAIL', 'side': 'sell', 'amount': 1.0},
+        ]
+        result = await pipeline.submit_legs(legs, timeout=0.05)
+        await pipeline.stop()
+        return exchange, result
+
+    exchange, result = asyncio.run(scenario())
+    assert result is None
+    # A perna SLOW é recuperada pela consulta do _send; a FAIL não existe na exchange
+    unwinds = [(symbol, side, amount) for symbol, side, amount, params in exchange.created if params.get('reduceOnly')]
+    assert unwinds == [('SLOW', 'sell', 2.0)]
+
+def test_leg_in_unknown_state_is_unwound_reduce_only():
+    async def scenario():
+        exchange = FakeExchange()
+        original_create = exchange.create_order
+
+        async def create_order(symbol, order_type, side, amount, price=None, params=None):
+            if symbol == 'LOST' and not params.get('reduceOnly'):
+                await original_create(symbol, order_type, side, amount, price, params)
+                raise ccxt.NetworkError("resposta perdida")
+            return await original_create(symbol, order_type, side, amount, price, params)
+
+        async def fetch_order(order_id, symbol, params=None):
+            raise ccxt.NetworkError("sem resposta")
+
+        exchange.create_order, exchange.fetch_order = create_order, fetch_order
+        pipeline = make_pipeline(exchange)
+        legs = [
+            {'symbol': 'OK', 'side': 'buy', 'amount': 1.0},
+            {'symbol': 'LOST', 'side': 'sell', 'amount': 3.0},
+        ]
+        result = await pipeline.submit_legs(legs)
+        await pipeline.stop()
+        return exchange, result
+
+    exchange, result = asyncio.run(scenario())
+    assert result is None
+    unwinds = sorted((symbol, side, amount) for symbol, side, amount, params in exchange.created if params.get('reduceOnly'))
+    assert unwinds == [('LOST', 'buy', 3.0), ('OK', 'sell', 1.0)]
+    # A perna perdida não foi reenviada às cegas
+    assert [symbol for symbol, *_ in exchange.created].count('LOST') == 2  # envio original + desfazimento
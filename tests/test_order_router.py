@@ -0,0 +1,36 @@
+import asyncio
+import queue
+import pytest
+from handlers.order_router import OrderRouterClient, ROUTER_DOWN
+
+def test_pending_calls_fail_when_the_router_goes_away():
+    async def scenario():
+        requests, responses = queue.Queue(), queue.Queue()
+        client = OrderRouterClient(0, requests, responses)
+        pending = asyncio.create_task(client.call("get_balance_usd"))
+        await asyncio.sleep(0.01)
+        assert requests.get_nowait()[2] == "get_balance_usd"
+        responses.put(ROUTER_DOWN)
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(pending, 1.0)
+        # Chamadas seguintes falham na hora, sem aguardar resposta
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(client.call("get_balance_usd"), 1.0)
+        assert requests.empty()
+
+    asyncio.run(scenario())
+
+def test_responses_are_delivered_to_their_calls():
+    async def scenario():
+        requests, responses = queue.Queue(), queue.Queue()
+        client = OrderRouterClient(0, requests, responses)
+        calls = [asyncio.create_task(client.call("get_order", str(i), "BTC")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        for _ in range(3):
+            _, request_id, _, args, _ = requests.get_nowait()
+            responses.put((request_id, True, args[0]))
+        results = await asyncio.wait_for(asyncio.gather(*calls), 1.0)
+        client.stop()
+        return results
+
+    assert asyncio.run(scenario()) == ['0', '1', '2']
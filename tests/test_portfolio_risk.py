@@ -0,0 +1,54 @@
+import numpy as np
+from handlers.portfolio_risk import PortfolioRiskEngine
+from handlers.records import Position
+
+BAR_MS = 300_000
+
+def make_engine():
+    return PortfolioRiskEngine(['A', 'B'], {'ewma_lambda': 0.9, 'min_bars': 1})
+
+def feed(engine, bar, closes: dict):
+    for symbol, close in closes.items():
+        engine.observe_close(symbol, bar * BAR_MS, close)
+
+def test_held_asset_variance_does_not_decay_without_observations():
+    engine = make_engine()
+    rng = np.random.default_rng(1)
+    prices = np.array([100.0, 50.0])
+    for bar in range(41):
+        prices *= np.exp(rng.normal(0, 0.01, 2))
+        feed(engine, bar, {'A': prices[0], 'B': prices[1]})
+    # A partir da vela 41, 'A' (em posição) deixa de receber fechamentos
+    prices[1] *= np.exp(rng.normal(0, 0.01))
+    feed(engine, 41, {'B': prices[1]})  # Consolida a vela 40, ainda com 'A'
+    var_a, cov_ab = engine.covariance[0, 0], engine.covariance[0, 1]
+    assert var_a > 0
+
+    # Sem observações de 'A', variância e covariâncias não podem decair para 0
+    for bar in range(42, 62):
+        prices[1] *= np.exp(rng.normal(0, 0.01))
+        feed(engine, bar, {'B': prices[1]})
+    assert engine.covariance[0, 0] == var_a
+    assert engine.covariance[0, 1] == cov_ab
+
+def test_return_spanning_a_gap_is_not_counted_as_one_bar():
+    engine = make_engine()
+    feed(engine, 0, {'A': 100.0, 'B': 100.0})
+    feed(engine, 1, {'B': 100.0})
+    feed(engine, 2, {'A': 150.0, 'B': 100.0})  # 'A' volta após faltar na vela 1
+    feed(engine, 3, {'A': 150.0, 'B': 100.0})
+    assert engine.covariance[0, 0] == 0.0
+
+def test_symbols_outside_the_initial_universe_count_in_the_limits():
+    engine = PortfolioRiskEngine(['A'], {'max_gross_leverage': 2.0, 'max_asset_leverage': 1.5, 'min_bars': 1000})
+    engine.sync_positions([Position('A', 'long', 1.0, notional=100.0), Position('SCREENED', 'long', 1.0, notional=100.0)])
+    assert engine.exposures.sum() == 200.0
+    # Bruto após a ordem: 100 + 100 + 50 > 2 x 100
+    assert not engine.evaluate(['NEW'], [50.0], equity=100.0).any()
+    assert engine.symbols == ['A', 'SCREENED', 'NEW']
+    assert engine.covariance.shape == (3, 3)
+
+def test_same_symbol_in_several_accounts_is_summed():
+    engine = make_engine()
+    engine.sync_positions([Position('A', 'long', 1.0, notional=100.0), Position('A', 'short', 0.4, notional=40.0)])
+    assert engine.exposures[0] == 60.0
@@ -0,0 +1,46 @@
+import asyncio
+from handlers.position_reconciler import PositionReconciler
+from handlers.records import Position
+from handlers.state_manager import StateManager
+
+class FakeHandler:
+    def __init__(self, positions=None):
+        self.positions = positions or []
+        self.fail = False
+
+    async def fetch_open_positions(self):
+        if self.fail:
+            raise ConnectionError("timeout")
+        return self.positions
+
+def make_reconciler(grace_period):
+    handler = FakeHandler()
+    reconciler = PositionReconciler(handler, grace_period=grace_period)
+    state_manager = StateManager()
+    reconciler.register('BTC', state_manager)
+    return handler, reconciler, state_manager
+
+def test_recent_entry_is_kept_during_the_grace_period():
+    handler, reconciler, state_manager = make_reconciler(grace_period=60.0)
+    state_manager.set_in_position()  # Ordem enviada, posição ainda não visível na exchange
+    assert asyncio.run(reconciler.reconcile_once())
+    assert state_manager.state == "IN_POSITION"
+
+def test_closed_position_resets_to_idle_after_the_grace_period():
+    handler, reconciler, state_manager = make_reconciler(grace_period=60.0)
+    state_manager.set_in_position()
+    state_manager._changed_at -= 61.0  # Entrada feita há mais que a carência
+    asyncio.run(reconciler.reconcile_once())
+    assert state_manager.state == "IDLE"
+
+def test_existing_position_marks_idle_strategy_and_errors_change_nothing():
+    handler, reconciler, state_manager = make_reconciler(grace_period=0.0)
+    handler.positions = [Position('BTC', 'long', 1.0, notional=100.0)]
+    asyncio.run(reconciler.reconcile_once())
+    assert state_manager.state == "IN_POSITION"
+
+    # Uma consulta que falha não pode ser lida como "sem posições"
+    handler.fail = True
+    assert not asyncio.run(reconciler.reconcile_once())
+    assert state_manager.state == "IN_POSITION"
+    assert 'BTC' in reconciler.open_positions
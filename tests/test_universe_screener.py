@@ -0,0 +1,36 @@
+import numpy as np
+from handlers.universe_screener import ReversionScreener
+
+BAR = 300
+
+def feed(screener, bars: list):
+    """Um ticker por vela; uma consulta extra fecha a última vela."""
+    for t, prices in enumerate(bars + [bars[-1]]):
+        screener.observe_tickers(
+            {symbol: {'last': price, 'quoteVolume': 1e6 if symbol != 'THIN/USDC:USDC' else 10.0}
+             for symbol, price in prices.items()},
+            now=t * BAR + 1,
+        )
+
+def test_most_stretched_markets_are_ranked_by_distance_in_atrs():
+    screener = ReversionScreener(bollinger_length=10, rsi_length=3, atr_length=3, bar_seconds=BAR,
+                                 min_quote_volume=1000.0, exclude_symbols=['SKIP/USDC:USDC'])
+    base = {'DROP/USDC:USDC': 100.0, 'DIP/USDC:USDC': 100.0, 'PUMP/USDC:USDC': 100.0,
+            'FLAT/USDC:USDC': 100.0, 'THIN/USDC:USDC': 100.0, 'SKIP/USDC:USDC': 100.0, 'BTC/USDC': 100.0}
+    bars = [dict(base, **{'DIP/USDC:USDC': 100.0 + t % 2}) for t in range(12)]
+    bars.append({**base, 'DROP/USDC:USDC': 90.0, 'DIP/USDC:USDC': 97.0, 'PUMP/USDC:USDC': 108.0,
+                 'THIN/USDC:USDC': 80.0, 'SKIP/USDC:USDC': 80.0, 'BTC/USDC': 80.0})
+    feed(screener, bars)
+
+    ranked = screener.rank(top_k=10)
+    assert {c['symbol']: c['side'] for c in ranked} == {
+        'DROP/USDC:USDC': 'buy', 'DIP/USDC:USDC': 'buy', 'PUMP/USDC:USDC': 'sell',
+    }
+    stretches = [c['stretch'] for c in ranked]
+    assert stretches == sorted(stretches, reverse=True)
+
+    ind = screener.indicators()
+    row = screener._index['DROP/USDC:USDC']
+    expected = (ind['lower_band'][row] - ind['close'][row]) / ind['atr'][row]
+    assert np.isclose(ranked[[c['symbol'] for c in ranked].index('DROP/USDC:USDC')]['stretch'], expected)
+    assert screener.rank(top_k=1) == ranked[:1]
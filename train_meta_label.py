@@ -0,0 +1,254 @@
+# train_meta_label.py
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+# Importações dos Módulos e Configurações
+from config import PLATFORM_PARAMS, STRATEGY_CONFIG, PORTFOLIO_ASSETS
+from handlers.records import candles_to_frame
+from strategies.trend_following import FEATURE_COLUMNS, MODEL_FILE, MODELS_PATH, compute_features
+
+logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)-8s [%(name)s] %(message)s")
+logger = logging.getLogger("MetaLabelTraining")
+
+CACHE_PATH = MODELS_PATH.parent / "cache"
+TIMEFRAME_MS = {'1m': 60_000, '5m': 300_000, '15m': 900_000, '1h': 3_600_000}
+
+# ==============================================================================
+# DADOS HISTÓRICOS (cache incremental em disco)
+# ==============================================================================
+def candles_cache_file(symbol: str, timeframe: str) -> Path:
+    safe = symbol.replace('/', '_').replace(':', '_')
+    return CACHE_PATH / f"candles_{safe}_{timeframe}.npz"
+
+def load_cached_candles(symbol: str, timeframe: str) -> np.ndarray:
+    path = candles_cache_file(symbol, timeframe)
+    if not path.exists():
+        return np.empty((0, 6))
+    with np.load(path) as data:
+        return data['ohlcv']
+
+async def update_candles_cache(exchange, symbol: str, timeframe: str, since_ms: int, page_limit: int = 5000) -> int:
+    """
+    Completa o cache de velas a partir da última vela salva. A Hyperliquid só serve as
+    ~5000 velas mais recentes de cada série; o histórico longo é formado pelo acúmulo
+    do cache entre execuções.
+    """
+    cached = load_cached_candles(symbol, timeframe)
+    cursor = int(cached[-1, 0]) + TIMEFRAME_MS[timeframe] if len(cached) else since_ms
+    pages = []
+    while True:
+        page = await exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+        if not page:
+            break
+        pages.append(np.asarray(page, dtype=np.float64))
+        cursor = int(page[-1][0]) + TIMEFRAME_MS[timeframe]
+        if len(page) < page_limit:
+            break
+
+    if pages:
+        merged = np.vstack([cached] + pages)
+        _, unique_idx = np.unique(merged[:, 0], return_index=True)
+        merged = merged[unique_idx]
+        CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(candles_cache_file(symbol, timeframe), ohlcv=merged)
+        return len(merged) - len(cached)
+    return 0
+
+async def refresh_history(symbols: list, timeframe: str, days: int):
+    """Atualiza o cache de todos os símbolos usando uma única conexão pública."""
+    import ccxt.async_support as ccxt
+    from handlers.markets_cache import open_markets_cache
+
+    exchange = ccxt.hyperliquid({"enableRateLimit": True})
+    since_ms = int((time.time() - days * 86_400) * 1000)
+    try:
+        await open_markets_cache(PLATFORM_PARAMS).attach(exchange)
+        for symbol in symbols:
+            try:
+                added = await update_candles_cache(exchange, symbol, timeframe, since_ms)
+                logger.info(f"{symbol}: {added} velas novas adicionadas ao cache.")
+            except Exception as e:
+                logger.error(f"Erro ao baixar histórico de {symbol}: {e}")
+    finally:
+        await exchange.close()
+
+# ==============================================================================
+# RÓTULOS (tripla barreira vetorizada)
+# ==============================================================================
+def crossover_events(ema_fast: np.ndarray, ema_slow: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Índices e lados (1 compra, -1 venda) dos cruzamentos de médias, como no modelo primário."""
+    above = ema_fast > ema_slow
+    below = ema_fast < ema_slow
+    long_idx = np.flatnonzero(below[:-1] & above[1:]) + 1
+    short_idx = np.flatnonzero(above[:-1] & below[1:]) + 1
+    idx = np.concatenate([long_idx, short_idx])
+    sides = np.concatenate([np.ones(len(long_idx)), -np.ones(len(short_idx))])
+    order = np.argsort(idx, kind='stable')
+    return idx[order], sides[order]
+
+def triple_barrier_labels(high: np.ndarray, low: np.ndarray, close: np.ndarray, event_idx: np.ndarray,
+                          sides: np.ndarray, atr: np.ndarray, pt_mult: float, sl_mult: float,
+                          max_holding: int) -> pd.DataFrame:
+    """
+    Rótulos de tripla barreira para todos os eventos de uma vez. A busca do primeiro
+    toque usa uma matriz (eventos x horizonte) de máximas/mínimas futuras e `argmax`
+    sobre as máscaras de barreira, sem loops Python por evento.
+
+    Meta-rótulo: 1 se o take profit for tocado antes do stop (ou se a barreira vertical
+    terminar com lucro), 0 caso contrário. Toque simultâneo conta como stop.
+    """
+    n = len(close)
+    entry = close[event_idx]
+    take_profit = entry + sides * atr[event_idx] * pt_mult
+    stop_loss = entry - sides * atr[event_idx] * sl_mult
+
+    offsets = np.arange(1, max_holding + 1)
+    path_idx = event_idx[:, None] + offsets[None, :]
+    valid = path_idx < n
+    path_idx = np.minimum(path_idx, n - 1)
+    path_high, path_low = high[path_idx], low[path_idx]
+
+    is_long = (sides > 0)[:, None]
+    tp_hit = np.where(is_long, path_high >= take_profit[:, None], path_low <= take_profit[:, None]) & valid
+    sl_hit = np.where(is_long, path_low <= stop_loss[:, None], path_high >= stop_loss[:, None]) & valid
+
+    no_touch = max_holding + 1
+    first_tp = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1) + 1, no_touch)
+    first_sl = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1) + 1, no_touch)
+
+    horizon_idx = np.minimum(event_idx + max_holding, n - 1)
+    vertical_return = sides * (close[horizon_idx] / entry - 1)
+
+    label = np.where(
+        first_tp < first_sl, 1,
+        np.where(first_sl < no_touch, 0, (vertical_return > 0).astype(int))
+    )
+    bars_held = np.minimum(np.minimum(first_tp, first_sl), max_holding)
+    # Eventos sem horizonte completo e sem toque não têm rótulo confiável
+    complete = (event_idx + max_holding < n) | (np.minimum(first_tp, first_sl) < no_touch)
+    return pd.DataFrame({
+        'event_idx': event_idx, 'side': sides, 'label': label, 'bars_held': bars_held,
+    })[complete]
+
+# ==============================================================================
+# FEATURES POR SÍMBOLO (pool de processos + cache em disco)
+# ==============================================================================
+def dataset_cache_file(symbol: str, timeframe: str, params: dict, max_holding: int, last_timestamp: int) -> Path:
+    """Arquivo de cache do dataset; muda sempre que parâmetros, features ou dados mudam."""
+    key = json.dumps({
+        'params': params, 'features': FEATURE_COLUMNS, 'max_holding': max_holding, 'last': last_timestamp,
+    }, sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    safe = symbol.replace('/', '_').replace(':', '_')
+    return CACHE_PATH / f"dataset_{safe}_{timeframe}_{digest}.pkl"
+
+def build_symbol_dataset(symbol: str, timeframe: str, params: dict, max_holding: int) -> pd.DataFrame | None:
+    """Features e rótulos de um símbolo. Executada em um processo do pool."""
+    ohlcv = load_cached_candles(symbol, timeframe)
+    if len(ohlcv) < 500:
+        logger.warning(f"{symbol}: histórico insuficiente ({len(ohlcv)} velas).")
+        return None
+
+    cache_file = dataset_cache_file(symbol, timeframe, params, max_holding, int(ohlcv[-1, 0]))
+    if cache_file.exists():
+        return pd.read_pickle(cache_file)
+
+    df = candles_to_frame(ohlcv)
+
+    # Mesmos indicadores do modelo primário ao vivo (pandas_ta)
+    ema_fast = df.ta.ema(length=params['ema_fast']).to_numpy()
+    ema_slow = df.ta.ema(length=params['ema_slow']).to_numpy()
+    atr = df.ta.atr(length=14).to_numpy()
+    features = compute_features(df.copy(), params['ffd_d'], params['ffd_threshold'])
+
+    event_idx, sides = crossover_events(ema_fast, ema_slow)
+    labels = triple_barrier_labels(
+        df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(),
+        event_idx, sides, atr,
+        params['take_profit_atr_multiplier'], params['stop_loss_atr_multiplier'], max_holding,
+    )
+    labels = labels[labels['event_idx'].isin(features.index)]
+
+    dataset = features.loc[labels['event_idx'].to_numpy()].reset_index(drop=True)
+    dataset['side'] = labels['side'].to_numpy()
+    dataset['label'] = labels['label'].to_numpy()
+    dataset['timestamp'] = df['timestamp'].to_numpy()[labels['event_idx'].to_numpy()]
+    dataset['symbol'] = symbol
+
+    CACHE_PATH.mkdir(parents=True, exist_ok=True)
+    dataset.to_pickle(cache_file)
+    return dataset
+
+def build_dataset(symbols: list, timeframe: str, params: dict, max_holding: int, workers: int) -> pd.DataFrame:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_symbol_dataset, s, timeframe, params, max_holding) for s in symbols]
+        parts = [f.result() for f in futures]
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True).sort_values('timestamp', ignore_index=True)
+
+# ==============================================================================
+# TREINAMENTO
+# ==============================================================================
+def train_model(dataset: pd.DataFrame, holdout_fraction: float = 0.2):
+    """Treina o filtro de meta-labeling e reporta a precisão em um holdout temporal."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import classification_report
+
+    X = dataset[FEATURE_COLUMNS].to_numpy()
+    y = dataset['label'].to_numpy()
+    split = int(len(dataset) * (1 - holdout_fraction))
+
+    def new_model():
+        return RandomForestClassifier(
+            n_estimators=500, max_features=1, min_weight_fraction_leaf=0.01,
+            class_weight='balanced_subsample', n_jobs=-1, random_state=42,
+        )
+
+    model = new_model().fit(X[:split], y[:split])
+    logger.info("Avaliação no holdout temporal:\n" + classification_report(y[split:], model.predict(X[split:]), zero_division=0))
+
+    model = new_model().fit(X, y)
+    MODELS_PATH.mkdir(parents=True, exist_ok=True)
+    # Sem compressão para que o ModelServer possa mapear os arrays em memória
+    joblib.dump(model, MODEL_FILE)
+    logger.info(f"Modelo salvo em '{MODEL_FILE}' ({len(dataset)} eventos, taxa de acerto base {y.mean():.2%}).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina o filtro de meta-labeling da TrendFollowingStrategy.")
+    parser.add_argument("--days", type=int, default=365, help="Histórico desejado em dias")
+    parser.add_argument("--timeframe", default="5m")
+    parser.add_argument("--max-holding", type=int, default=288, help="Barreira vertical em velas")
+    parser.add_argument("--workers", type=int, default=None, help="Processos para extração de features")
+    parser.add_argument("--offline", action="store_true", help="Usa apenas o cache local de velas")
+    args = parser.parse_args()
+
+    params = STRATEGY_CONFIG['trend_following']['params']
+    started = time.perf_counter()
+
+    if not args.offline:
+        asyncio.run(refresh_history(PORTFOLIO_ASSETS, args.timeframe, args.days))
+
+    dataset = build_dataset(PORTFOLIO_ASSETS, args.timeframe, params, args.max_holding, args.workers)
+    if dataset.empty:
+        logger.error("Nenhum evento rotulado. Verifique o cache de velas.")
+        return
+    logger.info(f"Dataset montado: {len(dataset)} eventos em {dataset['symbol'].nunique()} ativos.")
+
+    train_model(dataset)
+    logger.info(f"Pipeline concluído em {time.perf_counter() - started:.1f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 # strategies/trend_following.py
 
 import logging
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
-import joblib
 from pathlib import Path
 from .base_strategy import BaseStrategy
+from .fractional_diff import FFDState, ffd_window, frac_diff_ffd
+from handlers.model_server import get_model_server
+from handlers.records import CandleBlock
 
 logger = logging.getLogger("MetaLabeledTrendStrategy")
 
@@ -14,6 +17,72 @@ logger = logging.getLogger("MetaLabeledTrendStrategy")
 MODELS_PATH = Path(__file__).resolve().parent.parent / "backtesting/models"
 MODEL_FILE = MODELS_PATH / "meta_label_filter.pkl"
 
+# Ordem das features esperada pelo modelo de meta-labeling
+FEATURE_COLUMNS = ['volatility', 'momentum_rsi', 'frac_diff']
+
+# Velas buscadas a cada ciclo (suficiente para as EMAs, ATR e RSI)
+LIVE_CANDLE_LIMIT = 150
+
+def candles_required(params: dict) -> int:
+    """Velas necessárias para preencher a janela da diferenciação fracionária na inicialização."""
+    return max(LIVE_CANDLE_LIMIT, ffd_window(params['ffd_d'], params['ffd_threshold']) + 1)
+
+def compute_features(df: pd.DataFrame, ffd_d: float, ffd_threshold: float, frac_diff=None) -> pd.DataFrame:
+    """
+    Calcula as mesmas features usadas para treinar o modelo.
+    `frac_diff` permite informar a série FFD já calculada (ex.: valor incremental ao
+    vivo); se omitida, é calculada por convolução sobre o log do fechamento.
+    """
+    # Feature 1: Volatilidade (ATR)
+    df['volatility'] = df.ta.atr(length=14)
+
+    # Feature 2: Momentum (RSI)
+    df['momentum_rsi'] = df.ta.rsi(length=14)
+
+    # Feature 3: Diferenciação Fracionária de janela fixa (FFD) do log do preço
+    if frac_diff is None:
+        frac_diff = frac_diff_ffd(np.log(df['close']), ffd_d, ffd_threshold)
+    df['frac_diff'] = frac_diff
+
+    return df[FEATURE_COLUMNS].dropna()
+
+def compute_live_features(candles: CandleBlock, ffd_d: float, ffd_threshold: float, frac_diff: float) -> pd.DataFrame:
+    """
+    Features da vela atual para o filtro ao vivo. Apenas a última vela recebe o valor
+    FFD incremental; as demais são descartadas no dropna.
+    """
+    df = candles.to_frame()
+    frac_diff_series = pd.Series(np.nan, index=df.index)
+    frac_diff_series.iloc[-1] = frac_diff
+    return compute_features(df, ffd_d, ffd_threshold, frac_diff_series)
+
+def compute_crossover_signal(candles: CandleBlock, ema_fast: int, ema_slow: int) -> tuple[int, float | None]:
+    """
+    Calcula o sinal de cruzamento de médias e, se houver sinal, o ATR da última vela.
+    Função pura de CPU, executada fora do event loop via `BaseStrategy.offload`.
+    """
+    candles = candles.to_frame()
+    candles.ta.ema(length=ema_fast, append=True)
+    candles.ta.ema(length=ema_slow, append=True)
+
+    last_candle = candles.iloc[-1]
+    prev_candle = candles.iloc[-2]
+
+    signal = 0
+    if prev_candle[f'EMA_{ema_fast}'] < prev_candle[f'EMA_{ema_slow}'] and \
+       last_candle[f'EMA_{ema_fast}'] > last_candle[f'EMA_{ema_slow}']:
+        signal = 1
+    elif prev_candle[f'EMA_{ema_fast}'] > prev_candle[f'EMA_{ema_slow}'] and \
+         last_candle[f'EMA_{ema_fast}'] < last_candle[f'EMA_{ema_slow}']:
+        signal = -1
+
+    if signal == 0:
+        return signal, None
+
+    # Usa ATR para definir stop loss e take profit dinâmicos
+    candles.ta.atr(length=14, append=True)
+    return signal, candles.iloc[-1]['ATRr_14']
+
 class TrendFollowingStrategy(BaseStrategy):
     """
     Estratégia 3 (Final): Seguidor de Tendência com Filtro de Meta-Labeling de ML.
@@ -22,84 +91,143 @@ class TrendFollowingStrategy(BaseStrategy):
     def __init__(self, platform_params: dict, strategy_params: dict, symbol: str):
         super().__init__(platform_params, strategy_params)
         self.symbol = symbol  # Ativo específico que esta instância irá operar
-        # self.model = None
-        # self.load_model()
+        self.metrics.symbol = symbol
+        self.model_server = get_model_server(platform_params)
+        self.model = None
+        # Diferenciação fracionária incremental: apenas as velas novas são processadas a cada ciclo
+        self.ffd = FFDState(self.params['ffd_d'], self.params['ffd_threshold'])
+        self._ffd_last_timestamp = None
+        if self.params.get('use_ml_filter'):
+            self.load_model()
         logger.info(f"Instância de TrendFollowingStrategy criada para o símbolo: {self.symbol}")
 
     def load_model(self):
-        """Carrega o modelo de ML treinado no início."""
-        try:
-            self.model = joblib.load(MODEL_FILE)
+        """Carrega o modelo de ML treinado no início (uma única cópia compartilhada pelo processo)."""
+        self.model = self.model_server.get(MODEL_FILE)
+        if self.model is not None:
             logger.info(f"Filtro de Machine Learning '{MODEL_FILE.name}' carregado com sucesso.")
-        except FileNotFoundError:
+        else:
             logger.error(f"ERRO CRÍTICO: Modelo '{MODEL_FILE}' não encontrado. A estratégia não pode funcionar sem o filtro.")
-            self.model = None
 
     def get_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calcula as mesmas features usadas para treinar o modelo."""
-        # Feature 1: Volatilidade (ATR)
-        df['volatility'] = df.ta.atr(length=14)
-        
-        # Feature 2: Momentum (RSI)
-        df['momentum_rsi'] = df.ta.rsi(length=14)
-        
-        # Feature 3: Diferenciação Fracionária (requer a função)
-        # Por simplicidade na execução ao vivo, vamos omitir a diferenciação fracionária
-        # que é computacionalmente intensiva, e usar as outras duas features.
-        # Em um sistema de produção avançado, essa função seria portada para cá.
-        
-        return df[['volatility', 'momentum_rsi']].dropna()
+        return compute_features(df, self.params['ffd_d'], self.params['ffd_threshold'])
+
+    def update_frac_diff(self, candles: CandleBlock) -> float | None:
+        """
+        Incorpora as velas fechadas novas ao estado FFD (O(janela) por vela) e devolve
+        o valor da vela atual, ainda em formação. Refaz o backfill se houver lacuna.
+        """
+        closed = candles.closed()
+        timestamps = closed.timestamp
+        log_close = np.log(closed.close)
 
+        if self._ffd_last_timestamp is None or timestamps[0] > self._ffd_last_timestamp:
+            if len(closed) < self.ffd.width:
+                self.ffd.reset()
+                self._ffd_last_timestamp = None
+                return None
+            self.ffd.backfill(log_close)
+        else:
+            for value in log_close[timestamps > self._ffd_last_timestamp]:
+                self.ffd.update(value)
+
+        self._ffd_last_timestamp = timestamps[-1]
+        return self.ffd.peek(np.log(candles.close[-1]))
+
+    async def passes_ml_filter(self, candles: CandleBlock, frac_diff: float | None) -> bool:
+        """Consulta o modelo de meta-labeling (inferência em lote com os demais ativos da vela)."""
+        if frac_diff is None:
+            logger.warning(f"Janela da diferenciação fracionária ainda incompleta para {self.symbol}.")
+            return False
+        features = await self.offload(
+            compute_live_features, candles, self.params['ffd_d'], self.params['ffd_threshold'], frac_diff
+        )
+        if features.empty:
+            logger.warning(f"Features insuficientes para o filtro de ML em {self.symbol}.")
+            return False
+        probability = await self.model_server.predict_proba(
+            MODEL_FILE, features.iloc[-1].to_numpy(), candles.timestamp[-2], self.symbol
+        )
+        if probability is None:
+            return False
+        approved = probability >= self.params['ml_min_probability']
+        self.metrics.set_indicators(ml_prob=probability)
+        logger.info(f"Filtro de ML para {self.symbol}: probabilidade={probability:.2f} -> {'APROVADO' if approved else 'REJEITADO'}")
+        return approved
+
+
+    def _end_bar(self, bar_timestamp):
+        """
+        Reporta às barreiras por vela (lotes do ML e do risco de portfólio) que esta
+        instância terminou a vela, para que o lote não espere por ela até o prazo.
+        Sem efeito quando a instância já enviou seu item na vela.
+        """
+        if self.model is not None:
+            self.model_server.skip(MODEL_FILE, bar_timestamp, self.symbol)
+        self.risk_manager.skip_bar(self.symbol, bar_timestamp)
 
     async def process_tick(self):
         """Verifica sinais de tendência e os filtra com o modelo de ML."""
-        if self.state_manager.state == "IN_POSITION": # or not self.model:
+        if self.state_manager.state == "IN_POSITION":
+            # Com posição aberta, o ativo continua alimentando a covariância do risco de
+            # portfólio (apenas a última vela fechada é necessária)
+            candles = await self.data_handler.get_candles(self.symbol, '5m', 2)
+            if candles is not None and len(candles) >= 2:
+                self.risk_manager.observe_close(self.symbol, candles.timestamp[-2], candles.close[-2])
+                self._end_bar(candles.timestamp[-2])
+            return
+        if self.params.get('use_ml_filter') and self.model is None:
             return
 
         # O símbolo agora é um atributo da classe, definido no construtor
         symbol = self.symbol
         
         # 1. Obter dados e calcular sinais do modelo primário
-        candles = await self.data_handler.get_candles(symbol, '5m', 150) # Pegamos mais candles para os cálculos
+        # Na inicialização buscamos velas suficientes para preencher a janela FFD
+        limit = LIVE_CANDLE_LIMIT if self.ffd.ready else candles_required(self.params)
+        candles = await self.data_handler.get_candles(symbol, '5m', limit)
         if candles is None or len(candles) < self.params['ema_slow']:
             return
 
-        candles.ta.ema(length=self.params['ema_fast'], append=True)
-        candles.ta.ema(length=self.params['ema_slow'], append=True)
+        bar_timestamp = candles.timestamp[-2]  # Última vela fechada
+        try:
+            frac_diff = self.update_frac_diff(candles)
+            # Última vela fechada alimenta a covariância do risco de portfólio
+            self.risk_manager.observe_close(symbol, bar_timestamp, candles.close[-2])
 
-        last_candle = candles.iloc[-1]
-        prev_candle = candles.iloc[-2]
-        
-        signal = 0
-        if prev_candle[f'EMA_{self.params["ema_fast"]}'] < prev_candle[f'EMA_{self.params["ema_slow"]}'] and \
-           last_candle[f'EMA_{self.params["ema_fast"]}'] > last_candle[f'EMA_{self.params["ema_slow"]}']:
-            signal = 1
-        elif prev_candle[f'EMA_{self.params["ema_fast"]}'] > prev_candle[f'EMA_{self.params["ema_slow"]}'] and \
-             last_candle[f'EMA_{self.params["ema_fast"]}'] < last_candle[f'EMA_{self.params["ema_slow"]}']:
-            signal = -1
-
-        # 2. Se houver um sinal, executar o trade diretamente (filtro de ML desativado)
-        if signal != 0:
-            logger.info(f"Sinal de Cruzamento de Médias para {self.symbol}: {'COMPRA' if signal == 1 else 'VENDA'}")
-            
-            side = 'buy' if signal == 1 else 'sell'
-            
-            current_price = await self.data_handler.get_current_price(symbol)
-            if not current_price: return
+            signal, atr = await self.offload(
+                compute_crossover_signal, candles, self.params['ema_fast'], self.params['ema_slow']
+            )
+            self.metrics.set_indicators(close=candles.close[-1], frac_diff=frac_diff)
 
-            # Usa ATR para definir stop loss e take profit dinâmicos
-            candles.ta.atr(length=14, append=True)
-            atr = candles.iloc[-1]['ATRr_14']
+            # 2. Se houver um sinal, confirmar com o filtro de ML (quando habilitado) e executar o trade
+            if signal != 0:
+                logger.info(f"Sinal de Cruzamento de Médias para {self.symbol}: {'COMPRA' if signal == 1 else 'VENDA'}")
+                self.metrics.record_signal('COMPRA' if signal == 1 else 'VENDA')
+                self.metrics.set_indicators(atr=atr)
+
+                if self.params.get('use_ml_filter') and not await self.passes_ml_filter(candles, frac_diff):
+                    return
+
+                side = 'buy' if signal == 1 else 'sell'
             
-            stop_loss_price = current_price - (atr * self.params['stop_loss_atr_multiplier']) if side == 'buy' else current_price + (atr * self.params['stop_loss_atr_multiplier'])
-            take_profit_price = current_price + (atr * self.params['take_profit_atr_multiplier']) if side == 'buy' else current_price - (atr * self.params['take_profit_atr_multiplier'])
+                current_price = await self.data_handler.get_current_price(symbol)
+                if not current_price: return
 
-            size = await self.risk_manager.calculate_position_size(
-                self.params['risk_per_trade'], current_price, stop_loss_price
-            )
+                stop_loss_price = current_price - (atr * self.params['stop_loss_atr_multiplier']) if side == 'buy' else current_price + (atr * self.params['stop_loss_atr_multiplier'])
+                take_profit_price = current_price + (atr * self.params['take_profit_atr_multiplier']) if side == 'buy' else current_price - (atr * self.params['take_profit_atr_multiplier'])
+
+                size = await self.risk_manager.calculate_position_size(
+                    self.params['risk_per_trade'], current_price, stop_loss_price,
+                    symbol=symbol, bar_timestamp=bar_timestamp
+                )
             
-            if size:
-                await self.execution_handler.setup_trading_environment(symbol, self.platform_params['leverage'])
-                order_params = {'stopLoss': {'triggerPrice': stop_loss_price}, 'takeProfit': {'triggerPrice': take_profit_price}}
-                await self.execution_handler.place_order(symbol, 'market', side, size, params=order_params)
-                self.state_manager.set_in_position()
+                if size:
+                    await self.execution_handler.setup_trading_environment(symbol, self.platform_params['leverage'])
+                    order_params = {'stopLoss': {'triggerPrice': stop_loss_price}, 'takeProfit': {'triggerPrice': take_profit_price}}
+                    order = await self.execution_handler.place_order(symbol, side, size, 'market', params=order_params)
+                    if order:
+                        self.state_manager.set_in_position()
+        finally:
+            self._end_bar(bar_timestamp)
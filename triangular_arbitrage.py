@@ -15,6 +15,7 @@ class TriangularArbitrageStrategy(BaseStrategy):
         super().__init__(platform_params, strategy_params)
         
         self.market_pairs = self.params.get('market_pairs')
+        self.metrics.symbol = ", ".join(pair.split(':')[0] for pair in self.market_pairs or [])
         
         if not self.market_pairs or len(self.market_pairs) != 3:
             logger.critical("ERRO DE CONFIGURAÇÃO: A estratégia de arbitragem requer 'market_pairs' com 3 símbolos válidos.")
@@ -53,6 +54,7 @@ class TriangularArbitrageStrategy(BaseStrategy):
 
             # 4. Calcular a margem de lucro potencial (diferença percentual)
             profit_margin = ((price_ab_market / price_ab_implied) - 1) * 100
+            self.metrics.set_indicators(margin_pct=profit_margin)
 
             logger.info(
                 f"Análise de Arbitragem: "
@@ -70,6 +72,7 @@ class TriangularArbitrageStrategy(BaseStrategy):
                 else:
                     direction = "Comprar Mercado / Vender Implícito"
 
+                self.metrics.record_signal(direction)
                 logger.info(
                     f"OPORTUNIDADE DE ARBITRAGEM DETECTADA! "
                     f"Margem: {profit_margin:.4f}%, Direção: {direction}"
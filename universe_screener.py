@@ -0,0 +1,284 @@
+# Screener de reversão à média para todos os perpétuos da exchange
+import asyncio
+import logging
+import time
+import numpy as np
+
+logger = logging.getLogger("UniverseScreener")
+
+# Sufixo dos contratos perpétuos na Hyperliquid (ex.: 'BTC/USDC:USDC'); mercados spot são ignorados
+PERP_SUFFIX = ':USDC'
+
+class ReversionScreener:
+    """
+    Mantém Bollinger %B, IFR e ATR de todos os perpétuos listados em arrays NumPy
+    (uma linha por símbolo) e os atualiza de forma incremental a cada vela:
+
+    - as velas são montadas a partir de uma única consulta `fetch_tickers` por ciclo
+      (máxima, mínima e fechamento dos preços observados dentro de `bar_seconds`);
+    - IFR e ATR usam a suavização de Wilder (média simples nas primeiras `n` velas),
+      atualizada com uma operação vetorial por vela para o universo inteiro;
+    - as Bandas de Bollinger usam um buffer circular com os últimos fechamentos.
+
+    Os símbolos mais esticados (fora das bandas, com IFR extremo) são ordenados pela
+    distância até a banda em múltiplos do ATR e entregues às estratégias.
+
+    Bandas e IFR dependem só dos fechamentos, que são os mesmos nas velas históricas do
+    aquecimento e nas velas montadas dos tickers. Já a máxima e a mínima de poucas
+    amostras por vela subestimam o true range, então o ATR do universo serve apenas
+    para a pré-seleção: os finalistas têm o ATR recalculado a partir das velas da
+    exchange (`refine`) antes do ranking final.
+    """
+    def __init__(self, bollinger_length: int = 20, bollinger_std: float = 2.0, rsi_length: int = 14,
+                 atr_length: int = 14, rsi_oversold: float = 30, rsi_overbought: float = 70,
+                 bar_seconds: int = 300, min_quote_volume: float = 0.0, exclude_symbols=()):
+        self.bollinger_length = bollinger_length
+        self.bollinger_std = bollinger_std
+        self.rsi_length = rsi_length
+        self.atr_length = atr_length
+        self.rsi_oversold = rsi_oversold
+        self.rsi_overbought = rsi_overbought
+        self.bar_seconds = bar_seconds
+        self.min_quote_volume = min_quote_volume
+        self.exclude_symbols = set(exclude_symbols)
+        self.min_bars = max(bollinger_length, rsi_length + 1, atr_length + 1)
+
+        self.symbols = []
+        self._index = {}  # symbol -> linha
+        self._bar = None  # Índice (tempo // bar_seconds) da vela em formação
+        self._alloc(0)
+
+    def _alloc(self, n: int):
+        self.count = np.zeros(n, dtype=np.int64)         # Velas fechadas por símbolo
+        self.closes = np.full((n, self.bollinger_length), np.nan)  # Buffer circular de fechamentos
+        self.prev_close = np.full(n, np.nan)
+        self.avg_gain = np.zeros(n)
+        self.avg_loss = np.zeros(n)
+        self.atr = np.full(n, np.nan)
+        self.quote_volume = np.zeros(n)
+        self.bar_high = np.full(n, np.nan)
+        self.bar_low = np.full(n, np.nan)
+        self.bar_close = np.full(n, np.nan)
+
+    def _add_symbols(self, symbols: list):
+        """Acrescenta linhas para mercados novos, preservando o estado dos existentes."""
+        new = [s for s in symbols if s not in self._index and s not in self.exclude_symbols]
+        if not new:
+            return
+        old = {name: getattr(self, name) for name in ('count', 'closes', 'prev_close', 'avg_gain', 'avg_loss', 'atr',
+                                                      'quote_volume', 'bar_high', 'bar_low', 'bar_close')}
+        n_old = len(self.symbols)
+        self._alloc(n_old + len(new))
+        for name, values in old.items():
+            getattr(self, name)[:n_old] = values
+        for i, symbol in enumerate(new, start=n_old):
+            self._index[symbol] = i
+        self.symbols.extend(new)
+        if n_old:
+            logger.info(f"{len(new)} novos mercados adicionados ao screener ({len(self.symbols)} no total).")
+
+    # --- Atualização incremental ---
+
+    def _update(self, rows: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray):
+        """Incorpora uma vela fechada para as linhas `rows` (todas as operações são vetoriais)."""
+        prev = self.prev_close[rows]
+        has_prev = ~np.isnan(prev)
+        n = self.count[rows] + 1
+
+        # IFR (Wilder): média acumulada até `rsi_length` diferenças, depois suavização 1/n
+        delta = np.where(has_prev, close - prev, 0.0)
+        k = np.minimum(np.maximum(n - 1, 1), self.rsi_length)
+        self.avg_gain[rows] += np.where(has_prev, (np.maximum(delta, 0.0) - self.avg_gain[rows]) / k, 0.0)
+        self.avg_loss[rows] += np.where(has_prev, (np.maximum(-delta, 0.0) - self.avg_loss[rows]) / k, 0.0)
+
+        # ATR (Wilder) sobre o true range
+        true_range = np.where(
+            has_prev,
+            np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev))),
+            high - low,
+        )
+        atr = self.atr[rows]
+        k = np.minimum(n, self.atr_length)
+        self.atr[rows] = np.where(np.isnan(atr), true_range, atr + (true_range - atr) / k)
+
+        # Buffer circular das Bandas de Bollinger
+        self.closes[rows, (n - 1) % self.bollinger_length] = close
+        self.prev_close[rows] = close
+        self.count[rows] = n
+
+    def seed(self, candles_by_symbol: dict):
+        """
+        Aquecimento a partir de velas históricas (CandleBlock por símbolo). Todas as séries
+        terminam na última vela fechada, então são alinhadas pelo fim e processadas juntas.
+        """
+        self._add_symbols(list(candles_by_symbol))
+        blocks = {symbol: candles.closed() for symbol, candles in candles_by_symbol.items()
+                  if candles is not None and symbol in self._index}
+        depth = max((len(block) for block in blocks.values()), default=0)
+        for back in range(depth, 0, -1):
+            group = [(self._index[symbol], block) for symbol, block in blocks.items() if len(block) >= back]
+            rows = np.fromiter((row for row, _ in group), dtype=np.int64, count=len(group))
+            self._update(
+                rows,
+                np.array([block.high[-back] for _, block in group]),
+                np.array([block.low[-back] for _, block in group]),
+                np.array([block.close[-back] for _, block in group]),
+            )
+        if blocks:
+            last_bar = max(int(block.timestamp[-1]) for block in blocks.values() if len(block)) // 1000
+            self._bar = last_bar // self.bar_seconds + 1
+        logger.info(f"Screener aquecido com {len(blocks)} mercados ({depth} velas).")
+
+    def observe_tickers(self, tickers: dict, now: float = None) -> bool:
+        """
+        Registra uma consulta de tickers. Retorna True quando uma vela foi fechada (e os
+        indicadores atualizados) antes de incorporar os preços desta consulta.
+        """
+        now = time.time() if now is None else now
+        self._add_symbols([symbol for symbol in tickers if symbol.endswith(PERP_SUFFIX)])
+
+        bar = int(now // self.bar_seconds)
+        closed = False
+        if self._bar is not None and bar > self._bar:
+            closed = self._close_bar()
+        self._bar = bar
+
+        prices = np.full(len(self.symbols), np.nan)
+        for symbol, ticker in tickers.items():
+            row = self._index.get(symbol)
+            if row is None:
+                continue
+            price = ticker.get('last') or ticker.get('close')
+            if price:
+                prices[row] = price
+            self.quote_volume[row] = ticker.get('quoteVolume') or 0.0
+        seen = ~np.isnan(prices)
+        self.bar_high[seen] = np.fmax(self.bar_high[seen], prices[seen])
+        self.bar_low[seen] = np.fmin(self.bar_low[seen], prices[seen])
+        self.bar_close[seen] = prices[seen]
+        return closed
+
+    def _close_bar(self) -> bool:
+        rows = np.flatnonzero(~np.isnan(self.bar_close))
+        if rows.size:
+            self._update(rows, self.bar_high[rows], self.bar_low[rows], self.bar_close[rows])
+        self.bar_high.fill(np.nan)
+        self.bar_low.fill(np.nan)
+        self.bar_close.fill(np.nan)
+        return bool(rows.size)
+
+    # --- Indicadores e ranking ---
+
+    def indicators(self) -> dict:
+        """%B, IFR e ATR atuais do universo (NaN para símbolos ainda em aquecimento)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.closes.mean(axis=1)
+            std = self.closes.std(axis=1)
+            lower = mean - self.bollinger_std * std
+            upper = mean + self.bollinger_std * std
+            pct_b = (self.prev_close - lower) / (upper - lower)
+            rsi = np.where(self.avg_loss > 0, 100 - 100 / (1 + self.avg_gain / self.avg_loss), 100.0)
+        ready = self.count >= self.min_bars
+        return {
+            'close': self.prev_close, 'lower_band': lower, 'middle_band': mean, 'upper_band': upper,
+            'pct_b': np.where(ready, pct_b, np.nan), 'rsi': np.where(ready, rsi, np.nan),
+            'atr': np.where(ready, self.atr, np.nan),
+        }
+
+    def rank(self, top_k: int = 5) -> list:
+        """Símbolos mais esticados: fora das bandas com IFR extremo, ordenados pela distância em ATRs."""
+        ind = self.indicators()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            long_stretch = (ind['lower_band'] - ind['close']) / ind['atr']
+            short_stretch = (ind['close'] - ind['upper_band']) / ind['atr']
+            liquid = self.quote_volume >= self.min_quote_volume
+            longs = liquid & (ind['pct_b'] < 0) & (ind['rsi'] < self.rsi_oversold)
+            shorts = liquid & (ind['pct_b'] > 1) & (ind['rsi'] > self.rsi_overbought)
+        stretch = np.where(longs, long_stretch, np.where(shorts, short_stretch, -np.inf))
+        candidates = np.flatnonzero(np.isfinite(stretch))
+        best = candidates[np.argsort(-stretch[candidates])][:top_k]
+        return [
+            {
+                'symbol': self.symbols[row],
+                'side': 'buy' if longs[row] else 'sell',
+                'stretch': float(stretch[row]),
+                'pct_b': float(ind['pct_b'][row]),
+                'rsi': float(ind['rsi'][row]),
+                'atr': float(ind['atr'][row]),
+            }
+            for row in best
+        ]
+
+    def candle_atr(self, candles) -> float:
+        """ATR de Wilder das velas fechadas de um CandleBlock (mesma construção de `_update`)."""
+        closed = candles.closed()
+        if len(closed) < self.atr_length + 1:
+            return float('nan')
+        high, low, close = closed.high, closed.low, closed.close
+        true_range = np.empty(len(closed))
+        true_range[0] = high[0] - low[0]
+        prev = close[:-1]
+        true_range[1:] = np.maximum(high[1:] - low[1:], np.maximum(np.abs(high[1:] - prev), np.abs(low[1:] - prev)))
+        atr = true_range[0]
+        for n, value in enumerate(true_range[1:], start=2):
+            atr += (value - atr) / min(n, self.atr_length)
+        return float(atr)
+
+    async def refine(self, data_handler, candidates: list, top_k: int, limit: int = 100, concurrency: int = 4) -> list:
+        """
+        Recalcula o ATR dos pré-selecionados com velas OHLC reais e refaz o ranking.
+        Candidatos sem velas disponíveis mantêm o ATR montado a partir dos tickers.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(symbol):
+            async with semaphore:
+                return await data_handler.get_candles(symbol, f"{self.bar_seconds // 60}m", limit)
+
+        blocks = await asyncio.gather(*(fetch(c['symbol']) for c in candidates))
+        for candidate, candles in zip(candidates, blocks):
+            atr = self.candle_atr(candles) if candles is not None else float('nan')
+            if not np.isfinite(atr) or atr <= 0:
+                continue
+            candidate['stretch'] *= candidate['atr'] / atr
+            candidate['atr'] = atr
+        return sorted(candidates, key=lambda c: -c['stretch'])[:top_k]
+
+    # --- Loop ---
+
+    async def warm_up(self, data_handler, limit: int = 100, concurrency: int = 4):
+        """Busca velas históricas de todo o universo uma única vez (concorrência limitada)."""
+        tickers = await data_handler.get_tickers()
+        if not tickers:
+            return
+        symbols = [s for s in tickers if s.endswith(PERP_SUFFIX) and s not in self.exclude_symbols
+                   and (tickers[s].get('quoteVolume') or 0.0) >= self.min_quote_volume]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(symbol):
+            async with semaphore:
+                return symbol, await data_handler.get_candles(symbol, f"{self.bar_seconds // 60}m", limit)
+
+        self.seed(dict(await asyncio.gather(*(fetch(symbol) for symbol in symbols))))
+
+    async def run(self, data_handler, on_bar, poll_interval: float = 30.0, top_k: int = 5):
+        """
+        Consulta os tickers a cada `poll_interval` e, a cada vela fechada, chama
+        `on_bar(candidatos)` com os símbolos mais esticados. A pré-seleção (2 × `top_k`)
+        usa os indicadores do universo; o ranking final, o ATR das velas (ver `refine`).
+        """
+        logger.info(f"Screener de reversão iniciado (velas de {self.bar_seconds}s, consulta a cada {poll_interval:.0f}s).")
+        while True:
+            tickers = await data_handler.get_tickers()
+            if tickers and self.observe_tickers(tickers):
+                candidates = self.rank(2 * top_k)
+                if candidates:
+                    candidates = await self.refine(data_handler, candidates, top_k)
+                if candidates:
+                    logger.info(
+                        "Mais esticados: " + ", ".join(
+                            f"{c['symbol']} ({c['side']}, %B={c['pct_b']:.2f}, IFR={c['rsi']:.0f})" for c in candidates
+                        )
+                    )
+                on_bar(candidates)
+            await asyncio.sleep(poll_interval)